@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import Conversation, Message
-from core.serializers import UserSerializer
+from core.serializers import OrderItemSerializer, UserSerializer
+from core.sparse import SparseFieldsMixin
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     
     class Meta:
@@ -11,7 +12,7 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'sender', 'created_at']
 
 
-class ConversationSerializer(serializers.ModelSerializer):
+class ConversationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     participants = UserSerializer(many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
@@ -20,6 +21,8 @@ class ConversationSerializer(serializers.ModelSerializer):
         model = Conversation
         fields = ['id', 'participants', 'item', 'last_message', 'unread_count', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        sparse_sources = {'last_message': ['messages'], 'unread_count': []}
+        expandable_fields = {'item': lambda: OrderItemSerializer(read_only=True)}
     
     def get_last_message(self, obj):
         last_msg = obj.messages.last()
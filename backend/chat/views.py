@@ -2,12 +2,37 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db.models import Count, Max, Q
+from core import fastpath
+from core.conditional import conditional
+from core.sparse import SparseQuerysetMixin
 from .models import Conversation, Message
 from .serializers import ConversationSerializer, MessageSerializer
 
 
-class ConversationViewSet(viewsets.ModelViewSet):
+def conversation_validators(view, request, pk=None, **kwargs):
+    conversations = Conversation.objects.filter(participants=request.user)
+    if pk is not None:
+        if not str(pk).isdigit():
+            return None, None
+        conversations = conversations.filter(pk=pk)
+    stats = conversations.order_by().aggregate(
+        n=Count('id', distinct=True), last=Max('updated_at'), last_message=Max('messages__id'),
+        unread=Count('messages', filter=Q(messages__is_read=False)),
+    )
+    return stats, stats['last']
+
+
+def message_validators(view, request, pk=None, **kwargs):
+    if not str(pk).isdigit():
+        return None, None
+    stats = Message.objects.filter(conversation_id=pk, conversation__participants=request.user).aggregate(
+        n=Count('id'), last_id=Max('id'), unread=Count('id', filter=Q(is_read=False)), last=Max('created_at'),
+    )
+    return stats, stats['last']
+
+
+class ConversationViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = ConversationSerializer
     permission_classes = [IsAuthenticated]
     
@@ -15,6 +40,14 @@ class ConversationViewSet(viewsets.ModelViewSet):
         return Conversation.objects.filter(
             participants=self.request.user
         ).prefetch_related('participants', 'messages')
+
+    @conditional(conversation_validators)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional(conversation_validators)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     def create(self, request, *args, **kwargs):
         """Create a new conversation"""
@@ -53,15 +86,19 @@ class ConversationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'])
+    @conditional(message_validators)
     def messages(self, request, pk=None):
         """Get all messages in a conversation"""
         conversation = self.get_object()
+        if fastpath.enabled(request):
+            rows = conversation.messages.values(*fastpath.message_plan().columns)
+            return Response(fastpath.messages(rows, request))
         messages = conversation.messages.all().select_related('sender')
-        serializer = MessageSerializer(messages, many=True)
+        serializer = MessageSerializer(messages, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
     
@@ -69,6 +106,11 @@ class MessageViewSet(viewsets.ModelViewSet):
         return Message.objects.filter(
             conversation__participants=self.request.user
         ).select_related('sender', 'conversation')
+
+    def list(self, request, *args, **kwargs):
+        if fastpath.enabled(request):
+            return fastpath.list_response(self, self.get_queryset(), fastpath.message_plan(), fastpath.messages)
+        return super().list(request, *args, **kwargs)
     
     def create(self, request, *args, **kwargs):
         """Send a new message"""
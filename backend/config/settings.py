@@ -78,6 +78,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', # CORS Middleware must be first
+    'core.compression.CompressionMiddleware',  # gzip/brotli JSON responses; outermost after CORS
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -157,6 +158,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # orjson when installed; both fall back to DRF's stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
@@ -200,12 +211,59 @@ REST_USE_JWT = True
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Postgres connections. With DB_POOL (psycopg 3) each process shares one pool of
+# DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections across its gunicorn threads and
+# the TASK_WORKERS background threads (core/tasks.py), so Cloud Run scale-out
+# adds at most DB_POOL_MAX_SIZE connections per instance. Size it to at least
+# GUNICORN_THREADS + TASK_WORKERS (the default), or requests queue behind
+# background tasks; a request waits up to DB_POOL_TIMEOUT seconds for one (wait
+# times are reported by /api/health/, core/db.py). GUNICORN_THREADS is also
+# what the Dockerfile passes to gunicorn --threads. Without a pool each thread
+# keeps its own connection for DB_CONN_MAX_AGE seconds. Connections are
+# health-checked before reuse.
+# DB_PGBOUNCER=True for a transaction-mode PgBouncer in front of Postgres:
+# server-side cursors off (Django already leaves psycopg prepared statements off).
+DB_POOL = os.getenv('DB_POOL', 'True') == 'True'
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '8'))
+TASK_WORKERS = int(os.getenv('TASK_WORKERS', '2'))
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'False') == 'True'
+
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL', 'postgres://postgres@localhost:5432/thriftgram'),
-        conn_max_age=600
+        conn_max_age=0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        conn_health_checks=True,
+        disable_server_side_cursors=DB_PGBOUNCER,
     )
 }
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', GUNICORN_THREADS + TASK_WORKERS)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+    }
+
+# Caches. 'default' is per-process memory (throttling, short-lived dedupe);
+# 'views' is a larger per-process store for view-count dedupe keys.
+# 'shared' is visible to every Cloud Run instance and to management commands —
+# a Postgres table rather than Redis to stay on the free tier. The table is
+# created by `manage.py createcachetable` on container start.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'views': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'views',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('VIEW_DEDUPE_MAX_KEYS', '200000'))},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'thriftgram_cache',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
 
 AUTH_USER_MODEL = 'core.CustomUser'
 
@@ -295,11 +353,108 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
 STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+# Pooled keep-alive HTTP client for Stripe calls (core/stripe_service.py).
+# STRIPE_API_BASE points the SDK elsewhere, e.g. `manage.py fake_stripe_server`.
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE', '')
+STRIPE_CONNECT_TIMEOUT = float(os.getenv('STRIPE_CONNECT_TIMEOUT', '3'))
+STRIPE_READ_TIMEOUT = float(os.getenv('STRIPE_READ_TIMEOUT', '15'))
+STRIPE_HTTP_POOL_SIZE = int(os.getenv('STRIPE_HTTP_POOL_SIZE', '10'))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', '2'))
 
 # Gemini Vision (AI item analysis). If unset, analyze_image returns clearly
 # labeled mock data instead of real analysis — see core/ai_service.py.
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 
+# Outfit matching keeps each active user's closet as an in-memory matrix (LRU,
+# per process). About 2 KiB per 50-item closet — see `manage.py bench_outfit_cache`.
+# Closet edits only invalidate the instance that handled them; the TTL bounds
+# staleness on the others.
+WARDROBE_CACHE_MAX_USERS = int(os.getenv('WARDROBE_CACHE_MAX_USERS', '2000'))
+WARDROBE_CACHE_TTL = int(os.getenv('WARDROBE_CACHE_TTL', '60'))
+
+# "More like this" item index (memory-mapped NumPy files). Only the offline
+# `manage.py build_similarity_index` writes it, swapping in whole new files;
+# serving instances map it read-only and never write, so a directory they all
+# read (e.g. a bucket mounted into the image, refreshed by running the command
+# as a job) is safe. Disabled unless set.
+SIMILARITY_INDEX_DIR = os.getenv('SIMILARITY_INDEX_DIR', '')
+
+# Home feed ranking (core/feed_service.py). The candidate pool is rebuilt by
+# `manage.py build_feed_candidates` on a schedule; TTL is a safety net if it stops.
+FEED_CANDIDATE_POOL = int(os.getenv('FEED_CANDIDATE_POOL', '500'))
+FEED_CANDIDATE_TTL = int(os.getenv('FEED_CANDIDATE_TTL', '3600'))
+FEED_USER_TTL = int(os.getenv('FEED_USER_TTL', '300'))
+# Following feed: sellers above this many followers switch from fan-out-on-write
+# to fan-out-on-read (core/timeline_service.py).
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', '5000'))
+
+# Item view counting (core/view_counter.py): buffered per process, flushed in
+# one bulk UPDATE by the next view or a background timer; a viewer counts once
+# per item per dedupe window ('views' cache, VIEW_DEDUPE_MAX_KEYS entries).
+VIEW_COUNT_FLUSH_SECONDS = int(os.getenv('VIEW_COUNT_FLUSH_SECONDS', '10'))
+VIEW_COUNT_MAX_PENDING = int(os.getenv('VIEW_COUNT_MAX_PENDING', '5000'))
+VIEW_COUNT_BACKGROUND_FLUSH = os.getenv('VIEW_COUNT_BACKGROUND_FLUSH', 'True') == 'True'
+VIEW_DEDUPE_SECONDS = int(os.getenv('VIEW_DEDUPE_SECONDS', '1800'))
+
+# Proxies in front of the app that each append one X-Forwarded-For entry:
+# 1 on Cloud Run (Google's front end), 2 behind an external HTTPS load balancer.
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '1'))
+
+# Checkout holds (core/reservations.py). Also the Stripe session's expires_at,
+# which Stripe requires to be at least 30 minutes out.
+CHECKOUT_HOLD_SECONDS = int(os.getenv('CHECKOUT_HOLD_SECONDS', '1860'))
+
+# Drop launches (core/drop_mode.py). `manage.py advance_drops` renders drops
+# starting within the lead time; checkouts in a live drop are admitted at
+# DROP_CHECKOUT_RATE/s per instance, and the rest get a 429 with Retry-After.
+DROP_PREWARM_LEAD_SECONDS = int(os.getenv('DROP_PREWARM_LEAD_SECONDS', '900'))
+DROP_LOCAL_TTL = int(os.getenv('DROP_LOCAL_TTL', '2'))
+DROP_CHECKOUT_RATE = float(os.getenv('DROP_CHECKOUT_RATE', '20'))
+DROP_CHECKOUT_BURST = int(os.getenv('DROP_CHECKOUT_BURST', '20'))
+
+# Each item's first page of reviews is cached and dropped on review writes
+# (core/ratings.py). Reviewer names and avatars are embedded in the page and
+# can lag a profile edit by up to the TTL.
+REVIEW_FIRST_PAGE_TTL = int(os.getenv('REVIEW_FIRST_PAGE_TTL', '300'))
+
+# Unread notification badge counts live in the shared cache, kept up to date
+# on create / mark_all_read (notifications/unread.py); the TTL bounds drift.
+NOTIFICATION_UNREAD_TTL = int(os.getenv('NOTIFICATION_UNREAD_TTL', '600'))
+
+# Retention (core/retention.py, `manage.py prune_history` daily): notifications
+# are deleted this many days after creation, per type (0 keeps them); messages
+# older than MESSAGE_ARCHIVE_DAYS move to chat.ArchivedMessage (0 disables).
+NOTIFICATION_RETENTION_DAYS = {
+    kind: int(os.getenv(f'NOTIFICATION_RETENTION_{kind.upper()}_DAYS', days))
+    for kind, days in (('like', '90'), ('follow', '180'), ('message', '30'))
+}
+MESSAGE_ARCHIVE_DAYS = int(os.getenv('MESSAGE_ARCHIVE_DAYS', '0'))
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '5000'))
+
+# Compiled serialization for the items, featured, notifications and messages
+# lists (core/fastpath.py); False renders them with the DRF serializers.
+SERIALIZER_FASTPATH = os.getenv('SERIALIZER_FASTPATH', 'True') == 'True'
+
+# API response compression (core/compression.py): brotli if the optional
+# package is installed and accepted, gzip otherwise; small bodies skipped.
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+COMPRESS_CONTENT_TYPES = ('application/json',)
+
+# Shared secret Cloud Scheduler sends as X-Cron-Secret on its once-a-minute POST
+# to /api/cron/ (core/scheduled.py); unset disables the endpoint.
+CRON_SECRET = os.getenv('CRON_SECRET', '')
+
+# Background side effects (core/tasks.py): run on a thread pool of TASK_WORKERS
+# (set with the database pool above) after commit.
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False') == 'True'
+
+# Stripe webhook inbox (core/payments.py): failed events retry with exponential
+# backoff from STRIPE_EVENT_RETRY_SECONDS and are dead-lettered after max attempts.
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv('STRIPE_EVENT_MAX_ATTEMPTS', '8'))
+STRIPE_EVENT_RETRY_SECONDS = int(os.getenv('STRIPE_EVENT_RETRY_SECONDS', '60'))
+
 # Frontend URL for redirects
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
@@ -1,9 +1,12 @@
 """Test settings: fast, hermetic, no external services.
 
-SQLite in-memory, throttling off, cheap password hashing, local file storage,
+SQLite, throttling off, cheap password hashing, local file storage,
 and dummy Stripe keys so StripeService.is_configured() is True (the network call
 itself is monkeypatched in the tests that exercise checkout).
 """
+import os
+import tempfile
+
 from .settings import *  # noqa: F401,F403
 
 # Hermetic: CI has no .env, so never depend on env-provided config. Without
@@ -14,10 +17,14 @@ DEBUG = True
 ALLOWED_HOSTS = ['testserver', 'localhost']
 SECURE_SSL_REDIRECT = False
 
+# A throwaway file rather than :memory: so concurrent-checkout tests block on
+# SQLite's busy timeout like they would on a row lock, instead of failing with
+# the shared-cache "table is locked" error.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), f'thriftgram_test_{os.getpid()}.sqlite3')},
     }
 }
 
@@ -29,6 +36,12 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {'anon': None, 'user': None, 'login': None, 'register': None},
 }
 
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+    'views': CACHES['views'],  # noqa: F405
+}
+
 PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 
 STORAGES = {
@@ -38,3 +51,12 @@ STORAGES = {
 
 STRIPE_SECRET_KEY = 'sk_test_dummy'
 STRIPE_WEBHOOK_SECRET = 'whsec_dummy'
+
+# Off by default; similarity tests point it at tmp_path.
+SIMILARITY_INDEX_DIR = None
+
+# Run enqueued side effects inline; on_commit never fires inside test transactions.
+TASKS_EAGER = True
+
+# View buffers are flushed explicitly in tests, never from a timer thread.
+VIEW_COUNT_BACKGROUND_FLUSH = False
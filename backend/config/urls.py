@@ -27,7 +27,7 @@ from core.views import (
     ItemViewSet, UserViewSet, LeaderboardViewSet, ClosetItemViewSet,
     DropEventViewSet, RegisterView, GoogleLogin, OrderViewSet,
     ReviewViewSet, WishlistViewSet, eco_points_history,
-    create_checkout_session, stripe_webhook, health_check
+    create_checkout_session, cancel_checkout_session, stripe_webhook, health_check, run_scheduled_jobs
 )
 from notifications.views import NotificationViewSet
 from chat.views import ConversationViewSet, MessageViewSet
@@ -56,6 +56,8 @@ urlpatterns = [
     path('api/auth/google/', GoogleLogin.as_view(), name='google_login'),
     path('api/eco-points-history/', eco_points_history, name='eco_points_history'),
     path('api/create-checkout-session/', create_checkout_session, name='create_checkout_session'),
+    path('api/cancel-checkout-session/', cancel_checkout_session, name='cancel_checkout_session'),
     path('api/stripe-webhook/', stripe_webhook, name='stripe_webhook'),
     path('api/health/', health_check, name='health_check'),
+    path('api/cron/', run_scheduled_jobs, name='run_scheduled_jobs'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import (
     CustomUser, Item, ItemImage, Like, Order, Review, Wishlist,
-    Follow, ClosetItem, DropEvent, EcoPointsHistory,
+    Follow, ClosetItem, DropEvent, EcoPointsHistory, StripeEvent,
 )
 
 class ItemImageInline(admin.TabularInline):
@@ -19,6 +19,11 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'buyer', 'item', 'status', 'total_amount', 'created_at')
     list_filter = ('status', 'created_at')
 
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'type', 'status', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('status', 'type')
+    search_fields = ('event_id',)
+
 admin.site.register(CustomUser, UserAdmin)
 admin.site.register(Item, ItemAdmin)
 admin.site.register(Order, OrderAdmin)
@@ -28,4 +33,5 @@ admin.site.register(Wishlist)
 admin.site.register(Follow)
 admin.site.register(ClosetItem)
 admin.site.register(DropEvent)
+admin.site.register(StripeEvent, StripeEventAdmin)
 admin.site.register(EcoPointsHistory)
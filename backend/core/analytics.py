@@ -0,0 +1,80 @@
+"""
+Seller analytics from daily rollups.
+
+SellerDailyStats holds one row per seller per day. Signals (core/signals.py)
+and the view counter flush call `bump` with deltas as things happen, so the
+dashboard reads pre-aggregated rows from the (seller, day) unique index
+instead of counting over items, likes and orders on every request.
+`manage.py backfill_seller_stats` rebuilds the rows from the source tables.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Item, Like, Order, SellerDailyStats
+
+METRICS = ('listings', 'likes', 'views', 'orders', 'revenue', 'co2_saved', 'water_saved')
+SOLD_STATUSES = ('PAID', 'SHIPPED', 'DELIVERED')
+DEFAULT_RANGE_DAYS = 30
+
+
+def bump(seller_id, day=None, **deltas):
+    """Add `deltas` to a seller's row for `day` (default today), creating it if needed."""
+    day = day or timezone.localdate()
+    rows = SellerDailyStats.objects.filter(seller_id=seller_id, day=day)
+    if rows.update(**{k: F(k) + v for k, v in deltas.items()}):
+        return
+    try:
+        with transaction.atomic():
+            SellerDailyStats.objects.create(seller_id=seller_id, day=day, **deltas)
+    except IntegrityError:  # created concurrently
+        rows.update(**{k: F(k) + v for k, v in deltas.items()})
+
+
+def backfill(co2_per_sale, water_per_sale):
+    """Rebuild every row from items, likes and orders. Item views have no
+    per-day history, so each item's views land on the day it was listed.
+    Returns the number of rows written."""
+    rows = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+
+    for r in (Item.objects.annotate(day=TruncDate('created_at')).values('seller_id', 'day')
+              .annotate(n=Count('id'), views=Sum('view_count'))):
+        row = rows[r['seller_id'], r['day']]
+        row['listings'], row['views'] = r['n'], r['views'] or 0
+    for r in (Like.objects.annotate(day=TruncDate('created_at')).values('item__seller_id', 'day')
+              .annotate(n=Count('id'))):
+        rows[r['item__seller_id'], r['day']]['likes'] = r['n']
+    for r in (Order.objects.filter(status__in=SOLD_STATUSES).annotate(day=TruncDate('created_at'))
+              .values('seller_id', 'day').annotate(n=Count('id'), revenue=Sum('total_amount'))):
+        row = rows[r['seller_id'], r['day']]
+        row.update(orders=r['n'], revenue=r['revenue'] or Decimal('0'),
+                   co2_saved=co2_per_sale * r['n'], water_saved=water_per_sale * r['n'])
+
+    with transaction.atomic():
+        SellerDailyStats.objects.all().delete()
+        SellerDailyStats.objects.bulk_create(
+            [SellerDailyStats(seller_id=seller_id, day=day, **metrics)
+             for (seller_id, day), metrics in rows.items()],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def dashboard(seller, start=None, end=None):
+    """Lifetime totals plus a per-day series for [start, end] (default the
+    last 30 days), from one scan of the seller's rows."""
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    totals = dict.fromkeys(METRICS, 0)
+    series = []
+    for row in SellerDailyStats.objects.filter(seller=seller).order_by('day').values('day', *METRICS):
+        for k in METRICS:
+            totals[k] += row[k]
+        if start <= row['day'] <= end:
+            series.append(row)
+    return {'start': start, 'end': end, 'totals': totals, 'series': series}
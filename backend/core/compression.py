@@ -0,0 +1,80 @@
+"""
+Response compression for the API.
+
+Negotiated from Accept-Encoding: brotli when the client accepts it and the
+optional `brotli` package is installed, gzip otherwise. Bodies under
+COMPRESS_MIN_BYTES, streaming responses, responses that are already encoded
+and content types outside COMPRESS_CONTENT_TYPES pass through untouched.
+Strong ETags become weak, as with Django's GZipMiddleware, since the bytes
+on the wire no longer match the entity they were computed over.
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_ENCODING_RE = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.I)
+
+
+def accepted(header):
+    """Encodings the client accepts, per Accept-Encoding (q=0 excluded)."""
+    encodings = set()
+    for part in header.split(','):
+        match = _ENCODING_RE.match(part)
+        if match:
+            try:
+                q = float(match.group(2)) if match.group(2) else 1.0
+            except ValueError:
+                continue
+            if q > 0:
+                encodings.add(match.group(1).lower())
+    return encodings
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=settings.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def choose(header):
+    encodings = accepted(header)
+    if brotli is not None and 'br' in encodings:
+        return 'br'
+    if 'gzip' in encodings:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < settings.COMPRESS_MIN_BYTES
+                or response.get('Content-Type', '').split(';')[0].strip() not in settings.COMPRESS_CONTENT_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,95 @@
+"""
+Conditional GET for polled read endpoints.
+
+`@conditional(validators)` wraps a view method. `validators(view, request,
+*args, **kwargs)` returns the parts an ETag is built from, an optional
+last-modified datetime and, optionally, version keys to fold in. The parts are
+typically one aggregate query over the indexed rows the response is rendered
+from: counts, max ids, max updated_at. A matching If-None-Match (or
+If-Modified-Since) gets a 304 before anything is serialized; otherwise the
+response carries the ETag and Last-Modified. The requesting user and query
+string are always part of the tag.
+
+What a row's columns can't show - follower counts, and per-viewer fields
+such as is_liked / is_following - is covered by per-user versions in the
+shared cache, bumped from core/signals.py on Follow, Like and profile
+changes. Item deletes and sales don't move MAX(updated_at), so the item list
+also folds in a catalogue version bumped when one commits. Counters updated
+in place (likes, views, ratings) deliberately don't bump it: they change far
+more often than the listings, and a revalidated list may show them stale
+until the next listing change, while item detail always reflects them.
+
+All of a request's versions come from one get_many, one query against the
+production DatabaseCache. A version that falls out of the cache comes back
+as a fresh value, so eviction can only cost a 200, never a wrong 304.
+"""
+import hashlib
+import time
+from calendar import timegm
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+USER_VERSION_KEY = 'ver:user:{}'
+CATALOGUE_VERSION_KEY = 'ver:catalogue'
+
+
+def _cache():
+    return caches['shared']
+
+
+def user_version_key(user_id):
+    return USER_VERSION_KEY.format(user_id)
+
+
+def versions(keys):
+    found = _cache().get_many(keys)
+    for key in set(keys) - set(found):
+        _cache().add(key, time.time_ns(), None)
+        found[key] = _cache().get(key)
+    return [found[key] for key in keys]
+
+
+def _bump(key):
+    try:
+        _cache().incr(key)
+    except ValueError:
+        _cache().add(key, time.time_ns(), None)
+
+
+def bump_users(*user_ids):
+    for user_id in set(user_ids):
+        _bump(USER_VERSION_KEY.format(user_id))
+
+
+def bump_catalogue():
+    transaction.on_commit(lambda: _bump(CATALOGUE_VERSION_KEY))
+
+
+def conditional(validators):
+    def decorate(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            parts, last_modified, *keys = validators(view, request, *args, **kwargs)
+            user_id = request.user.id if request.user.is_authenticated else None
+            keys = ([user_version_key(user_id)] if user_id else []) + (keys[0] if keys else [])
+            material = repr((parts, user_id, versions(keys), sorted(request.query_params.lists())))
+            etag = quote_etag(hashlib.md5(material.encode(), usedforsecurity=False).hexdigest())
+            timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+        return wrapper
+    return decorate
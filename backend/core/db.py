@@ -0,0 +1,24 @@
+"""
+Connection pool metrics (psycopg_pool) for /api/health/.
+
+Counters are cumulative for the process since the pool opened; avg_wait_ms
+is the mean time a request waited for a free connection.
+"""
+from django.db import connection
+
+
+def pool_stats():
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    return {
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': requests,
+        'queued': stats.get('requests_queued', 0),
+        'errors': stats.get('requests_errors', 0),
+        'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / requests, 1) if requests else 0.0,
+    }
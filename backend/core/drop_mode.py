@@ -0,0 +1,167 @@
+"""
+Drop traffic mode.
+
+A drop launch sends everyone to `/api/items/?drop=<id>` and the checkout at
+once. Two things keep that off the database:
+
+* `manage.py advance_drops` (run every minute) renders the item list of every
+  drop that is live or starts within DROP_PREWARM_LEAD_SECONDS into the shared
+  cache, along with an item -> drop index. Requests read it through the
+  per-process default cache, so each instance touches the shared cache at most
+  once per DROP_LOCAL_TTL. The render is anonymous; the only per-user fields
+  (is_liked, seller.is_following, seller.email) are patched in per request.
+* Checkouts for items in a live drop pass an admission gate: a per-drop token
+  bucket (GCRA) that admits DROP_CHECKOUT_RATE per second per process, with
+  bursts of DROP_CHECKOUT_BURST. A caller with no free slot is turned away at
+  once with a Retry-After; nobody waits on a request thread, so a busy drop
+  can't tie up the instance's threads or pooled connections, and the database
+  sees a steady trickle instead of the herd.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils import timezone
+
+ITEMS_KEY = 'drop:{}:items'
+INDEX_KEY = 'drop:index'
+
+
+def _shared():
+    return caches['shared']
+
+
+def _local_get(key):
+    value = cache.get(key)
+    if value is None:
+        value = _shared().get(key)
+        if value is not None:
+            cache.set(key, value, settings.DROP_LOCAL_TTL)
+    return value
+
+
+def render(drop):
+    from .serializers import ItemSerializer
+    items = drop.items.select_related('seller').prefetch_related('images').order_by('-created_at')
+    return ItemSerializer(items, many=True).data
+
+
+def warm(drop, now=None):
+    """Render one drop's items into the shared cache until the drop ends."""
+    now = now or timezone.now()
+    ttl = max(int((drop.end_time - now).total_seconds()), 0) + settings.DROP_LOCAL_TTL
+    data = [dict(row) for row in render(drop)]
+    _shared().set(ITEMS_KEY.format(drop.id), data, ttl)
+    cache.delete(ITEMS_KEY.format(drop.id))
+    return data
+
+
+def prewarm(now=None):
+    """Warm every drop in or near its window and publish the item -> drop
+    index used by the checkout gate. Returns the drops warmed."""
+    from .models import DropEvent
+    now = now or timezone.now()
+    drops = list(DropEvent.objects.filter(
+        is_active=True, end_time__gt=now,
+        start_time__lte=now + timedelta(seconds=settings.DROP_PREWARM_LEAD_SECONDS),
+    ))
+    index = {}
+    for drop in drops:
+        for row in warm(drop, now):
+            index[row['id']] = (drop.id, drop.start_time.timestamp(), drop.end_time.timestamp())
+    ttl = 2 * settings.DROP_PREWARM_LEAD_SECONDS
+    _shared().set(INDEX_KEY, index, ttl)
+    cache.delete(INDEX_KEY)
+    return drops
+
+
+def cached_items(drop_id):
+    """The pre-rendered item list for a drop, or None if it isn't warm."""
+    return _local_get(ITEMS_KEY.format(drop_id))
+
+
+def personalise(rows, user):
+    """Patch the per-user fields of anonymous renders for `user`, in place."""
+    from .models import Follow, Like
+    if not user.is_authenticated or not rows:
+        return rows
+    liked = set(Like.objects.filter(user=user, item_id__in=[r['id'] for r in rows])
+                .values_list('item_id', flat=True))
+    followed = set(Follow.objects.filter(follower=user, following_id__in={r['seller']['id'] for r in rows})
+                   .values_list('following_id', flat=True))
+    for row in rows:
+        row['is_liked'] = row['id'] in liked
+        seller = row['seller']
+        seller['is_following'] = seller['id'] in followed
+        if seller['id'] == user.id:
+            seller['email'] = user.email
+    return rows
+
+
+def live_drop_for(item_ids, now=None):
+    """Id of the live drop any of these items belongs to, from the warm index."""
+    index = _local_get(INDEX_KEY)
+    if not index:
+        return None
+    now = now or time.time()
+    for item_id in item_ids:
+        entry = index.get(item_id)
+        if entry and entry[1] <= now < entry[2]:
+            return entry[0]
+    return None
+
+
+def refresh_items(item_ids):
+    """Re-render any warm drop containing these items (e.g. after a sale)."""
+    from .models import DropEvent
+    index = _shared().get(INDEX_KEY) or {}
+    drop_ids = {index[i][0] for i in item_ids if i in index}
+    for drop in DropEvent.objects.filter(id__in=drop_ids):
+        warm(drop)
+
+
+@dataclass
+class GateStats:
+    admitted: int = 0
+    rejected: int = 0
+
+    def as_dict(self):
+        return {'admitted': self.admitted, 'rejected': self.rejected}
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Per-drop token bucket. `admit(drop_id)` takes a slot if one is free
+    now, or raises QueueFull with the seconds until the next one. It never
+    blocks."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_slot = {}
+        self.stats = {}
+
+    def admit(self, drop_id):
+        interval = 1.0 / settings.DROP_CHECKOUT_RATE
+        burst = (settings.DROP_CHECKOUT_BURST - 1) * interval
+        with self._lock:
+            now = self._clock()
+            slot = max(self._next_slot.get(drop_id, 0.0), now - burst)
+            stats = self.stats.setdefault(drop_id, GateStats())
+            if slot > now:
+                stats.rejected += 1
+                raise QueueFull(math.ceil(slot - now))
+            self._next_slot[drop_id] = slot + interval
+            stats.admitted += 1
+
+
+admission_gate = AdmissionGate()
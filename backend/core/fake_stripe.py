@@ -0,0 +1,128 @@
+"""
+A stand-in for the slice of the Stripe API the checkout flow uses, for load
+testing end to end without network access or a Stripe account.
+
+Serves POST /v1/checkout/sessions and POST /v1/checkout/sessions/<id>/expire.
+With a webhook URL, every created session is "paid" after `complete_after`
+seconds by posting a checkout.session.completed event to it, signed with the
+webhook secret exactly as Stripe signs them, so the backend's signature
+check, inbox and processing all run for real. Point the backend at it with
+STRIPE_API_BASE (see `manage.py fake_stripe_server`).
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+
+def sign(payload, secret, timestamp=None):
+    """A Stripe-Signature header value for `payload` (bytes)."""
+    timestamp = int(timestamp or time.time())
+    signed = f'{timestamp}.'.encode() + payload
+    digest = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+class FakeStripe:
+    def __init__(self, webhook_url=None, webhook_secret='', complete_after=1.0):
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.complete_after = complete_after
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def create_session(self, form):
+        session_id = f'cs_fake_{uuid.uuid4().hex}'
+        session = {
+            'id': session_id,
+            'object': 'checkout.session',
+            'status': 'open',
+            'payment_status': 'unpaid',
+            'mode': form.get('mode', 'payment'),
+            'url': f'https://checkout.fake.stripe/{session_id}',
+            'success_url': form.get('success_url'),
+            'cancel_url': form.get('cancel_url'),
+            'expires_at': int(form['expires_at']) if form.get('expires_at') else int(time.time()) + 86400,
+            'metadata': {k[len('metadata['):-1]: v for k, v in form.items() if k.startswith('metadata[')},
+            'created': int(time.time()),
+        }
+        with self._lock:
+            self.sessions[session_id] = session
+        if self.webhook_url:
+            threading.Timer(self.complete_after, self.complete, args=[session_id]).start()
+        return session
+
+    def expire_session(self, session_id):
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if session['status'] == 'open':
+                session['status'] = 'expired'
+        return session
+
+    def complete(self, session_id):
+        with self._lock:
+            session = self.sessions[session_id]
+            if session['status'] != 'open':
+                return None
+            session.update(status='complete', payment_status='paid')
+        event = {
+            'id': f'evt_fake_{uuid.uuid4().hex}',
+            'object': 'event',
+            'type': 'checkout.session.completed',
+            'created': int(time.time()),
+            'data': {'object': dict(session)},
+        }
+        payload = json.dumps(event).encode()
+        return requests.post(self.webhook_url, data=payload, timeout=10, headers={
+            'Content-Type': 'application/json',
+            'Stripe-Signature': sign(payload, self.webhook_secret),
+        })
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+                form = {k: v[-1] for k, v in parse_qs(body).items()}
+                parts = self.path.split('?')[0].strip('/').split('/')
+                if parts == ['v1', 'checkout', 'sessions']:
+                    self.reply(200, fake.create_session(form))
+                elif parts[:3] == ['v1', 'checkout', 'sessions'] and parts[4:] == ['expire']:
+                    session = fake.expire_session(parts[3])
+                    if session is None:
+                        self.reply(404, {'error': {'type': 'invalid_request_error', 'message': 'No such session'}})
+                    else:
+                        self.reply(200, session)
+                else:
+                    self.reply(404, {'error': {'type': 'invalid_request_error', 'message': f'Unknown path {self.path}'}})
+
+            def reply(self, code, data):
+                payload = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('Request-Id', f'req_fake_{uuid.uuid4().hex[:12]}')
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve(self, host='127.0.0.1', port=12111):
+        """Start serving; returns the server (its address is server.server_address)."""
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        return server
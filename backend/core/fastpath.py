@@ -0,0 +1,220 @@
+"""
+Compiled read-only serialization for the hottest list endpoints.
+
+A DRF serializer walks its bound fields for every row and every nested
+object, and its method fields issue their own queries per row. Here each
+serializer is compiled once per process into a Plan: the `.values()`
+columns it reads and, per output key in the serializer's own order, an
+accessor that turns a row into the value. Plain fields reuse the bound DRF
+field's to_representation, so output stays byte-identical to the serializer
+(test_fastpath.py checks this). Nested objects and method fields come from a
+handful of batched queries per page (`Page`), not per row.
+
+Views take the fast path only for the default shape: ?fields= and ?expand=
+(core/sparse.py) and SERIALIZER_FASTPATH=False fall back to the serializers.
+`manage.py bench_serializers` compares the two.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Count
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .models import Follow, ItemImage, Like
+from .view_counter import view_counter
+
+
+def enabled(request):
+    params = request.query_params
+    return settings.SERIALIZER_FASTPATH and 'fields' not in params and 'expand' not in params
+
+
+def list_response(view, queryset, plan, render):
+    """A list view's response rendered by `render` from `plan`'s columns,
+    paginated like the view's own list()."""
+    rows = view.filter_queryset(queryset).select_related(None).prefetch_related(None).values(*plan.columns)
+    page = view.paginate_queryset(rows)
+    if page is None:
+        return Response(render(rows, view.request))
+    return view.get_paginated_response(render(page, view.request))
+
+
+class Plan:
+    """`serializer_class` compiled to (key, accessor(row, page)) steps.
+    `computed` supplies accessors for method and nested fields, with the
+    extra columns they read."""
+
+    def __init__(self, serializer_class, computed=None):
+        computed = computed or {}
+        self.model = serializer_class.Meta.model
+        self.columns = ['id']
+        self.steps = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                columns, accessor = computed[name]
+                self.columns += [c for c in columns if c not in self.columns]
+            elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+                raise TypeError(f'{serializer_class.__name__}.{name} needs a computed accessor')
+            else:
+                column = self._column(field)
+                if column not in self.columns:
+                    self.columns.append(column)
+                accessor = self._file(field, column) if isinstance(field, serializers.FileField) \
+                    else self._plain(field, column)
+            self.steps.append((name, accessor))
+
+    @staticmethod
+    def _column(field):
+        if isinstance(field, serializers.RelatedField):
+            return f'{field.source}_id'
+        return field.source
+
+    @staticmethod
+    def _plain(field, column):
+        to_representation = field.to_representation
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return lambda row, page: row[column]
+
+        def accessor(row, page):
+            value = row[column]
+            return None if value is None else to_representation(value)
+        return accessor
+
+    @staticmethod
+    def _file(field, column):
+        model_field = field.parent.Meta.model._meta.get_field(field.source)
+        use_url = getattr(field, 'use_url', True)
+
+        def accessor(row, page):
+            name = row[column]
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = model_field.storage.url(name)
+            return page.request.build_absolute_uri(url) if page.request is not None else url
+        return accessor
+
+    def render(self, row, page):
+        return {name: accessor(row, page) for name, accessor in self.steps}
+
+
+class Page:
+    """Per-request state shared by a page's accessors: the request and the
+    batched lookups (likes, follows, images, sellers) filled in by the
+    endpoint renderers below."""
+
+    def __init__(self, request):
+        self.request = request
+        user = getattr(request, 'user', None)
+        self.user_id = user.id if user is not None and user.is_authenticated else None
+        self.liked = set()
+        self.followed = set()
+        self.followers = {}
+        self.following = {}
+        self.images = {}
+        self.users = {}
+        self.email = user.email if self.user_id else None
+
+
+def _counts(field, ids):
+    rows = Follow.objects.filter(**{f'{field}__in': ids}).values(field).annotate(n=Count('id')).order_by()
+    return {row[field]: row['n'] for row in rows}
+
+
+def _users(page, ids):
+    """Render the users in `ids` once each into page.users."""
+    ids = set(ids) - set(page.users)
+    if not ids:
+        return
+    page.followers.update(_counts('following', ids))
+    page.following.update(_counts('follower', ids))
+    if page.user_id:
+        page.followed |= set(Follow.objects.filter(follower_id=page.user_id, following_id__in=ids)
+                             .values_list('following_id', flat=True))
+    plan = user_plan()
+    for row in plan.model.objects.filter(id__in=ids).values(*plan.columns):
+        page.users[row['id']] = plan.render(row, page)
+
+
+@lru_cache(maxsize=None)
+def image_plan():
+    from .serializers import ItemImageSerializer
+    return Plan(ItemImageSerializer)
+
+
+@lru_cache(maxsize=None)
+def user_plan():
+    from .serializers import UserSerializer
+    return Plan(UserSerializer, {
+        'email': ([], lambda row, page: page.email if row['id'] == page.user_id else None),
+        'followers_count': ([], lambda row, page: page.followers.get(row['id'], 0)),
+        'following_count': ([], lambda row, page: page.following.get(row['id'], 0)),
+        'is_following': ([], lambda row, page: row['id'] in page.followed),
+    })
+
+
+@lru_cache(maxsize=None)
+def item_plan():
+    from .serializers import ItemSerializer
+    histogram = ItemSerializer().fields['rating_histogram'].to_representation
+    return Plan(ItemSerializer, {
+        'seller': (['seller_id'], lambda row, page: page.users[row['seller_id']]),
+        'images': ([], lambda row, page: page.images.get(row['id'], [])),
+        'likes_count': (['likes_count'], lambda row, page: row['likes_count']),
+        'is_liked': ([], lambda row, page: row['id'] in page.liked),
+        'view_count': (['view_count'], lambda row, page: row['view_count'] + view_counter.pending(row['id'])),
+        'rating_histogram': (
+            [f'rating_{stars}' for stars in range(1, 6)],
+            lambda row, page: histogram({stars: row[f'rating_{stars}'] for stars in range(1, 6)}),
+        ),
+    })
+
+
+@lru_cache(maxsize=None)
+def notification_plan():
+    from notifications.serializers import NotificationSerializer
+    return Plan(NotificationSerializer)
+
+
+@lru_cache(maxsize=None)
+def message_plan():
+    from chat.serializers import MessageSerializer
+    return Plan(MessageSerializer, {
+        'sender': (['sender_id'], lambda row, page: page.users[row['sender_id']]),
+    })
+
+
+def items(rows, request):
+    """ItemSerializer(many=True) output for item `rows` from
+    `.values(*item_plan().columns)`."""
+    rows = list(rows)
+    page = Page(request)
+    ids = [row['id'] for row in rows]
+    if page.user_id:
+        page.liked = set(Like.objects.filter(user_id=page.user_id, item_id__in=ids)
+                         .values_list('item_id', flat=True))
+    images, plan = defaultdict(list), image_plan()
+    for row in ItemImage.objects.filter(item_id__in=ids).order_by('id').values('item_id', *plan.columns):
+        images[row['item_id']].append(plan.render(row, page))
+    page.images = images
+    _users(page, {row['seller_id'] for row in rows})
+    plan = item_plan()
+    return [plan.render(row, page) for row in rows]
+
+
+def notifications(rows, request):
+    page, plan = Page(request), notification_plan()
+    return [plan.render(row, page) for row in rows]
+
+
+def messages(rows, request):
+    rows = list(rows)
+    page = Page(request)
+    _users(page, {row['sender_id'] for row in rows})
+    plan = message_plan()
+    return [plan.render(row, page) for row in rows]
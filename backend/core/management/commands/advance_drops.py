@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.drop_mode import prewarm
+from core.models import DropEvent
+
+
+class Command(BaseCommand):
+    help = ('Retires drops past their end_time and warms the ones about to start. '
+            'Scheduled every minute by core/scheduled.py.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        ended = DropEvent.objects.filter(is_active=True, end_time__lte=now).update(is_active=False)
+        warmed = prewarm(now)
+        self.stdout.write(self.style.SUCCESS(f'Retired {ended} drops, warmed {len(warmed)}'))
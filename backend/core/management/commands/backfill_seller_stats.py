@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.analytics import backfill
+from core.signals import CO2_SAVED_PER_SALE, WATER_SAVED_PER_SALE
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the seller dashboard rollups from items, likes and orders. Run once after deploying them, or to repair drift.'
+
+    def handle(self, *args, **options):
+        count = backfill(CO2_SAVED_PER_SALE, WATER_SAVED_PER_SALE)
+        self.stdout.write(self.style.SUCCESS(f'Seller daily stats rebuilt: {count} rows'))
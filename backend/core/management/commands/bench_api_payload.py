@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core import compression
+from core.management.commands.bench_serializers import seed
+from core.renderers import ORJSONRenderer, orjson
+from core.views import ItemViewSet
+
+
+class Command(BaseCommand):
+    help = ('Payload bytes and render time of an /api/items/ page: stdlib json vs orjson rendering, '
+            'and identity vs gzip vs brotli on the wire, over synthetic rows that are rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--renders', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            viewer = seed(options['rows'])
+            request = APIRequestFactory().get('/api/items/')
+            force_authenticate(request, user=viewer)
+            data = ItemViewSet.as_view({'get': 'list'})(request).data
+            transaction.set_rollback(True)
+
+        n = options['renders']
+        self.stdout.write(f'/api/items/ page of {len(data["results"])} items, {n} renders')
+        for name, renderer in (('json', JSONRenderer()), ('orjson', ORJSONRenderer())):
+            if name == 'orjson' and orjson is None:
+                self.stdout.write('orjson: not installed')
+                continue
+            started = time.perf_counter()
+            for _ in range(n):
+                body = renderer.render(data)
+            self.stdout.write(f'{name}: {(time.perf_counter() - started) / n * 1e6:.0f} us/render, {len(body)} bytes')
+
+        encodings = ['gzip'] + (['br'] if compression.brotli is not None else [])
+        for encoding in encodings:
+            started = time.perf_counter()
+            for _ in range(n):
+                wire = compression.compress(body, encoding)
+            self.stdout.write(f'{encoding}: {len(wire)} bytes ({len(wire) / len(body):.0%}), '
+                              f'{(time.perf_counter() - started) / n * 1e6:.0f} us/compress')
+        if compression.brotli is None:
+            self.stdout.write('br: brotli not installed')
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import feed_service
+
+
+class Command(BaseCommand):
+    help = 'Times per-user home feed ranking over a synthetic candidate pool and social graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--sellers', type=int, default=20000)
+        parser.add_argument('--pool', type=int, default=settings.FEED_CANDIDATE_POOL)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n, users, sellers = options['pool'], options['users'], options['sellers']
+        now = time.time()
+        pool = {
+            'ids': np.arange(1, n + 1, dtype=np.int64),
+            'sellers': rng.integers(1, sellers, n),
+            'tier_bonus': rng.choice(list(feed_service.TIER_BONUS.values()), n).astype(np.float32),
+            'created': now - rng.exponential(72 * 3600, n),
+            'engagement': rng.poisson(3, n).astype(np.float32),
+        }
+
+        total = worst = 0.0
+        for user_id in range(users):
+            signals = {
+                'user_id': user_id,
+                'followed': rng.integers(1, sellers, rng.poisson(15)).tolist(),
+                'engaged': rng.integers(1, sellers, rng.poisson(30)).tolist(),
+            }
+            t = time.perf_counter()
+            feed_service.rank(pool, signals, now)
+            took = time.perf_counter() - t
+            total += took
+            worst = max(worst, took)
+
+        self.stdout.write(f'users={users} pool={n} sellers={sellers}')
+        self.stdout.write(f'rank: {total / users * 1e6:.0f} us/user mean, {worst * 1e3:.2f} ms worst, '
+                          f'{total:.1f}s for all users on one core (excludes the 3 signal queries per user)')
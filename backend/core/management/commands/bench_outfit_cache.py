@@ -0,0 +1,54 @@
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.wardrobe_service import CATEGORIES, COLOR_PALETTE, ClosetMatrix, ClosetMatrixCache, color_embedding
+
+
+class Command(BaseCommand):
+    help = 'Sizes the outfit-matching closet cache: fills it with synthetic closets and times lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--closet-size', type=int, default=50)
+        parser.add_argument('--lookups', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        users, size = options['users'], options['closet_size']
+        colors = list(COLOR_PALETTE)
+        embeddings = {c: color_embedding(c) for c in colors}
+
+        cache = ClosetMatrixCache(max_users=users)
+        tracemalloc.start()
+        started = time.perf_counter()
+        for user_id in range(users):
+            n = int(rng.integers(1, 2 * size))
+            picks = rng.integers(0, len(colors), n)
+            cats = rng.integers(0, len(CATEGORIES), n)
+            cache.put(user_id, ClosetMatrix(
+                (user_id * 1000 + i, CATEGORIES[cats[i]], colors[picks[i]], embeddings[colors[picks[i]]])
+                for i in range(n)
+            ))
+        build_s = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        target = SimpleNamespace(title='Blue denim shirt', description='')
+        user_ids = rng.integers(0, users, options['lookups'])
+        started = time.perf_counter()
+        for user_id in user_ids:
+            cache.get(int(user_id)).best_matches(target)
+        lookup_s = time.perf_counter() - started
+
+        self.stdout.write(f'users={users} avg_closet={size}')
+        self.stdout.write(f'build: {build_s:.2f}s total, {build_s / users * 1e3:.3f} ms/user')
+        self.stdout.write(f'arrays: {cache.nbytes / 2**20:.1f} MiB; '
+                          f'process heap: {current / 2**20:.1f} MiB (peak {peak / 2**20:.1f} MiB), '
+                          f'{current / users / 1024:.2f} KiB/user')
+        self.stdout.write(f'match: {lookup_s / len(user_ids) * 1e6:.0f} us/lookup '
+                          f'({len(user_ids) / lookup_s:.0f} lookups/s on one core)')
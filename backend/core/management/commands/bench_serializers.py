@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from chat.models import Conversation, Message
+from chat.views import MessageViewSet
+from core.models import Follow, Item, ItemImage, Like
+from core.views import ItemViewSet
+from notifications.models import Notification
+from notifications.views import NotificationViewSet
+
+User = get_user_model()
+
+
+def seed(rows):
+    """Synthetic users, items, images, likes, notifications and messages
+    (bulk-created, so no signals run). Returns the viewing user."""
+    users = User.objects.bulk_create(
+        [User(username=f'bench_{n}', email=f'bench{n}@example.com') for n in range(20)])
+    viewer = users[0]
+    Follow.objects.bulk_create([Follow(follower=viewer, following=u) for u in users[1:10]])
+    items = Item.objects.bulk_create([
+        Item(seller=users[n % 20], title=f'Item {n}', description='Bench item', price='25.00',
+             size='M', condition='GOOD', ai_analysis={'tags': ['bench']})
+        for n in range(rows)
+    ])
+    ItemImage.objects.bulk_create(
+        [ItemImage(item=item, image=f'item_images/bench_{item.id}_{k}.jpg') for item in items for k in range(3)])
+    Like.objects.bulk_create([Like(user=viewer, item=item) for item in items[::3]])
+    Notification.objects.bulk_create([
+        Notification(recipient=viewer, sender=users[n % 20], notification_type='like', message=f'Like {n}')
+        for n in range(rows)
+    ])
+    conversation = Conversation.objects.create()
+    conversation.participants.add(viewer, users[1])
+    Message.objects.bulk_create([
+        Message(conversation=conversation, sender=(viewer, users[1])[n % 2], content=f'Message {n}')
+        for n in range(rows)
+    ])
+    return viewer
+
+
+class Command(BaseCommand):
+    help = ('Compares the DRF serializers with the compiled fast path (core/fastpath.py) on the items, '
+            'notifications and messages lists: CPU time per request on one core, over synthetic rows '
+            'that are rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            viewer = seed(options['rows'])
+            endpoints = [
+                ('items', ItemViewSet.as_view({'get': 'list'}), '/api/items/'),
+                ('notifications', NotificationViewSet.as_view({'get': 'list'}), '/api/notifications/'),
+                ('messages', MessageViewSet.as_view({'get': 'list'}), '/api/messages/'),
+            ]
+            self.stdout.write(f'rows={options["rows"]} requests={options["requests"]} (20 per page)')
+            for name, view, url in endpoints:
+                slow = self.time(view, url, viewer, options['requests'], fastpath=False)
+                fast = self.time(view, url, viewer, options['requests'], fastpath=True)
+                self.stdout.write(f'{name}: serializers {1 / slow:.0f} req/s, fast path {1 / fast:.0f} req/s '
+                                  f'per core ({slow / fast:.1f}x)')
+            transaction.set_rollback(True)
+
+    def time(self, view, url, viewer, n, fastpath):
+        settings.SERIALIZER_FASTPATH = fastpath
+        factory = APIRequestFactory()
+        started = time.process_time()
+        for _ in range(n):
+            request = factory.get(url)
+            force_authenticate(request, user=viewer)
+            view(request).render()
+        return (time.process_time() - started) / n
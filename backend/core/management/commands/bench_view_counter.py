@@ -0,0 +1,52 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.models import Item
+from core.view_counter import ViewCounter
+
+
+class Command(BaseCommand):
+    help = ('Load-tests the buffered view counter: many threads record views against '
+            'existing items; reports views/s and how many UPDATEs reached the database. '
+            'Run against a dev database — it really increments view_count.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', type=int, default=200000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--viewers', type=int, default=100000)
+        parser.add_argument('--flush-seconds', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        item_ids = list(Item.objects.values_list('id', flat=True)[:1000]) or [0]
+        views, threads = options['views'], options['threads']
+        per_thread = views // threads
+        counter = ViewCounter()
+
+        def worker(offset):
+            for n in range(per_thread):
+                i = offset + n
+                counter.record(item_ids[i % len(item_ids)], f'u{i // len(item_ids) % options["viewers"]}')
+
+        # Only the flushing thread talks to the DB; capture on the main thread by
+        # flushing there, with recording threads never hitting the size trigger.
+        with override_settings(VIEW_COUNT_FLUSH_SECONDS=10 ** 9, VIEW_COUNT_MAX_PENDING=10 ** 9,
+                               VIEW_DEDUPE_SECONDS=3600), CaptureQueriesContext(connection) as ctx:
+            workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+            started = time.perf_counter()
+            for w in workers:
+                w.start()
+            while any(w.is_alive() for w in workers):
+                time.sleep(options['flush_seconds'])
+                counter.flush()
+            counter.flush()
+            elapsed = time.perf_counter() - started
+
+        updates = [q for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('UPDATE')]
+        self.stdout.write(f'{per_thread * threads} views over {len(item_ids)} items from {threads} threads '
+                          f'in {elapsed:.2f}s = {per_thread * threads / elapsed:,.0f} views/s')
+        self.stdout.write(f'DB writes: {len(updates)} UPDATE statements ({counter.flushes} flushes, '
+                          f'every {options["flush_seconds"]}s)')
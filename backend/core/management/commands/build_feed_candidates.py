@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import feed_service
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the shared home-feed candidate pool. Scheduled every 5 minutes by core/scheduled.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Pool size (default FEED_CANDIDATE_POOL)')
+
+    def handle(self, *args, **options):
+        pool = feed_service.build_candidates(options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Feed candidate pool rebuilt: {len(pool['ids'])} items"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Item
+from core.similarity_index import get_similarity_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the "more like this" similarity index from the item table'
+
+    def handle(self, *args, **options):
+        index = get_similarity_index()
+        if index is None:
+            raise CommandError('SIMILARITY_INDEX_DIR is not set')
+        count = index.build(Item.objects.only(
+            'id', 'title', 'description', 'price', 'size', 'condition', 'ai_analysis', 'is_sold',
+        ).iterator(chunk_size=2000))
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} items into {index.directory}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the time-decayed trending score of every item. Scheduled hourly by core/scheduled.py.'
+
+    def handle(self, *args, **options):
+        count = compute_trending()
+        self.stdout.write(self.style.SUCCESS(f'Trending scores updated for {count} items'))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.fake_stripe import FakeStripe
+
+
+class Command(BaseCommand):
+    help = ('Runs a local fake of the Stripe Checkout API for offline load tests. Start the backend with '
+            'STRIPE_API_BASE=http://127.0.0.1:12111 and any sk_test_ key.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=12111)
+        parser.add_argument('--webhook-url', default='http://127.0.0.1:8000/api/stripe-webhook/',
+                            help='Where to post checkout.session.completed; pass "" to never complete sessions')
+        parser.add_argument('--complete-after', type=float, default=1.0,
+                            help='Seconds between session creation and the completion webhook')
+
+    def handle(self, *args, **options):
+        fake = FakeStripe(options['webhook_url'] or None, settings.STRIPE_WEBHOOK_SECRET, options['complete_after'])
+        server = fake.serve(port=options['port'])
+        host, port = server.server_address
+        self.stdout.write(self.style.SUCCESS(f'Fake Stripe listening on http://{host}:{port}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
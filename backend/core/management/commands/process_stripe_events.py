@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import StripeEvent
+from core.payments import process_due
+
+
+class Command(BaseCommand):
+    help = ('Processes received and due-for-retry Stripe webhook events from the inbox. '
+            'Scheduled every minute by core/scheduled.py.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500)
+
+    def handle(self, *args, **options):
+        handled = process_due(options['limit'])
+        dead = StripeEvent.objects.filter(status='DEAD').count()
+        self.stdout.write(self.style.SUCCESS(f'Processed {handled} events ({dead} dead-lettered in inbox)'))
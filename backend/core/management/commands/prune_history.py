@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.retention import archive_messages, prune_notifications
+
+
+class Command(BaseCommand):
+    help = ('Deletes expired notifications and archives old chat messages in id-range batches '
+            '(core/retention.py). Scheduled daily by core/scheduled.py.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = prune_notifications(now, options['batch_size'], options['pause'])
+        archived = archive_messages(now, options['batch_size'], options['pause'])
+        summary = ', '.join(f'{n} {kind}' for kind, n in sorted(deleted.items())) or 'none'
+        self.stdout.write(self.style.SUCCESS(f'Deleted notifications: {summary}; archived {archived} messages'))
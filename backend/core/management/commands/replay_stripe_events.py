@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from core.models import StripeEvent
+from core.payments import replay
+
+
+class Command(BaseCommand):
+    help = 'Re-runs Stripe webhook events from the inbox, by id or by status/type/time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', help='Stripe event ids (evt_...)')
+        parser.add_argument('--status', choices=[s for s, _ in StripeEvent.STATUS_CHOICES])
+        parser.add_argument('--type', help='Event type, e.g. checkout.session.completed')
+        parser.add_argument('--since', help='Only events Stripe created at or after this ISO datetime')
+
+    def handle(self, *args, **options):
+        records = StripeEvent.objects.all()
+        if options['event_ids']:
+            records = records.filter(event_id__in=options['event_ids'])
+        if options['status']:
+            records = records.filter(status=options['status'])
+        if options['type']:
+            records = records.filter(type=options['type'])
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+            records = records.filter(stripe_created__gte=since)
+        if not (options['event_ids'] or options['status'] or options['type'] or options['since']):
+            raise CommandError('Give event ids or at least one of --status, --type, --since')
+
+        total = records.count()
+        succeeded = replay(records)
+        self.stdout.write(self.style.SUCCESS(f'Replayed {total} events, {succeeded} succeeded'))
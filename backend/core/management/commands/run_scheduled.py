@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.scheduled import run_due
+
+
+class Command(BaseCommand):
+    help = ('Runs the periodic commands due this minute (core/scheduled.py). Run every minute from cron '
+            'where Cloud Scheduler -> /api/cron/ is not used.')
+
+    def handle(self, *args, **options):
+        ran, failed = run_due(timezone.now())
+        if failed:
+            raise CommandError(f'Failed: {", ".join(failed)} (ran: {", ".join(ran) or "none"})')
+        self.stdout.write(self.style.SUCCESS(f'Ran: {", ".join(ran) or "none"}'))
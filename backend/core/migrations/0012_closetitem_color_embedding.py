@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+def backfill_color_embeddings(apps, schema_editor):
+    from core.wardrobe_service import color_embedding
+    ClosetItem = apps.get_model('core', 'ClosetItem')
+    batch = []
+    for closet_item in ClosetItem.objects.exclude(color='').only('id', 'color').iterator():
+        closet_item.color_embedding = color_embedding(closet_item.color)
+        batch.append(closet_item)
+    ClosetItem.objects.bulk_update(batch, ['color_embedding'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_rename_core_ecopoi_user_id_created_idx_core_ecopoi_user_id_fe356e_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='closetitem',
+            name='color_embedding',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_color_embeddings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+RECENT_ITEMS = 20  # as timeline_service.BACKFILL_ON_FOLLOW
+
+
+def backfill_timelines(apps, schema_editor):
+    """Fan each followed seller's recent listings out to their existing
+    followers, flagging sellers over the threshold fanout_on_read instead."""
+    CustomUser = apps.get_model('core', 'CustomUser')
+    Follow = apps.get_model('core', 'Follow')
+    Item = apps.get_model('core', 'Item')
+    TimelineEntry = apps.get_model('core', 'TimelineEntry')
+    sellers = Follow.objects.values('following_id').annotate(n=Count('id')).order_by()
+    for row in sellers.iterator():
+        seller_id = row['following_id']
+        if row['n'] > settings.FEED_FANOUT_MAX_FOLLOWERS:
+            CustomUser.objects.filter(id=seller_id).update(fanout_on_read=True)
+            continue
+        item_ids = list(Item.objects.filter(seller_id=seller_id).order_by('-id').values_list(
+            'id', flat=True)[:RECENT_ITEMS])
+        follower_ids = Follow.objects.filter(following_id=seller_id).values_list('follower_id', flat=True)
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=uid, item_id=i, seller_id=seller_id) for uid in follower_ids for i in item_ids],
+            batch_size=2000, ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_closetitem_color_embedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='fanout_on_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.item')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-item'], name='core_timeli_user_id_e155e1_idx'), models.Index(fields=['user', 'seller'], name='core_timeli_user_id_a64437_idx')],
+                'unique_together': {('user', 'item')},
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
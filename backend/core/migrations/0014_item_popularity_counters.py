@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Item = apps.get_model('core', 'Item')
+    Like = apps.get_model('core', 'Like')
+    Wishlist = apps.get_model('core', 'Wishlist')
+
+    def count_of(model):
+        return Coalesce(Subquery(
+            model.objects.filter(item=OuterRef('pk')).values('item').annotate(n=Count('id')).values('n')
+        ), Value(0))
+
+    Item.objects.update(likes_count=count_of(Like), wishlist_count=count_of(Wishlist))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='trending_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['-trending_score'], name='core_item_trending_unsold_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_item_checkout_reservation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dropevent',
+            index=models.Index(fields=['start_time', 'end_time'], name='core_dropev_start_t_8096d2_idx'),
+        ),
+    ]
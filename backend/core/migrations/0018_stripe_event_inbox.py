@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:01
+
+from django.db import migrations, models
+
+
+def mark_processed(apps, schema_editor):
+    StripeEvent = apps.get_model('core', 'StripeEvent')
+    StripeEvent.objects.filter(processed_at__isnull=False).update(status='PROCESSED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_stripe_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stripeevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stripeevent',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='stripeevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stripeevent',
+            name='payload',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='stripeevent',
+            name='status',
+            field=models.CharField(choices=[('RECEIVED', 'Received'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed, will retry'), ('DEAD', 'Dead-lettered')], default='RECEIVED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='stripeevent',
+            name='stripe_created',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stripeevent',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='core_stripe_status_3897ca_idx'),
+        ),
+        migrations.RunPython(mark_processed, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,43 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 
-class CustomUser(AbstractUser):
+from .wardrobe_service import color_embedding
+
+
+class RatingAggregate(models.Model):
+    """Review totals and a 1-5 star histogram, maintained with atomic UPDATEs
+    by core/ratings.py so reads never touch the Review table."""
+    RATING_FIELDS = ('rating_sum', 'rating_count', 'rating_avg',
+                     'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(null=True, blank=True, editable=False, db_index=True)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}') for stars in range(1, 6)}
+
+    def save(self, *args, **kwargs):
+        # A plain save() of a stale instance must not write the totals back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+class CustomUser(AbstractUser, RatingAggregate):
     TIER_CHOICES = [
         ('BRONZE', 'Bronze'),
         ('SILVER', 'Silver'),
@@ -19,6 +54,9 @@ class CustomUser(AbstractUser):
     water_saved = models.FloatField(default=0.0)  # in liters
     items_sold_count = models.IntegerField(default=0)
     items_bought_count = models.IntegerField(default=0)
+    # Sticky: set once a seller has too many followers to fan new listings out
+    # on write; their followers pull those listings at read time instead.
+    fanout_on_read = models.BooleanField(default=False)
 
     def update_tier(self):
         """Update user tier based on eco points"""
@@ -36,7 +74,7 @@ class CustomUser(AbstractUser):
         return self.username
 
 
-class Item(models.Model):
+class Item(RatingAggregate):
     CONDITION_CHOICES = [
         ('NEW', 'New with Tags'),
         ('LIKE_NEW', 'Like New'),
@@ -52,9 +90,38 @@ class Item(models.Model):
     condition = models.CharField(max_length=20, choices=CONDITION_CHOICES)
     ai_analysis = models.JSONField(null=True, blank=True)
     is_sold = models.BooleanField(default=False)
+    # Denormalised counters, kept in step by Like/Wishlist signals (core/signals.py)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    wishlist_count = models.PositiveIntegerField(default=0, editable=False)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    # Exponentially decayed engagement, recomputed by `manage.py compute_trending`
+    trending_score = models.FloatField(default=0.0, editable=False)
+    # Checkout hold (core/reservations.py); free once reserved_until has passed
+    reserved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
+                                    blank=True, editable=False, related_name='+')
+    reserved_until = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Only ever changed with atomic UPDATEs; a plain save() of a stale instance
+    # must not write them back.
+    UPDATE_ONLY_FIELDS = ('likes_count', 'wishlist_count', 'view_count', 'trending_score',
+                          'reserved_by', 'reserved_until') + RatingAggregate.RATING_FIELDS
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trending_score'], condition=models.Q(is_sold=False),
+                         name='core_item_trending_unsold_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.UPDATE_ONLY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
@@ -90,9 +157,17 @@ class ClosetItem(models.Model):
     image = models.ImageField(upload_to='closet_images/')
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     color = models.CharField(max_length=50, blank=True)
+    color_embedding = models.JSONField(null=True, blank=True, editable=False)  # see wardrobe_service.color_embedding
     is_private = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.color_embedding = color_embedding(self.color)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'color' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'color_embedding'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.username}'s {self.category}"
 
@@ -106,6 +181,9 @@ class DropEvent(models.Model):
     image = models.ImageField(upload_to='drop_images/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['start_time', 'end_time'])]
+
     def __str__(self):
         return self.title
 
@@ -139,6 +217,9 @@ class Order(models.Model):
 
     buyer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='purchases')
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='orders')
+    # Denormalised item.seller so sales can be listed from an index without joining items
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sales',
+                               editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     stripe_payment_intent = models.CharField(max_length=255, blank=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -149,13 +230,80 @@ class Order(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['buyer', '-created_at']),
+            models.Index(fields=['seller', '-created_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['stripe_payment_intent']),
         ]
 
+    # Status as last read from / written to the database; lets save() spot
+    # transitions without re-reading the row
+    _loaded_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_status = self.__dict__.get('status')
+
+    def save(self, *args, **kwargs):
+        if self.seller_id is None:
+            self.seller_id = self.item.seller_id
+        old_status = self._loaded_status
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if self.status != old_status:
+            from .signals import order_status_changed
+            order_status_changed.send(sender=Order, order=self, old_status=old_status, new_status=self.status)
+
+    def transition_to(self, new_status):
+        """Move to new_status with `UPDATE ... WHERE status=<loaded status>`.
+        Returns False, changing nothing, if the row has moved on since this
+        instance was loaded."""
+        old_status = self._loaded_status
+        self.updated_at = timezone.now()
+        if not Order.objects.filter(pk=self.pk, status=old_status).update(
+                status=new_status, updated_at=self.updated_at):
+            return False
+        self.status = self._loaded_status = new_status
+        from .signals import order_status_changed
+        order_status_changed.send(sender=Order, order=self, old_status=old_status, new_status=new_status)
+        return True
+
     def __str__(self):
         return f"Order #{self.id} - {self.item.title}"
 
 
+class StripeEvent(models.Model):
+    """Inbox of verified Stripe webhook events, processed by core/payments.py."""
+    STATUS_CHOICES = [
+        ('RECEIVED', 'Received'),
+        ('PROCESSED', 'Processed'),
+        ('FAILED', 'Failed, will retry'),
+        ('DEAD', 'Dead-lettered'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RECEIVED')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    stripe_created = models.DateTimeField(null=True, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.type} {self.event_id}"
+
+
 class Review(models.Model):
     """Item reviews and ratings"""
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='reviews')
@@ -217,3 +365,43 @@ class EcoPointsHistory(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.action} (+{self.points})"
+
+
+class TimelineEntry(models.Model):
+    """A followed seller's new listing in one follower's following-feed inbox.
+    Written by fan-out when the Item is created (see core/signals.py)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='+')
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'item')
+        indexes = [
+            models.Index(fields=['user', '-item']),
+            models.Index(fields=['user', 'seller']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} in {self.user_id}'s timeline"
+
+
+class SellerDailyStats(models.Model):
+    """One seller's activity for one day, kept up to date incrementally by
+    core/analytics.py. Listings and likes are net (deletes subtract), so
+    summing every row gives the current totals."""
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    listings = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    co2_saved = models.FloatField(default=0.0)
+    water_saved = models.FloatField(default=0.0)
+
+    class Meta:
+        unique_together = ('seller', 'day')
+
+    def __str__(self):
+        return f"{self.seller_id} on {self.day}"
@@ -0,0 +1,8 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """Keyset pagination on created_at: each page is one index range scan
+    however deep the client scrolls, and inserts don't shift pages."""
+    ordering = '-created_at'
+    page_size = 20
@@ -0,0 +1,149 @@
+"""
+Stripe webhook processing.
+
+The webhook view only verifies the signature and inserts the raw event into
+the StripeEvent inbox, keyed by Stripe's event id, so a redelivery or retry
+storm costs one rejected INSERT. Events are then processed off the request
+path by `process_due` (kicked from the view via the task pool, and swept by
+`manage.py process_stripe_events` on a schedule): oldest first by Stripe's
+creation time, each in its own transaction, with failures retried on an
+exponential backoff and dead-lettered after STRIPE_EVENT_MAX_ATTEMPTS.
+`manage.py replay_stripe_events` re-runs events from the inbox; every handler
+is idempotent, so replays are safe.
+
+Checkout completion is a fixed handful of set-based queries whatever the cart
+size (bookkeeping adds a few per buyer and seller, not per order):
+
+* a locking SELECT and one conditional UPDATE move the session's PENDING
+  orders to PAID; orders already PAID don't match, so replays change nothing;
+* one UPDATE marks their items sold;
+* the orders_paid signal does the purchase bookkeeping (eco points, sold and
+  bought counts, seller rollups) in the same transaction, so it commits, or
+  is retried, with the event. Only the order emails go to the task pool
+  (notifications/signals.py), as best effort.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import drop_mode, reservations
+from .conditional import bump_catalogue
+from .models import Item, Order, StripeEvent
+from .signals import orders_paid
+
+logger = logging.getLogger(__name__)
+
+
+def settle_paid_orders(order_ids):
+    orders = list(Order.objects.filter(id__in=order_ids).select_related('buyer', 'item__seller'))
+    orders_paid.send(sender=Order, orders=orders)
+
+
+def handle_checkout_completion(session):
+    """Mark every pending order for this checkout session PAID and its items
+    sold. Returns the ids of the orders that changed."""
+    session_id = session.get('id')
+    with transaction.atomic():
+        pending = list(
+            Order.objects.select_for_update()
+            .filter(stripe_payment_intent=session_id, status='PENDING')
+            .values_list('id', 'item_id')
+        )
+        if not pending:
+            if not Order.objects.filter(stripe_payment_intent=session_id).exists():
+                logger.warning('Stripe webhook: no orders found for session %s', session_id)
+            return []
+        order_ids = [p[0] for p in pending]
+        item_ids = [p[1] for p in pending]
+        Order.objects.filter(id__in=order_ids, status='PENDING').update(status='PAID', updated_at=timezone.now())
+        Item.objects.filter(id__in=item_ids).update(is_sold=True, reserved_by=None, reserved_until=None)
+        bump_catalogue()
+        settle_paid_orders(order_ids)
+
+    # .update() skips Item signals, so retire the sold rows from any warm drop
+    # listing here
+    drop_mode.refresh_items(item_ids)
+    return order_ids
+
+
+def handle_session_expired(session):
+    reservations.cancel_session(session['id'])
+
+
+HANDLERS = {
+    'checkout.session.completed': handle_checkout_completion,
+    'checkout.session.expired': handle_session_expired,
+}
+
+
+def receive(event):
+    """Store a verified event in the inbox. Returns False if its id was
+    already there."""
+    created = event.get('created')
+    try:
+        with transaction.atomic():
+            StripeEvent.objects.create(
+                event_id=event['id'], type=event['type'], payload=event,
+                stripe_created=datetime.fromtimestamp(created, tz=dt_timezone.utc) if created else None,
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def process(record):
+    """Run one inbox event's handler and record the outcome. Returns True on
+    success; failures are scheduled for retry or dead-lettered."""
+    handler = HANDLERS.get(record.type)
+    record.attempts += 1
+    try:
+        with transaction.atomic():
+            if handler is not None:
+                handler(record.payload['data']['object'])
+    except Exception as e:
+        record.last_error = f'{type(e).__name__}: {e}'
+        if record.attempts >= settings.STRIPE_EVENT_MAX_ATTEMPTS:
+            logger.exception('Stripe event %s dead-lettered after %d attempts', record.event_id, record.attempts)
+            record.status, record.next_attempt_at = 'DEAD', None
+        else:
+            logger.warning('Stripe event %s failed (attempt %d): %s', record.event_id, record.attempts, e)
+            delay = settings.STRIPE_EVENT_RETRY_SECONDS * 2 ** (record.attempts - 1)
+            record.status, record.next_attempt_at = 'FAILED', timezone.now() + timedelta(seconds=delay)
+    else:
+        record.status, record.last_error, record.next_attempt_at = 'PROCESSED', '', None
+        record.processed_at = timezone.now()
+    record.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'processed_at'])
+    return record.status == 'PROCESSED'
+
+
+def process_due(limit=100):
+    """Work through received and due-for-retry events, oldest first. Safe to
+    run concurrently: each claims its event with SKIP LOCKED. Returns the
+    number of events handled."""
+    handled = 0
+    while handled < limit:
+        with transaction.atomic():
+            record = (
+                StripeEvent.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='RECEIVED') | Q(status='FAILED', next_attempt_at__lte=timezone.now()))
+                .order_by('stripe_created', 'id')
+                .first()
+            )
+            if record is None:
+                break
+            process(record)
+        handled += 1
+    return handled
+
+
+def replay(records):
+    """Re-run inbox events now, regardless of status. Returns how many succeeded."""
+    succeeded = 0
+    for record in records.order_by('stripe_created', 'id'):
+        record.attempts = 0
+        succeeded += process(record)
+    return succeeded
@@ -0,0 +1,86 @@
+"""
+Stored rating aggregates (RatingAggregate) for items and their sellers.
+
+ReviewViewSet calls `apply` in the same transaction as a review create or
+update; every delete, including the cascade from a deleted item or account,
+goes through the Review post_delete signal. Each call is one UPDATE on the
+item and one on its seller, adding the deltas to the sum, count and histogram
+and recomputing the average from the pre-update values, so concurrent
+reviews never lose a count and no read has to scan Review rows.
+
+The reviews endpoint caches each item's first page, rating summary included,
+in the shared cache under the item's page version, which `apply` bumps once
+the write commits. A reader stores the page under the version it saw before
+querying, so a page rendered from pre-write rows can never be served after
+the bump.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+from .models import CustomUser, Item
+
+FIRST_PAGE_KEY = 'reviews:first:{}:{}'
+VERSION_KEY = 'reviews:ver:{}'
+
+
+def page_version(item_id):
+    key = VERSION_KEY.format(item_id)
+    caches['shared'].add(key, time.time_ns(), None)
+    return caches['shared'].get(key)
+
+
+def cached_first_page(item_id):
+    """(version, page) for the item; page is None on a miss and should be
+    stored with `cache_first_page` under the returned version."""
+    version = page_version(item_id)
+    return version, caches['shared'].get(FIRST_PAGE_KEY.format(item_id, version))
+
+
+def cache_first_page(item_id, version, data):
+    caches['shared'].set(FIRST_PAGE_KEY.format(item_id, version), data, settings.REVIEW_FIRST_PAGE_TTL)
+
+
+def forget_first_page(item_id):
+    key = VERSION_KEY.format(item_id)
+    try:
+        caches['shared'].incr(key)
+    except ValueError:
+        caches['shared'].add(key, time.time_ns(), None)
+
+
+def summary(item):
+    return {'average': item.rating_avg, 'count': item.rating_count, 'histogram': item.rating_histogram}
+
+
+def _changes(added, removed):
+    deltas = Counter()
+    for rating, sign in [(r, 1) for r in added] + [(r, -1) for r in removed]:
+        deltas['rating_sum'] += rating * sign
+        deltas['rating_count'] += sign
+        deltas[f'rating_{rating}'] += sign
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return {}
+    count = deltas['rating_count']
+    changes['rating_avg'] = Case(
+        When(Q(rating_count__gt=-count),
+             then=Cast(F('rating_sum') + deltas['rating_sum'], FloatField()) / (F('rating_count') + count)),
+        default=Value(None), output_field=FloatField(),
+    )
+    return changes
+
+
+def apply(item_id, added=(), removed=()):
+    """Add the `added` ratings to, and take the `removed` ones from, the item
+    and its seller."""
+    changes = _changes(added, removed)
+    if changes:
+        Item.objects.filter(id=item_id).update(**changes)
+        CustomUser.objects.filter(items__id=item_id).update(**changes)
+    transaction.on_commit(lambda: forget_first_page(item_id))
@@ -0,0 +1,72 @@
+"""
+Checkout holds on one-of-a-kind items.
+
+A checkout claims all of its items with one conditional UPDATE
+
+    UPDATE core_item SET reserved_by_id = <buyer>, reserved_until = <now + hold>
+    WHERE id IN (..) AND NOT is_sold
+      AND (reserved_until IS NULL OR reserved_until <= <now> OR reserved_by_id = <buyer>)
+
+inside a transaction. The row locks taken by the UPDATE serialise racing
+buyers, so the first one wins and everyone else matches fewer rows than they
+asked for, rolls back and is turned away without waiting on Stripe. Holds
+lapse by themselves at reserved_until, which is also the Stripe session's
+expires_at, and are released early when the session expires or the buyer
+cancels.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Item, Order
+
+
+class ItemUnavailable(Exception):
+    """Raised when an item is sold or held by another buyer's checkout."""
+
+
+def reserve(item_ids, buyer, now=None):
+    """Hold every item for `buyer`, or none of them. Returns the hold expiry."""
+    now = now or timezone.now()
+    until = now + timedelta(seconds=settings.CHECKOUT_HOLD_SECONDS)
+    with transaction.atomic():
+        held = Item.objects.filter(id__in=item_ids, is_sold=False).filter(
+            Q(reserved_until__isnull=True) | Q(reserved_until__lte=now) | Q(reserved_by=buyer)
+        ).update(reserved_by=buyer, reserved_until=until)
+        if held != len(item_ids):
+            raise ItemUnavailable
+    return until
+
+
+def release(item_ids, buyer):
+    return Item.objects.filter(id__in=item_ids, reserved_by=buyer, is_sold=False).update(
+        reserved_by=None, reserved_until=None)
+
+
+def supersede(item_ids, buyer, session_id):
+    """Cancel the buyer's older pending checkouts for these items so only the
+    newest session can complete. Returns the superseded session ids."""
+    older = Order.objects.filter(buyer=buyer, item_id__in=item_ids, status='PENDING').exclude(
+        stripe_payment_intent=session_id)
+    session_ids = set(older.values_list('stripe_payment_intent', flat=True))
+    older.update(status='CANCELLED')
+    return session_ids
+
+
+def cancel_session(session_id, buyer=None):
+    """Cancel a checkout session's pending orders and release their holds."""
+    orders = Order.objects.filter(stripe_payment_intent=session_id, status='PENDING')
+    if buyer is not None:
+        orders = orders.filter(buyer=buyer)
+    pending = list(orders.values_list('id', 'item_id', 'buyer_id'))
+    if not pending:
+        return 0
+    with transaction.atomic():
+        cancelled = Order.objects.filter(id__in=[p[0] for p in pending], status='PENDING').update(
+            status='CANCELLED')
+        for buyer_id in {p[2] for p in pending}:
+            release([p[1] for p in pending if p[2] == buyer_id], buyer_id)
+    return cancelled
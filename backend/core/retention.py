@@ -0,0 +1,63 @@
+"""
+Retention for the tables that grow with activity: notifications and chat
+messages.
+
+Expired rows are removed in primary-key ranges of RETENTION_BATCH_SIZE, each
+its own short transaction, so a run never holds long locks or a long-running
+transaction. Notifications are deleted once older than their type's
+NOTIFICATION_RETENTION_DAYS; messages older than MESSAGE_ARCHIVE_DAYS are
+copied into chat.ArchivedMessage and deleted from the hot table.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+
+from chat.models import ArchivedMessage, Message
+from notifications import unread
+from notifications.models import Notification
+
+ARCHIVED_MESSAGE_FIELDS = ('id', 'conversation_id', 'sender_id', 'content', 'created_at', 'is_read')
+
+
+def _id_ranges(queryset, size):
+    queryset = queryset.order_by()
+    bounds = queryset.aggregate(lo=Min('id'), hi=Max('id'))
+    if bounds['lo'] is None:
+        return
+    for start in range(bounds['lo'], bounds['hi'] + 1, size):
+        yield queryset.filter(id__gte=start, id__lt=start + size)
+
+
+def prune_notifications(now, batch_size=None, pause=0):
+    """Deletes expired notifications; returns the count per type."""
+    deleted = Counter()
+    for kind, days in settings.NOTIFICATION_RETENTION_DAYS.items():
+        if not days:
+            continue
+        expired = Notification.objects.filter(notification_type=kind, created_at__lt=now - timedelta(days=days))
+        for batch in _id_ranges(expired, batch_size or settings.RETENTION_BATCH_SIZE):
+            recipients = set(batch.filter(is_read=False).values_list('recipient_id', flat=True))
+            deleted[kind] += batch.delete()[0]
+            unread.forget(*recipients)
+            time.sleep(pause)
+    return deleted
+
+
+def archive_messages(now, batch_size=None, pause=0):
+    """Moves expired messages to ArchivedMessage; returns how many moved."""
+    if not settings.MESSAGE_ARCHIVE_DAYS:
+        return 0
+    archived = 0
+    expired = Message.objects.filter(created_at__lt=now - timedelta(days=settings.MESSAGE_ARCHIVE_DAYS))
+    for batch in _id_ranges(expired, batch_size or settings.RETENTION_BATCH_SIZE):
+        with transaction.atomic():
+            rows = list(batch.select_for_update().values(*ARCHIVED_MESSAGE_FIELDS))
+            ArchivedMessage.objects.bulk_create([ArchivedMessage(**row) for row in rows], ignore_conflicts=True)
+            batch.filter(id__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+        time.sleep(pause)
+    return archived
@@ -0,0 +1,44 @@
+"""
+Periodic jobs.
+
+One Cloud Scheduler job POSTs /api/cron/ every minute (see
+.github/workflows/deploy-backend.yml); anywhere with cron, `manage.py
+run_scheduled` every minute does the same. Each tick runs the commands due
+at that minute (UTC) in turn, so a single schedule, within the free tier,
+drives all of them. Every command is idempotent and safe to overlap, so a
+late, missed or repeated tick only shifts work to the next one.
+"""
+import io
+import logging
+
+from django.core.management import call_command
+
+logger = logging.getLogger(__name__)
+
+# (command, every N minutes); runs when the UTC minute of the day divides evenly
+SCHEDULE = (
+    ('process_stripe_events', 1),
+    ('advance_drops', 1),
+    ('build_feed_candidates', 5),
+    ('compute_trending', 60),
+    ('prune_history', 24 * 60),
+)
+
+
+def due(now):
+    minute = now.hour * 60 + now.minute
+    return [command for command, every in SCHEDULE if minute % every == 0]
+
+
+def run_due(now):
+    """Runs the commands due at `now`; returns (ran, failed) command names."""
+    ran, failed = [], []
+    for command in due(now):
+        try:
+            call_command(command, stdout=io.StringIO())
+        except Exception:
+            logger.exception('Scheduled command %s failed', command)
+            failed.append(command)
+        else:
+            ran.append(command)
+    return ran, failed
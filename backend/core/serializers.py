@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Item, ItemImage, ClosetItem, DropEvent, Follow, Order, Review, Wishlist, EcoPointsHistory
+from django.db.models.manager import BaseManager
+from .models import Item, ItemImage, ClosetItem, DropEvent, Follow, Like, Order, Review, Wishlist, EcoPointsHistory
+from .sparse import SparseFieldsMixin
+from .view_counter import view_counter
 
 User = get_user_model()
 
@@ -13,11 +16,13 @@ def _owner_only_email(serializer, obj):
     return None
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     followers_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     email = serializers.SerializerMethodField()
+    seller_rating = serializers.FloatField(source='rating_avg', read_only=True)
+    seller_reviews_count = serializers.IntegerField(source='rating_count', read_only=True)
 
     class Meta:
         model = User
@@ -25,9 +30,11 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'bio', 'profile_picture', 'social_links',
             'eco_points', 'eco_tier', 'co2_saved', 'water_saved',
             'items_sold_count', 'items_bought_count',
-            'followers_count', 'following_count', 'is_following'
+            'followers_count', 'following_count', 'is_following',
+            'seller_rating', 'seller_reviews_count'
         ]
         read_only_fields = ['eco_points', 'eco_tier', 'co2_saved', 'water_saved', 'items_sold_count', 'items_bought_count']
+        sparse_sources = {'followers_count': [], 'following_count': [], 'is_following': [], 'email': ['email']}
 
     def get_email(self, obj):
         return _owner_only_email(self, obj)
@@ -83,24 +90,38 @@ class UserProfileSerializer(serializers.ModelSerializer):
         except Exception:
             return 0
 
-class ItemImageSerializer(serializers.ModelSerializer):
+class ItemImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ItemImage
         fields = ['id', 'image']
 
-class ClosetItemSerializer(serializers.ModelSerializer):
+class ClosetItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ClosetItem
         fields = ['id', 'image', 'category', 'color', 'is_private', 'created_at']
         read_only_fields = ['created_at']
 
-class DropEventSerializer(serializers.ModelSerializer):
+class DropEventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    item_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = DropEvent
-        fields = ['id', 'title', 'description', 'start_time', 'end_time', 'is_active', 'image', 'items']
+        fields = ['id', 'title', 'description', 'start_time', 'end_time', 'is_active', 'image', 'item_count']
         read_only_fields = ['created_at']
 
-class ItemSerializer(serializers.ModelSerializer):
+class PageItemsListSerializer(serializers.ListSerializer):
+    """Records the page's item ids in the context so ItemSerializer.get_is_liked
+    can answer for the whole page with one query."""
+    item_id_attr = 'id'
+
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, BaseManager) else data)
+        self.context['page_item_ids'] = [getattr(row, self.item_id_attr) for row in rows]
+        self.context.pop('liked_item_ids', None)
+        return super().to_representation(rows)
+
+
+class ItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     seller = UserSerializer(read_only=True)
     images = ItemImageSerializer(many=True, read_only=True)
     uploaded_images = serializers.ListField(
@@ -110,48 +131,46 @@ class ItemSerializer(serializers.ModelSerializer):
     )
     likes_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
-    average_rating = serializers.SerializerMethodField()
-    reviews_count = serializers.SerializerMethodField()
+    view_count = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(source='rating_avg', read_only=True)
+    reviews_count = serializers.IntegerField(source='rating_count', read_only=True)
+    rating_histogram = serializers.DictField(read_only=True)
 
     class Meta:
         model = Item
         fields = [
             'id', 'seller', 'title', 'description', 'price', 'size', 'condition',
-            'images', 'uploaded_images', 'likes_count', 'is_liked',
-            'average_rating', 'reviews_count', 'created_at', 'ai_analysis', 'is_sold'
+            'images', 'uploaded_images', 'likes_count', 'is_liked', 'view_count',
+            'average_rating', 'reviews_count', 'rating_histogram', 'created_at', 'ai_analysis', 'is_sold'
         ]
         read_only_fields = ['seller', 'created_at', 'ai_analysis']
+        list_serializer_class = PageItemsListSerializer
+        sparse_sources = {
+            'likes_count': ['likes_count'], 'is_liked': [], 'view_count': ['view_count'],
+            'rating_histogram': ['rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5'],
+        }
 
     def get_likes_count(self, obj):
-        try:
-            return obj.likes.count()
-        except Exception:
-            return 0
+        return obj.likes_count
+
+    def get_view_count(self, obj):
+        # Includes views still buffered in this process, so a viewer sees their own
+        return obj.view_count + view_counter.pending(obj.id)
 
     def get_is_liked(self, obj):
         try:
             request = self.context.get('request')
-            if request and request.user.is_authenticated:
+            if not (request and request.user.is_authenticated):
+                return False
+            if 'page_item_ids' not in self.context:
                 return obj.likes.filter(user=request.user).exists()
-            return False
+            if 'liked_item_ids' not in self.context:
+                self.context['liked_item_ids'] = set(Like.objects.filter(
+                    user=request.user, item_id__in=self.context['page_item_ids']).values_list('item_id', flat=True))
+            return obj.id in self.context['liked_item_ids']
         except Exception:
             return False
     
-    def get_average_rating(self, obj):
-        try:
-            reviews = obj.reviews.all()
-            if reviews:
-                return sum(r.rating for r in reviews) / len(reviews)
-            return None
-        except Exception:
-            return None
-    
-    def get_reviews_count(self, obj):
-        try:
-            return obj.reviews.count()
-        except Exception:
-            return 0
-
     def create(self, validated_data):
         uploaded_images = validated_data.pop('uploaded_images', [])
         item = Item.objects.create(**validated_data)
@@ -161,7 +180,7 @@ class ItemSerializer(serializers.ModelSerializer):
 
 # New Phase 1 Serializers
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     follower = UserSerializer(read_only=True)
     following = UserSerializer(read_only=True)
     
@@ -171,26 +190,52 @@ class FollowSerializer(serializers.ModelSerializer):
         read_only_fields = ['follower', 'following', 'created_at']
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    buyer = UserSerializer(read_only=True)
-    item = ItemSerializer(read_only=True)
-    
+class UserSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Just enough of a user to render a name and avatar; no per-row queries."""
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'profile_picture', 'eco_tier']
+        read_only_fields = fields
+
+
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """The item as an order line: identity, price and cover image only."""
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Item
+        fields = ['id', 'title', 'price', 'size', 'condition', 'images']
+        read_only_fields = fields
+        sparse_sources = {'images': ['images']}
+
+    def get_images(self, obj):
+        # images.all() so the list view's prefetch is used
+        cover = next(iter(obj.images.all()), None)
+        return ItemImageSerializer([cover], many=True, context=self.context).data if cover else []
+
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    buyer = UserSummarySerializer(read_only=True)
+    seller = UserSummarySerializer(read_only=True)
+    item = OrderItemSerializer(read_only=True)
+
     class Meta:
         model = Order
         fields = [
-            'id', 'buyer', 'item', 'status', 'stripe_payment_intent',
+            'id', 'buyer', 'seller', 'item', 'status', 'stripe_payment_intent',
             'total_amount', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['buyer', 'item', 'stripe_payment_intent', 'created_at', 'updated_at']
+        read_only_fields = ['buyer', 'seller', 'item', 'stripe_payment_intent', 'created_at', 'updated_at']
 
 
-class ReviewSerializer(serializers.ModelSerializer):
-    reviewer = UserSerializer(read_only=True)
-    
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    reviewer = UserSummarySerializer(read_only=True)
+
     class Meta:
         model = Review
         fields = ['id', 'item', 'reviewer', 'rating', 'comment', 'created_at', 'updated_at']
         read_only_fields = ['reviewer', 'created_at', 'updated_at']
+        expandable_fields = {'item': lambda: OrderItemSerializer(read_only=True)}
     
     def validate_rating(self, value):
         if value < 1 or value > 5:
@@ -198,16 +243,21 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
 
-class WishlistSerializer(serializers.ModelSerializer):
+class WishlistListSerializer(PageItemsListSerializer):
+    item_id_attr = 'item_id'
+
+
+class WishlistSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     item = ItemSerializer(read_only=True)
     
     class Meta:
         model = Wishlist
         fields = ['id', 'item', 'added_at']
         read_only_fields = ['added_at']
+        list_serializer_class = WishlistListSerializer
 
 
-class EcoPointsHistorySerializer(serializers.ModelSerializer):
+class EcoPointsHistorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = EcoPointsHistory
         fields = ['id', 'action', 'points', 'description', 'created_at']
@@ -1,6 +1,34 @@
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
-from .models import Item, Order, EcoPointsHistory, CustomUser
+import logging
+from collections import Counter
+from decimal import Decimal
+from django.db.models.signals import post_save, post_delete
+from django.db.models import F, QuerySet
+from django.dispatch import Signal, receiver
+from .models import Item, Order, EcoPointsHistory, CustomUser, ClosetItem, Follow, Like, Review, Wishlist
+from . import analytics, ratings, timeline_service
+from .conditional import bump_catalogue, bump_users
+from .wardrobe_service import closet_cache
+
+logger = logging.getLogger(__name__)
+
+# Sent by Order.save() and Order.transition_to() with order, old_status and
+# new_status whenever an order's status changes.
+order_status_changed = Signal()
+# Sent with orders=[Order, ...] once orders become PAID, either one at a time
+# on a status change or in bulk from the Stripe webhook (core/payments.py).
+orders_paid = Signal()
+
+CO2_SAVED_PER_SALE = 5.5  # avg CO2 saved by reusing one garment (kg)
+WATER_SAVED_PER_SALE = 2700  # avg water saved by reusing one garment (L)
+
+
+def deleting_user(origin, user_id):
+    """Whether a post_delete is part of deleting `user_id`'s account (or a
+    bulk user delete). Rows written for that user then would point at a
+    user that is about to disappear."""
+    if isinstance(origin, CustomUser):
+        return origin.pk == user_id
+    return isinstance(origin, QuerySet) and origin.model is CustomUser
 
 
 @receiver(post_save, sender=Item)
@@ -25,49 +53,37 @@ def award_points_for_listing(sender, instance, created, **kwargs):
         user.update_tier()
 
 
-@receiver(pre_save, sender=Order)
-def capture_old_order_status(sender, instance, **kwargs):
-    """Capture the previous status before saving so post_save can detect transitions"""
-    if instance.pk:
-        try:
-            instance._old_status = Order.objects.get(pk=instance.pk).status
-        except Order.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
-
-
-@receiver(post_save, sender=Order)
-def award_points_for_purchase(sender, instance, created, **kwargs):
-    """Award eco points when an order transitions to PAID status"""
-    old_status = getattr(instance, '_old_status', None)
-    transitioned_to_paid = instance.status == 'PAID' and old_status != 'PAID'
-    
-    if not transitioned_to_paid:
-        return
-
-    # Buyer: purchase points + bought count
-    buyer = instance.buyer
-    points = 20
-    buyer.eco_points += points
-    buyer.items_bought_count += 1
-    buyer.save()
+@receiver(order_status_changed)
+def announce_paid_order(sender, order, old_status, new_status, **kwargs):
+    if new_status == 'PAID':
+        orders_paid.send(sender=Order, orders=[order])
 
-    EcoPointsHistory.objects.create(
-        user=buyer,
-        action='ITEM_PURCHASED',
-        points=points,
-        description=f'Purchased "{instance.item.title}"'
-    )
-    buyer.update_tier()
 
-    # Seller: the sale is the real reuse event — credit sold count + impact now
-    seller = instance.item.seller
-    seller.items_sold_count += 1
-    seller.co2_saved += 5.5   # avg CO2 saved by reusing one garment (kg)
-    seller.water_saved += 2700  # avg water saved by reusing one garment (L)
-    seller.save()
-    seller.update_tier()
+@receiver(orders_paid)
+def award_points_for_purchase(sender, orders, **kwargs):
+    """Buyer gets purchase points + bought count; the seller gets the sold count
+    and environmental impact, since the sale is the real reuse event."""
+    bought = Counter(order.buyer_id for order in orders)
+    sold = Counter(order.item.seller_id for order in orders)
+    points = 20
+    for buyer_id, n in bought.items():
+        CustomUser.objects.filter(id=buyer_id).update(
+            eco_points=F('eco_points') + points * n,
+            items_bought_count=F('items_bought_count') + n,
+        )
+    for seller_id, n in sold.items():
+        CustomUser.objects.filter(id=seller_id).update(
+            items_sold_count=F('items_sold_count') + n,
+            co2_saved=F('co2_saved') + CO2_SAVED_PER_SALE * n,
+            water_saved=F('water_saved') + WATER_SAVED_PER_SALE * n,
+        )
+    EcoPointsHistory.objects.bulk_create([
+        EcoPointsHistory(user_id=order.buyer_id, action='ITEM_PURCHASED', points=points,
+                         description=f'Purchased "{order.item.title}"')
+        for order in orders
+    ])
+    for buyer in CustomUser.objects.filter(id__in=list(bought)):
+        buyer.update_tier()
 
 
 
@@ -94,3 +110,104 @@ def award_profile_completion_bonus(sender, instance, created, **kwargs):
             )
             
             instance.update_tier()
+
+
+@receiver(post_save, sender=ClosetItem)
+@receiver(post_delete, sender=ClosetItem)
+def invalidate_closet_matrix(sender, instance, **kwargs):
+    """Any closet edit drops the owner's cached outfit-matching matrix; the next
+    match_outfit rebuilds it."""
+    closet_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Item)
+def fan_out_new_listing(sender, instance, created, **kwargs):
+    if created:
+        timeline_service.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline_service.backfill_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline_service.drop_follow(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        Item.objects.filter(id=instance.item_id).update(likes_count=F('likes_count') + 1)
+        analytics.bump(instance.item.seller_id, likes=1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, origin=None, **kwargs):
+    Item.objects.filter(id=instance.item_id, likes_count__gt=0).update(likes_count=F('likes_count') - 1)
+    seller_id = instance.item.seller_id
+    if not deleting_user(origin, seller_id):
+        analytics.bump(seller_id, likes=-1)
+
+
+@receiver(post_delete, sender=Review)
+def take_off_rating(sender, instance, **kwargs):
+    ratings.apply(instance.item_id, removed=[instance.rating])
+
+
+@receiver(post_save, sender=Wishlist)
+def increment_wishlist_count(sender, instance, created, **kwargs):
+    if created:
+        Item.objects.filter(id=instance.item_id).update(wishlist_count=F('wishlist_count') + 1)
+
+
+@receiver(post_delete, sender=Wishlist)
+def decrement_wishlist_count(sender, instance, **kwargs):
+    Item.objects.filter(id=instance.item_id, wishlist_count__gt=0).update(wishlist_count=F('wishlist_count') - 1)
+
+
+@receiver(post_save, sender=Item)
+def roll_up_listing(sender, instance, created, **kwargs):
+    if created:
+        analytics.bump(instance.seller_id, listings=1)
+
+
+@receiver(post_delete, sender=Item)
+def roll_up_delisting(sender, instance, origin=None, **kwargs):
+    if not deleting_user(origin, instance.seller_id):
+        analytics.bump(instance.seller_id, listings=-1)
+
+
+@receiver(orders_paid)
+def roll_up_sales(sender, orders, **kwargs):
+    by_seller = {}
+    for order in orders:
+        n, revenue = by_seller.get(order.seller_id, (0, Decimal('0')))
+        by_seller[order.seller_id] = (n + 1, revenue + Decimal(order.total_amount))
+    for seller_id, (n, revenue) in by_seller.items():
+        analytics.bump(seller_id, orders=n, revenue=revenue,
+                       co2_saved=CO2_SAVED_PER_SALE * n, water_saved=WATER_SAVED_PER_SALE * n)
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_profile_version(sender, instance, **kwargs):
+    bump_users(instance.id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_versions(sender, instance, **kwargs):
+    bump_users(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def bump_liker_version(sender, instance, **kwargs):
+    bump_users(instance.user_id)
+
+
+@receiver(post_delete, sender=Item)
+def bump_catalogue_version(sender, **kwargs):
+    bump_catalogue()
@@ -0,0 +1,165 @@
+"""
+"More like this" index for marketplace items.
+
+Each item is a hashed, L2-normalised bag of weighted tokens (title/description
+words plus size, condition, AI-detected brand/fabric and a price bucket) stored
+as one row of a memory-mapped float32 matrix on disk.
+
+`manage.py build_similarity_index` is the only writer: it builds a fresh set
+of files offline and swaps them in whole. Serving processes map the files
+read-only and pick up a rebuild by the ids file's inode, so any number of
+instances can share one directory without coordinating writes. Items listed
+since the last build aren't in the index yet; items sold or deleted since are
+dropped by the endpoint's final fetch.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DIM = 256
+
+# Structured attributes say more about "similar" than any one description word.
+FIELD_WEIGHTS = {
+    'title': 2.0,
+    'description': 1.0,
+    'brand': 3.0,
+    'fabric': 1.5,
+    'size': 1.0,
+    'condition': 0.5,
+    'price': 1.5,
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'in', 'with', 'for', 'to', 'is', 'on', 'very', 'size'}
+
+
+def price_bucket(price):
+    """Log-scale bucket, so ₹400 and ₹500 share one but ₹400 and ₹4000 don't."""
+    return int(math.log(max(float(price), 1.0), 1.6))
+
+
+def item_tokens(item):
+    """(field, token) pairs describing an Item."""
+    analysis = item.ai_analysis or {}
+    fields = {
+        'title': item.title,
+        'description': item.description,
+        'brand': analysis.get('detected_brand', '') if analysis.get('detected_brand') != 'Unknown' else '',
+        'fabric': analysis.get('fabric_type', ''),
+        'size': item.size,
+        'condition': item.condition,
+    }
+    for field, text in fields.items():
+        for word in _WORD_RE.findall((text or '').lower()):
+            if word not in _STOPWORDS:
+                yield field, word
+    yield 'price', str(price_bucket(item.price))
+
+
+def vectorize(item):
+    """Signed feature hashing with sublinear term frequency per field."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    for (field, token), tf in Counter(item_tokens(item)).items():
+        h = zlib.crc32(f'{field}:{token}'.encode())
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vec[h % DIM] += sign * FIELD_WEIGHTS[field] * (1.0 + math.log(tf))
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class SimilarityIndex:
+    """ids.npy / active.npy / vectors.npy under one directory. Inactive (sold)
+    rows can still be queried *from* but are never returned as results."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._inode = None
+        self.ids = self.active = self.vectors = None
+
+    def _path(self, name):
+        return self.directory / f'{name}.npy'
+
+    def _open(self):
+        """(Re)map the files, read-only, if missing or swapped out by a rebuild."""
+        try:
+            inode = os.stat(self._path('ids')).st_ino
+        except FileNotFoundError:
+            return False
+        if inode != self._inode:
+            self.ids = np.load(self._path('ids'), mmap_mode='r')
+            self.active = np.load(self._path('active'), mmap_mode='r')
+            self.vectors = np.load(self._path('vectors'), mmap_mode='r')
+            self._inode = inode
+        return True
+
+    def _write(self, ids, active, vectors):
+        """Write a fresh set of files and atomically swap them in, ids last so
+        readers keyed on its inode never see a half-written set."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, array in (('vectors', vectors), ('active', active), ('ids', ids)):
+            tmp = self.directory / f'{name}.tmp.npy'
+            np.save(tmp, array)
+            os.replace(tmp, self._path(name))
+        self._inode = None
+        self._open()
+
+    def exists(self):
+        return self._path('ids').exists()
+
+    def build(self, items):
+        """Full rebuild from an iterable of Items."""
+        rows = [(item.id, not item.is_sold, vectorize(item)) for item in items]
+        ids = np.zeros(len(rows), dtype=np.int64)
+        active = np.zeros(len(rows), dtype=bool)
+        vectors = np.zeros((len(rows), DIM), dtype=np.float32)
+        for slot, (item_id, is_active, vec) in enumerate(rows):
+            ids[slot], active[slot], vectors[slot] = item_id, is_active, vec
+        with self._lock:
+            self._write(ids, active, vectors)
+        return len(rows)
+
+    def _slot(self, item_id):
+        hits = np.flatnonzero(self.ids == item_id)
+        return int(hits[0]) if len(hits) else None
+
+    def similar(self, item_id, k=10):
+        """Ids of the k most similar active items, best first, or None when
+        item_id isn't in the index."""
+        with self._lock:
+            if not self._open():
+                return None
+            ids, active, vectors = self.ids, self.active, self.vectors
+        slot = self._slot(item_id)
+        if slot is None:
+            return None
+        scores = vectors @ vectors[slot]
+        candidates = np.flatnonzero(active & (ids != item_id) & (scores > 0))
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [int(i) for i in ids[ranked]]
+
+
+_indexes = {}
+
+
+def get_similarity_index():
+    """The index for settings.SIMILARITY_INDEX_DIR, or None when disabled."""
+    directory = getattr(settings, 'SIMILARITY_INDEX_DIR', None)
+    if not directory:
+        return None
+    key = str(directory)
+    if key not in _indexes:
+        _indexes[key] = SimilarityIndex(directory)
+    return _indexes[key]
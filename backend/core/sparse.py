@@ -0,0 +1,204 @@
+"""
+Sparse fieldsets for read endpoints.
+
+    ?fields=id,title,seller.username,images.image
+    ?expand=sender
+
+`fields` keeps only the listed fields; dotted paths reach into nested
+serializers, and a bare relation name keeps the whole nested object.
+`expand` renders a serializer's Meta.expandable_fields as nested objects
+instead of ids; naming an expandable field in `fields` expands it too.
+
+SparseFieldsMixin applies both to a serializer and everything nested under it
+on GET requests. SparseQuerysetMixin then trims a view's list query to what
+the chosen fields read: only() for columns, dropping select_related and
+prefetch_related lookups for relations that were left out, and loading
+expanded ones. Method fields declare what they read in Meta.sparse_sources
+(columns or relations, relative to the serializer's model); a field that
+doesn't makes the query fall back to whole rows.
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def parse(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in filter(None, path.strip().split('.')):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def requested(request):
+    """The (fields, expand) trees asked for, or (None, {}) for the full shape."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, {}
+    params = request.query_params
+    return parse(params['fields']) or None if 'fields' in params else None, parse(params.get('expand', ''))
+
+
+class SparseFieldsMixin:
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self._sparse_spec()
+        for name, make in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand or (only and name in only):
+                fields[name] = make()
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        for name, field in fields.items():
+            child = getattr(field, 'child', field)
+            if isinstance(child, SparseFieldsMixin):
+                child._sparse = ((only or {}).get(name) or None, expand.get(name, {}))
+        return fields
+
+    def _sparse_spec(self):
+        if hasattr(self, '_sparse'):
+            return self._sparse
+        parent = self.parent.parent if isinstance(self.parent, ListSerializer) else self.parent
+        if parent is not None:
+            return None, {}
+        return requested(self.context.get('request'))
+
+
+def reads(serializer):
+    """(columns, relations) the serializer's fields read from its model, where
+    relations maps a relation name to what its nested serializer reads, or to
+    None if the whole relation is needed. Returns None if some field's reads
+    are unknown."""
+    model = serializer.Meta.model
+    sources = getattr(serializer.Meta, 'sparse_sources', {})
+    columns, relations = {model._meta.pk.name}, {}
+
+    def add(name, nested=None):
+        field = next((f for f in model._meta.get_fields() if f.name == name), None)
+        if field is not None and field.is_relation and (nested is not None or not field.concrete):
+            relations[name] = nested
+        else:
+            columns.add(name)
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            for source in sources[name]:
+                add(source)
+            continue
+        if field.source == '*':
+            return None
+        child = getattr(field, 'child', field)
+        if isinstance(child, BaseSerializer):
+            add(field.source_attrs[0], reads(child) or (None, {}))
+        else:
+            add(field.source_attrs[0])
+    return columns, relations
+
+
+def prune(queryset, serializer, extra_columns=()):
+    """Cut `queryset` down to what `serializer` will read."""
+    only, expand = serializer._sparse_spec()
+    if only is None and not expand:
+        return queryset
+    found = reads(serializer)
+    if found is None:
+        return queryset
+    columns, relations = found
+    opts = queryset.model._meta
+
+    joined = queryset.query.select_related
+    joined = list(_paths(joined)) if isinstance(joined, dict) else []
+    select = {path.split('__')[0] for path in joined}
+    prefetch = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if getattr(lookup, 'prefetch_to', lookup).split('__')[0] in relations
+    ]
+    prefetched = {getattr(lookup, 'prefetch_to', lookup).split('__')[0] for lookup in prefetch}
+    for name in relations:
+        if name in select or name in prefetched:
+            continue
+        field = opts.get_field(name)
+        if field.concrete and not field.many_to_many:
+            select.add(name)
+        else:
+            prefetch.append(name)
+    select &= set(relations)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    joined = list(dict.fromkeys(filter(None, (_requested_prefix(path, relations) for path in joined))))
+    joined += [name for name in select if not any(path.split('__')[0] == name for path in joined)]
+    if joined:
+        queryset = queryset.select_related(*joined)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+
+    ordering = _ordering_columns((*extra_columns, *queryset.query.order_by))
+    if ordering is None:
+        return queryset
+    load = set(columns) | ordering
+    if not all(_is_column(opts, name) for name in load):
+        return queryset
+    for name in select:
+        load.add(name)
+        nested = relations[name]
+        related = opts.get_field(name).related_model._meta
+        if nested and nested[0] is not None and not nested[1] and all(_is_column(related, c) for c in nested[0]):
+            load |= {f'{name}__{c}' for c in nested[0]}
+    for name in relations:
+        if _is_column(opts, name):
+            load.add(name)
+    return queryset.only(*load)
+
+
+def _paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        if subtree:
+            yield from _paths(subtree, f'{prefix}{name}__')
+        else:
+            yield f'{prefix}{name}'
+
+
+def _requested_prefix(path, relations):
+    """The longest leading part of a select_related path that the requested
+    fields still read, so no deferred foreign key is ever traversed."""
+    head, _, rest = path.partition('__')
+    if head not in relations:
+        return ''
+    nested = relations[head]
+    if not rest or nested is None or nested[0] is None:
+        return path
+    deeper = _requested_prefix(rest, nested[1])
+    return f'{head}__{deeper}' if deeper else head
+
+
+def _ordering_columns(order_by):
+    """Local columns an ordering reads: names from strings and from
+    F()/OrderBy(F()) expressions. None for anything else."""
+    columns = set()
+    for entry in order_by:
+        entry = getattr(entry, 'expression', entry)
+        entry = getattr(entry, 'name', entry)
+        if not isinstance(entry, str):
+            return None
+        if '__' not in entry:
+            columns.add(entry.lstrip('-'))
+    return columns
+
+
+def _is_column(opts, name):
+    try:
+        field = opts.get_field(name)
+    except Exception:
+        return False
+    return field.concrete and not field.many_to_many
+
+
+class SparseQuerysetMixin:
+    """For views whose serializer uses SparseFieldsMixin: prunes the list query."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        return prune(queryset, self.get_serializer(), [ordering] if isinstance(ordering, str) else ordering)
@@ -1,9 +1,29 @@
+import requests
 import stripe
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 # Only set API key if it's configured
 if settings.STRIPE_SECRET_KEY:
     stripe.api_key = settings.STRIPE_SECRET_KEY
+if settings.STRIPE_API_BASE:
+    stripe.api_base = settings.STRIPE_API_BASE
+
+
+def _pooled_http_client():
+    """One keep-alive connection pool shared by every thread, with explicit
+    connect/read timeouts instead of the SDK's 80s default. Retries are left to
+    the SDK, which reuses the idempotency key across attempts."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.STRIPE_HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return stripe.RequestsClient(
+        session=session, timeout=(settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT))
+
+
+stripe.default_http_client = _pooled_http_client()
+stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
 
 
 class StripeService:
@@ -15,14 +35,16 @@ class StripeService:
         return bool(settings.STRIPE_SECRET_KEY)
     
     @staticmethod
-    def create_checkout_session(items, success_url, cancel_url):
+    def create_checkout_session(items, success_url, cancel_url, expires_at=None):
         """
         Create a Stripe Checkout Session for one or more items.
 
         Args:
-            items: iterable of Item objects being purchased (one line item each)
+            items: iterable of Item objects being purchased (one line item each),
+                ideally with images prefetched
             success_url: URL to redirect after successful payment
             cancel_url: URL to redirect if payment is cancelled
+            expires_at: optional datetime after which the session can no longer be paid
 
         Returns:
             Stripe Checkout Session object. metadata['item_ids'] holds the
@@ -38,8 +60,10 @@ class StripeService:
                 'name': item.title,
                 'description': item.description[:500] if item.description else item.title,
             }
-            if item.images.exists() and item.images.first().image:
-                product_data['images'] = [item.images.first().image.url]
+            # images.all() so a prefetch_related('images') on the caller's queryset is used
+            image = next((i.image for i in item.images.all() if i.image), None)
+            if image:
+                product_data['images'] = [image.url]
             line_items.append({
                 'price_data': {
                     'currency': 'inr',
@@ -49,6 +73,7 @@ class StripeService:
                 'quantity': 1,
             })
 
+        extra = {'expires_at': int(expires_at.timestamp())} if expires_at else {}
         session = stripe.checkout.Session.create(
             payment_method_types=['card'],
             line_items=line_items,
@@ -56,9 +81,17 @@ class StripeService:
             success_url=success_url,
             cancel_url=cancel_url,
             metadata={'item_ids': ','.join(str(item.id) for item in items)},
+            **extra,
         )
         return session
 
+    @staticmethod
+    def expire_checkout_session(session_id):
+        """Expire an open Checkout Session so it can no longer be paid."""
+        if not StripeService.is_configured():
+            raise ValueError("Stripe is not configured. Please set STRIPE_SECRET_KEY.")
+        return stripe.checkout.Session.expire(session_id)
+
     @staticmethod
     def construct_webhook_event(payload, sig_header, webhook_secret):
         """
@@ -0,0 +1,35 @@
+"""
+In-process background tasks.
+
+`enqueue` runs a function on a small thread pool once the surrounding
+transaction commits, so request handlers can hand off slow side effects
+(emails) and return. With TASKS_EAGER the function runs inline instead, which
+is what the tests use. Tasks are best effort: a task that raises is logged,
+and one still queued when the process exits is lost, so nothing that has to
+happen belongs here.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=settings.TASK_WORKERS, thread_name_prefix='task')
+
+
+def _run(fn, args, kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception('Task %s failed', fn.__name__)
+    finally:
+        connection.close()
+
+
+def enqueue(fn, *args, **kwargs):
+    if settings.TASKS_EAGER:
+        fn(*args, **kwargs)
+        return
+    transaction.on_commit(lambda: _executor.submit(_run, fn, args, kwargs))
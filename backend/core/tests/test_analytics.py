@@ -0,0 +1,98 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from core import analytics
+from core.models import Like, Order, SellerDailyStats
+from core.view_counter import ViewCounter
+
+pytestmark = pytest.mark.django_db
+
+
+def stats(seller):
+    return analytics.dashboard(seller)['totals']
+
+
+def test_rollups_follow_listings_likes_views_and_sales(item_factory, user_factory):
+    seller, buyer = user_factory(), user_factory()
+    item, other = item_factory(seller=seller), item_factory(seller=seller)
+    like = Like.objects.create(user=buyer, item=item)
+    Like.objects.create(user=user_factory(), item=item)
+    like.delete()
+    other.delete()
+
+    counter = ViewCounter()
+    for n in range(3):
+        counter.record(item.id, f'u{n}')
+    counter.flush()
+
+    order = Order.objects.create(buyer=buyer, item=item, total_amount=Decimal('500.00'), status='PENDING')
+    order.transition_to('PAID')
+
+    totals = stats(seller)
+    assert totals['listings'] == 1
+    assert totals['likes'] == 1
+    assert totals['views'] == 3
+    assert totals['orders'] == 1
+    assert totals['revenue'] == Decimal('500.00')
+    assert totals['co2_saved'] == 5.5
+    assert SellerDailyStats.objects.filter(seller=seller).count() == 1
+
+
+def test_backfill_matches_incremental_rollups(item_factory, user_factory):
+    seller, buyer = user_factory(), user_factory()
+    item = item_factory(seller=seller)
+    item_factory(seller=seller)
+    Like.objects.create(user=buyer, item=item)
+    order = Order.objects.create(buyer=buyer, item=item, total_amount=Decimal('500.00'))
+    order.status = 'PAID'
+    order.save()
+    incremental = stats(seller)
+
+    SellerDailyStats.objects.all().delete()
+    call_command('backfill_seller_stats')
+    assert stats(seller) == incremental
+
+
+def test_dashboard_range_is_one_query(auth_client, django_assert_num_queries):
+    today = timezone.localdate()
+    for days_ago in (0, 3, 40):
+        analytics.bump(auth_client.user.id, day=today - timedelta(days=days_ago), listings=1, views=10)
+
+    with django_assert_num_queries(1):
+        analytics.dashboard(auth_client.user)
+
+    res = auth_client.get('/api/users/dashboard_stats/')
+    assert res.status_code == 200
+    assert res.data['total_listings'] == 3 and res.data['total_views'] == 30
+    assert [row['day'] for row in res.data['series']] == [today - timedelta(days=3), today]
+
+    start = (today - timedelta(days=60)).isoformat()
+    end = (today - timedelta(days=2)).isoformat()
+    res = auth_client.get(f'/api/users/dashboard_stats/?start={start}&end={end}')
+    assert len(res.data['series']) == 2
+
+    assert auth_client.get('/api/users/dashboard_stats/?start=2024-13-01').status_code == 400
+    assert auth_client.get('/api/users/dashboard_stats/?start=garbage').status_code == 400
+    assert auth_client.get(f'/api/users/dashboard_stats/?start={start}&end=2024/01/02').status_code == 400
+    assert auth_client.get('/api/users/dashboard_stats/?start=&end=').status_code == 200
+    assert auth_client.get(f'/api/users/dashboard_stats/?start={end}&end={start}').status_code == 400
+
+
+def test_deleting_a_seller_with_items_and_likes(user_factory, item_factory):
+    seller, fan = user_factory(), user_factory()
+    item = item_factory(seller=seller)
+    other = item_factory(seller=fan)
+    Like.objects.create(user=fan, item=item)
+    Like.objects.create(user=seller, item=other)
+
+    seller.delete()
+    connection.check_constraints()  # the FK failure surfaced at commit
+
+    assert not SellerDailyStats.objects.filter(seller_id=seller.id).exists()
+    assert SellerDailyStats.objects.get(seller=fan).likes == 0  # the seller's like on fan's item is gone
+    other.refresh_from_db()
+    assert other.likes_count == 0
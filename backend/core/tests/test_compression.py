@@ -0,0 +1,66 @@
+import datetime
+import gzip
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from core import compression, renderers
+from core.renderers import ORJSONParser, ORJSONRenderer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def many_items(item_factory, user_factory):
+    seller = user_factory()
+    for n in range(10):
+        item_factory(seller=seller, title=f'Vintage Tee {n}')
+
+
+def test_gzip_is_negotiated_for_large_json(api_client, many_items):
+    plain = api_client.get('/api/items/')
+    assert 'Content-Encoding' not in plain
+    assert 'Accept-Encoding' in plain['Vary']
+
+    res = api_client.get('/api/items/', HTTP_ACCEPT_ENCODING='br;q=0, gzip, deflate')
+    assert res['Content-Encoding'] == ('br' if compression.brotli else 'gzip')
+    if not compression.brotli:
+        assert gzip.decompress(res.content) == plain.content
+    assert int(res['Content-Length']) == len(res.content) < len(plain.content)
+
+
+def test_small_and_refused_bodies_pass_through(api_client, many_items, settings):
+    assert 'Content-Encoding' not in api_client.get('/api/items/?search=nothing', HTTP_ACCEPT_ENCODING='gzip')
+    assert 'Content-Encoding' not in api_client.get('/api/items/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+    settings.COMPRESS_CONTENT_TYPES = ()
+    assert 'Content-Encoding' not in api_client.get('/api/items/', HTTP_ACCEPT_ENCODING='gzip')
+
+
+def test_brotli_preferred_when_installed(api_client, many_items):
+    brotli = pytest.importorskip('brotli')
+    res = api_client.get('/api/items/', HTTP_ACCEPT_ENCODING='gzip, br')
+    assert res['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(res.content))['count'] == 10
+
+
+def test_orjson_renderer_matches_stdlib(monkeypatch):
+    data = {'price': Decimal('9.50'), 'when': datetime.date(2024, 1, 2), 'histogram': {1: 0, 5: 2},
+            'at': datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+            'title': 'Café ☃', 'nested': [{'ok': True, 'none': None, 'n': 3}]}
+    assert json.loads(ORJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+    assert json.loads(ORJSONRenderer().render(data))['at'] == '2024-01-02T03:04:05.678901Z'
+    assert ORJSONRenderer().render(None) == b''
+
+    monkeypatch.setattr(renderers, 'orjson', None)
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_orjson_parser(auth_client):
+    assert ORJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')) == {'a': [1, 2]}
+    res = auth_client.post('/api/items/', b'{"title": "Denim", "description": "Blue", "price": "10.00", '
+                                          b'"size": "M", "condition": "GOOD"}', content_type='application/json')
+    assert res.status_code == 201
+    assert auth_client.post('/api/items/', b'{not json', content_type='application/json').status_code == 400
@@ -0,0 +1,150 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from chat.models import Conversation, Message
+from core.models import Item, Like
+from core.view_counter import view_counter
+from notifications.models import Notification
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    caches['shared'].clear()
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def revalidate(client, url):
+    etag = client.get(url)['ETag']
+    return client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+
+def test_unchanged_poll_is_one_query_and_a_304(auth_client, user_factory):
+    sender = user_factory()
+    Notification.objects.create(recipient=auth_client.user, sender=sender, notification_type='like', message='hi')
+    first = auth_client.get('/api/notifications/')
+    assert first.status_code == 200
+    assert first['Cache-Control'] == 'private, no-cache'
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = auth_client.get('/api/notifications/', HTTP_IF_NONE_MATCH=first['ETag'])
+    assert res.status_code == 304
+    assert res['ETag'] == first['ETag']
+    assert len(ctx.captured_queries) == 1
+    assert ctx.captured_queries[0]['sql'].startswith('SELECT COUNT(')
+
+
+def test_notification_changes_invalidate(auth_client, user_factory):
+    sender = user_factory()
+    Notification.objects.create(recipient=auth_client.user, sender=sender, notification_type='like', message='a')
+    etag = auth_client.get('/api/notifications/')['ETag']
+
+    Notification.objects.create(recipient=auth_client.user, sender=sender, notification_type='like', message='b')
+    assert auth_client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+    etag = auth_client.get('/api/notifications/')['ETag']
+
+    auth_client.post('/api/notifications/mark_all_read/')
+    assert auth_client.get('/api/notifications/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_tags_are_per_user_and_per_query(auth_client, user_factory, item_factory):
+    item_factory()
+    other = client_for(user_factory())
+    mine = auth_client.get('/api/items/')['ETag']
+    assert other.get('/api/items/', HTTP_IF_NONE_MATCH=mine).status_code == 200
+    assert auth_client.get('/api/items/?sort=rating', HTTP_IF_NONE_MATCH=mine).status_code == 200
+    assert auth_client.get('/api/items/', HTTP_IF_NONE_MATCH=mine).status_code == 304
+
+
+def test_item_list_and_detail_follow_likes_and_edits(auth_client, item_factory):
+    item = item_factory()
+    list_etag = auth_client.get('/api/items/')['ETag']
+    detail = auth_client.get(f'/api/items/{item.id}/')
+    assert detail['Last-Modified'] == http_date(item.updated_at.timestamp())
+
+    auth_client.post(f'/api/items/{item.id}/like/')
+    assert auth_client.get('/api/items/', HTTP_IF_NONE_MATCH=list_etag).status_code == 200
+    assert auth_client.get(f'/api/items/{item.id}/', HTTP_IF_NONE_MATCH=detail['ETag']).status_code == 200
+    assert revalidate(auth_client, f'/api/items/{item.id}/') == 304
+
+    etag = auth_client.get(f'/api/items/{item.id}/')['ETag']
+    item.title = 'Renamed'
+    item.save()
+    assert auth_client.get(f'/api/items/{item.id}/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_if_modified_since(api_client, item_factory):
+    item = item_factory()
+    last_modified = api_client.get(f'/api/items/{item.id}/')['Last-Modified']
+    assert api_client.get(f'/api/items/{item.id}/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+
+def test_profile_follows_bump_the_tag(auth_client, user_factory):
+    seller = user_factory()
+    url = f'/api/users/{seller.username}/'
+    etag = auth_client.get(url)['ETag']
+    assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    auth_client.post(f'/api/users/{seller.username}/follow/')
+    res = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert res.status_code == 200
+    assert res.data['is_following'] is True
+
+
+def test_conversations_and_messages_follow_new_messages(auth_client, user_factory):
+    other = user_factory()
+    conversation = Conversation.objects.create()
+    conversation.participants.add(auth_client.user, other)
+    Message.objects.create(conversation=conversation, sender=other, content='hi')
+    urls = ['/api/conversations/', f'/api/conversations/{conversation.id}/',
+            f'/api/conversations/{conversation.id}/messages/']
+    etags = [auth_client.get(url)['ETag'] for url in urls]
+    assert [auth_client.get(u, HTTP_IF_NONE_MATCH=e).status_code for u, e in zip(urls, etags)] == [304] * 3
+
+    Message.objects.create(conversation=conversation, sender=other, content='again')
+    assert [auth_client.get(u, HTTP_IF_NONE_MATCH=e).status_code for u, e in zip(urls, etags)] == [200] * 3
+
+
+def test_missing_objects_still_404(auth_client):
+    assert auth_client.get('/api/items/999/').status_code == 404
+    assert auth_client.get('/api/items/abc/').status_code == 404
+    assert auth_client.get('/api/conversations/999/messages/').status_code == 404
+    assert not Item.objects.exists()
+
+
+def test_item_list_tag_follows_listings_not_counters(api_client, user_factory, item_factory,
+                                                     django_capture_on_commit_callbacks):
+    item = item_factory()
+    etag = api_client.get('/api/items/')['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        Like.objects.create(user=user_factory(), item=item)
+        view_counter.record(item.id, 'someone')
+        view_counter.flush()
+    assert api_client.get('/api/items/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item_factory().delete()
+    assert api_client.get('/api/items/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_revalidation_is_one_cache_query_on_the_database_cache(auth_client, item_factory, settings):
+    settings.CACHES = {**settings.CACHES, 'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_shared_cache'}}
+    call_command('createcachetable', 'test_shared_cache')
+    item = item_factory(seller=auth_client.user)
+    for url in ('/api/items/', f'/api/items/{item.id}/'):
+        etag = auth_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        cache_queries = [q['sql'] for q in ctx.captured_queries if 'test_shared_cache' in q['sql']]
+        assert len(cache_queries) == 1 and len(ctx.captured_queries) == 2, ctx.captured_queries
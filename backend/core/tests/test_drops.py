@@ -0,0 +1,139 @@
+import types
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core import drop_mode
+from core.drop_mode import AdmissionGate, QueueFull
+from core.models import DropEvent, Like, Order
+from core.payments import handle_checkout_completion
+from core.stripe_service import StripeService
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    caches['shared'].clear()
+
+
+@pytest.fixture
+def live_drop(item_factory):
+    now = timezone.now()
+    drop = DropEvent.objects.create(title='Y2K Drop', description='d',
+                                    start_time=now - timedelta(minutes=1), end_time=now + timedelta(hours=1))
+    drop.items.add(item_factory(title='Baby tee'), item_factory(title='Cargo pants'))
+    return drop
+
+
+def drop_list(client, drop):
+    res = client.get(f'/api/items/?drop={drop.id}')
+    assert res.status_code == 200
+    return res.data['results']
+
+
+def test_warm_drop_is_served_without_touching_items(api_client, live_drop, item_factory,
+                                                     django_assert_num_queries):
+    DropEvent.objects.create(title='Far future', description='d', start_time=timezone.now() + timedelta(days=3),
+                             end_time=timezone.now() + timedelta(days=4))
+    call_command('advance_drops')
+    cold = drop_list(APIClient(), live_drop)
+    assert [i['title'] for i in cold] == ['Cargo pants', 'Baby tee']
+
+    with django_assert_num_queries(0):
+        assert drop_list(api_client, live_drop) == cold
+
+
+def test_warm_drop_is_personalised(auth_client, live_drop):
+    liked = live_drop.items.get(title='Baby tee')
+    Like.objects.create(user=auth_client.user, item=liked)
+    drop_mode.prewarm()
+
+    rows = {i['id']: i for i in drop_list(auth_client, live_drop)}
+    assert rows[liked.id]['is_liked'] is True
+    assert sum(r['is_liked'] for r in rows.values()) == 1
+
+
+def test_sale_rewarms_the_drop(auth_client, live_drop, monkeypatch):
+    monkeypatch.setattr(StripeService, 'create_checkout_session', staticmethod(
+        lambda *a, **kw: types.SimpleNamespace(id='cs_drop', url='https://stripe.test/pay')))
+    drop_mode.prewarm()
+    item = live_drop.items.first()
+
+    res = auth_client.post('/api/create-checkout-session/', {'item_id': item.id})
+    assert res.status_code == 200
+    assert drop_mode.admission_gate.stats[live_drop.id].admitted >= 1
+    handle_checkout_completion({'id': 'cs_drop'})
+
+    sold = {i['id']: i['is_sold'] for i in drop_list(APIClient(), live_drop)}
+    assert sold[item.id] is True
+    assert Order.objects.get(item=item).status == 'PAID'
+
+
+def test_admission_gate_never_blocks(settings):
+    settings.DROP_CHECKOUT_RATE = 10
+    settings.DROP_CHECKOUT_BURST = 2
+    now = [100.0]
+    gate = AdmissionGate(clock=lambda: now[0])
+
+    gate.admit(7)
+    gate.admit(7)  # burst
+    with pytest.raises(QueueFull) as exc:
+        gate.admit(7)
+    assert exc.value.retry_after == 1
+    gate.admit(8)  # drops are gated independently
+
+    now[0] += 0.1
+    gate.admit(7)
+    with pytest.raises(QueueFull):
+        gate.admit(7)
+    assert gate.stats[7].as_dict() == {'admitted': 3, 'rejected': 2}
+
+
+def test_busy_drop_checkout_gets_429(auth_client, live_drop, monkeypatch):
+    drop_mode.prewarm()
+
+    def full(drop_id):
+        raise QueueFull(3)
+    monkeypatch.setattr(drop_mode.admission_gate, 'admit', full)
+
+    res = auth_client.post('/api/create-checkout-session/', {'item_id': live_drop.items.first().id})
+    assert res.status_code == 429
+    assert res['Retry-After'] == '3'
+    assert not Order.objects.exists()
+
+
+def test_drop_windows(api_client, item_factory):
+    now = timezone.now()
+
+    def make(title, start, end):
+        return DropEvent.objects.create(title=title, description='d', start_time=now + timedelta(hours=start),
+                                        end_time=now + timedelta(hours=end))
+    past = make('Past', -5, -4)
+    live = make('Live', -1, 1)
+    soon, later = make('Soon', 1, 2), make('Later', 3, 4)
+    live.items.add(item_factory(), item_factory())
+
+    def titles(query=''):
+        res = api_client.get(f'/api/drops/{query}')
+        assert res.status_code == 200
+        return [d['title'] for d in res.data['results']]
+
+    assert titles() == ['Live', 'Soon', 'Later']
+    assert titles('?window=upcoming') == ['Soon', 'Later']
+    assert titles('?window=live') == ['Live']
+    assert titles('?window=ended') == ['Past']
+    drop = api_client.get(f'/api/drops/{live.id}/').data
+    assert drop['item_count'] == 2 and 'items' not in drop
+
+    call_command('advance_drops')
+    for drop in (past, soon, later):
+        drop.refresh_from_db()
+    assert not past.is_active and soon.is_active and later.is_active
+    assert titles('?window=ended') == ['Past']
+    assert titles('?window=upcoming') == ['Soon', 'Later']
+    assert api_client.get(f'/api/drops/{past.id}/').status_code == 200
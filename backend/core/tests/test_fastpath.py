@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from chat.models import Conversation, Message
+from core import feed_service
+from core.models import CustomUser, Follow, ItemImage, Like, Review
+from notifications.models import Notification
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def catalogue(auth_client, item_factory, user_factory):
+    sellers = [user_factory(social_links={'instagram': 'x'}), user_factory(), auth_client.user]
+    CustomUser.objects.filter(id=sellers[0].id).update(profile_picture='profile_pics/a.jpg', bio='hi')
+    Follow.objects.create(follower=auth_client.user, following=sellers[0])
+    Follow.objects.create(follower=sellers[1], following=sellers[0])
+    items = []
+    for n in range(6):
+        item = item_factory(seller=sellers[n % 3], price=f'{n}9.5', ai_analysis={'tags': ['denim'], 'score': 0.5})
+        ItemImage.objects.create(item=item, image=f'item_images/{n}a.jpg')
+        ItemImage.objects.create(item=item, image=f'item_images/{n}b.jpg')
+        items.append(item)
+    Like.objects.create(user=auth_client.user, item=items[0])
+    Review.objects.create(item=items[0], reviewer=sellers[1], rating=4, comment='ok')
+    return items
+
+
+def both(client, settings, url):
+    settings.SERIALIZER_FASTPATH = False
+    slow = client.get(url)
+    settings.SERIALIZER_FASTPATH = True
+    with CaptureQueriesContext(connection) as ctx:
+        fast = client.get(url)
+    assert fast.status_code == slow.status_code == 200
+    return slow.content, fast.content, len(ctx.captured_queries)
+
+
+@pytest.mark.parametrize('url', ['/api/items/', '/api/items/?search=Vintage&page=1', '/api/items/?sort=rating'])
+def test_item_list_is_byte_identical(auth_client, api_client, catalogue, settings, url):
+    slow, fast, queries = both(auth_client, settings, url)
+    assert fast == slow
+    assert queries <= 9  # 8 + the ETag aggregate
+    auth_client.force_authenticate(user=None)
+    slow, fast, _ = both(auth_client, settings, url)
+    assert fast == slow
+
+
+def test_featured_is_byte_identical(auth_client, catalogue, settings, monkeypatch):
+    ids = [item.id for item in reversed(catalogue)]
+    monkeypatch.setattr(feed_service, 'feed_ids', lambda user: ids)
+    slow, fast, _ = both(auth_client, settings, '/api/items/featured/')
+    assert fast == slow
+
+
+def test_notifications_and_messages_are_byte_identical(auth_client, user_factory, settings):
+    other = user_factory()
+    CustomUser.objects.filter(id=other.id).update(profile_picture='profile_pics/b.jpg')
+    for n in range(3):
+        Notification.objects.create(recipient=auth_client.user, sender=other,
+                                    notification_type='like', message=f'liked {n}')
+    conversation = Conversation.objects.create()
+    conversation.participants.add(auth_client.user, other)
+    for n in range(4):
+        Message.objects.create(conversation=conversation, sender=(other, auth_client.user)[n % 2], content=f'm{n}')
+
+    for url in ['/api/notifications/', '/api/messages/', f'/api/conversations/{conversation.id}/messages/']:
+        slow, fast, _ = both(auth_client, settings, url)
+        assert fast == slow
+
+
+def test_sparse_requests_use_the_serializers(auth_client, catalogue):
+    row = auth_client.get('/api/items/?fields=id,title').data['results'][0]
+    assert set(row) == {'id', 'title'}
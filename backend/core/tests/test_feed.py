@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from core import feed_service
+from core.models import Follow, Like, Wishlist
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_cache():
+    caches['shared'].clear()
+
+
+def featured_ids(client):
+    res = client.get('/api/items/featured/')
+    assert res.status_code == 200
+    return [i['id'] for i in res.data]
+
+
+def test_anonymous_feed_is_global_popularity(api_client, item_factory, user_factory):
+    quiet = item_factory(title='Quiet')
+    popular = item_factory(title='Popular')
+    for n in range(3):
+        Like.objects.create(user=user_factory(), item=popular)
+    item_factory(title='Sold', is_sold=True)
+
+    assert featured_ids(api_client) == [popular.id, quiet.id]
+
+
+def test_followed_and_engaged_sellers_rank_first(auth_client, item_factory, user_factory):
+    followed_seller, liked_seller = user_factory(username='followed'), user_factory(username='liked')
+    from_liked = item_factory(seller=liked_seller, title='From liked seller')
+    from_followed = item_factory(seller=followed_seller, title='From followed seller')
+    stranger = item_factory(title='Stranger')
+    item_factory(seller=auth_client.user, title='Mine')
+    for n in range(2):
+        Like.objects.create(user=user_factory(), item=stranger)
+
+    Follow.objects.create(follower=auth_client.user, following=followed_seller)
+    Wishlist.objects.create(user=auth_client.user, item=item_factory(seller=liked_seller, is_sold=True))
+    Like.objects.create(user=auth_client.user, item=from_liked)
+    call_command('build_feed_candidates')
+
+    ids = featured_ids(auth_client)
+    assert ids[:2] == [from_followed.id, from_liked.id]
+    assert set(ids) == {from_followed.id, from_liked.id, stranger.id}
+
+
+def test_ranked_list_is_cached_per_user(auth_client, item_factory, monkeypatch):
+    item = item_factory()
+    assert featured_ids(auth_client) == [item.id]
+    assert caches['shared'].get(feed_service.USER_KEY.format(auth_client.user.id)) == [item.id]
+
+    def boom(*args):
+        raise AssertionError('cache hit must not rebuild')
+    monkeypatch.setattr(feed_service, 'user_signals', boom)
+    monkeypatch.setattr(feed_service, 'build_candidates', boom)
+    assert featured_ids(auth_client) == [item.id]
+
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_featured_fills_up_past_items_sold_since_ranking(api_client, item_factory, monkeypatch, settings, fast):
+    settings.SERIALIZER_FASTPATH = fast
+    items = [item_factory() for _ in range(15)]
+    monkeypatch.setattr(feed_service, 'feed_ids', lambda user: [i.id for i in items])
+    for item in items[:3]:
+        item.is_sold = True
+        item.save()
+
+    assert featured_ids(api_client) == [i.id for i in items[3:15]]
@@ -1,5 +1,7 @@
 import pytest
-from core.models import Item, Like
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.models import Item, Like, Wishlist
 
 pytestmark = pytest.mark.django_db
 
@@ -65,3 +67,22 @@ def test_drop_filter(api_client, item_factory):
     assert res.status_code == 200
     items = res.data['results'] if isinstance(res.data, dict) else res.data
     assert [i['title'] for i in items] == ['Exclusive']
+
+
+@pytest.mark.parametrize('url', ['/api/items/', '/api/items/trending/', '/api/wishlist/'])
+def test_is_liked_is_one_query_per_page(auth_client, item_factory, settings, url):
+    settings.SERIALIZER_FASTPATH = False
+    items = [item_factory() for _ in range(4)]
+    Item.objects.update(trending_score=1.0)
+    for item in items:
+        Wishlist.objects.create(user=auth_client.user, item=item)
+    for item in items[:2]:
+        Like.objects.create(user=auth_client.user, item=item)
+        Like.objects.create(user=item.seller, item=item)
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = auth_client.get(url)
+    rows = res.data['results'] if isinstance(res.data, dict) else res.data
+    liked = {r.get('item', r)['id'] for r in rows if r.get('item', r)['is_liked']}
+    assert liked == {i.id for i in items[:2]}
+    assert len([q for q in ctx.captured_queries if 'core_like' in q['sql']]) == 1
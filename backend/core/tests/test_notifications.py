@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import caches
 from core.models import Order
 from notifications.models import Notification
 
@@ -47,3 +48,37 @@ def test_mark_all_read(auth_client, user_factory):
     res = auth_client.post('/api/notifications/mark_all_read/')
     assert res.status_code == 200
     assert Notification.objects.filter(recipient=auth_client.user, is_read=False).count() == 0
+
+
+def notify(recipient, sender, n=1):
+    for _ in range(n):
+        Notification.objects.create(recipient=recipient, sender=sender, notification_type='like', message='liked')
+
+
+def test_unread_count_is_a_cache_read(auth_client, user_factory, django_assert_num_queries,
+                                      django_capture_on_commit_callbacks):
+    caches['shared'].clear()
+    sender = user_factory(username='sender')
+    notify(auth_client.user, sender, 2)
+    assert auth_client.get('/api/notifications/unread_count/').data == {'unread_count': 2}  # recounted
+
+    with django_capture_on_commit_callbacks(execute=True):
+        notify(auth_client.user, sender)
+    with django_assert_num_queries(0):
+        assert auth_client.get('/api/notifications/unread_count/').data == {'unread_count': 3}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post('/api/notifications/mark_all_read/')
+    with django_assert_num_queries(0):
+        assert auth_client.get('/api/notifications/unread_count/').data == {'unread_count': 0}
+
+
+def test_list_pages_by_cursor(auth_client, user_factory):
+    notify(auth_client.user, user_factory(username='sender'), 25)
+    first = auth_client.get('/api/notifications/')
+    assert len(first.data['results']) == 20
+    assert 'cursor=' in first.data['next']
+    second = auth_client.get(first.data['next'])
+    assert len(second.data['results']) == 5
+    ids = [n['id'] for n in first.data['results'] + second.data['results']]
+    assert ids == sorted(ids, reverse=True)
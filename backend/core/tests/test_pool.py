@@ -0,0 +1,38 @@
+import runpy
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.db import connections
+
+pytestmark = pytest.mark.django_db
+
+
+class FakePool:
+    def get_stats(self):
+        return {'pool_size': 4, 'pool_available': 1, 'requests_num': 8, 'requests_queued': 2,
+                'requests_wait_ms': 100, 'requests_errors': 1}
+
+
+def test_health_reports_no_pool_without_pooling(api_client):
+    assert api_client.get('/api/health/').json() == {'status': 'ok', 'database': 'connected', 'pool': None}
+
+
+def test_health_reports_pool_wait(api_client, monkeypatch):
+    monkeypatch.setattr(type(connections['default']), 'pool', FakePool(), raising=False)
+    assert api_client.get('/api/health/').json()['pool'] == {
+        'size': 4, 'available': 1, 'waiting': 0, 'requests': 8, 'queued': 2, 'errors': 1, 'avg_wait_ms': 12.5,
+    }
+
+
+@pytest.mark.parametrize('env, max_size', [({}, 10), ({'GUNICORN_THREADS': '4', 'TASK_WORKERS': '3'}, 7),
+                                           ({'DB_POOL_MAX_SIZE': '20'}, 20)])
+def test_pool_covers_request_and_task_threads(monkeypatch, env, max_size):
+    for name in ('GUNICORN_THREADS', 'TASK_WORKERS', 'DB_POOL_MAX_SIZE'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('DB_POOL', 'True')
+    monkeypatch.setenv('DATABASE_URL', 'postgres://u:p@db:5432/thriftgram')
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    config = runpy.run_path(str(Path(settings.BASE_DIR) / 'config' / 'settings.py'))
+    assert config['DATABASES']['default']['OPTIONS']['pool']['max_size'] == max_size
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from core.models import Item, Like, Wishlist
+from core.trending import compute_trending
+
+pytestmark = pytest.mark.django_db
+
+
+def test_like_and_wishlist_counters_follow_rows(auth_client, item_factory):
+    item = item_factory()
+
+    auth_client.post(f'/api/items/{item.id}/like/')
+    auth_client.post('/api/wishlist/', {'item': item.id})
+    item.refresh_from_db()
+    assert (item.likes_count, item.wishlist_count) == (1, 1)
+    assert auth_client.get(f'/api/items/{item.id}/').data['likes_count'] == 1
+
+    auth_client.post(f'/api/items/{item.id}/unlike/')
+    auth_client.delete('/api/wishlist/remove/', {'item': item.id}, format='json')
+    item.refresh_from_db()
+    assert (item.likes_count, item.wishlist_count) == (0, 0)
+
+
+def test_saving_a_stale_item_keeps_counters(item_factory, user_factory):
+    item = item_factory()
+    stale = Item.objects.get(pk=item.pk)
+    Like.objects.create(user=user_factory(), item=item)
+
+    stale.title = 'Renamed'
+    stale.save()
+    item.refresh_from_db()
+    assert item.title == 'Renamed'
+    assert item.likes_count == 1
+
+
+def test_trending_decays_with_age(api_client, item_factory, user_factory):
+    fresh, stale, quiet = item_factory(title='Fresh'), item_factory(title='Stale'), item_factory(title='Quiet')
+    sold = item_factory(title='Sold', is_sold=True)
+    for target in (fresh, stale, sold):
+        Like.objects.create(user=user_factory(), item=target)
+    Wishlist.objects.create(user=user_factory(), item=stale)
+    Like.objects.filter(item=stale).update(created_at=timezone.now() - timedelta(days=2))
+    Wishlist.objects.filter(item=stale).update(added_at=timezone.now() - timedelta(days=2))
+
+    assert compute_trending() == 3
+    fresh.refresh_from_db()
+    stale.refresh_from_db()
+    assert fresh.trending_score == pytest.approx(1.0, rel=1e-3)
+    assert stale.trending_score == pytest.approx(0.75, rel=1e-3)
+
+    res = api_client.get('/api/items/trending/')
+    assert [i['title'] for i in res.data] == ['Fresh', 'Stale']
+
+    Like.objects.filter(item=fresh).update(created_at=timezone.now() - timedelta(days=30))
+    compute_trending()
+    fresh.refresh_from_db()
+    assert fresh.trending_score == 0
+    assert quiet.id not in [i['id'] for i in api_client.get('/api/items/trending/').data]
@@ -0,0 +1,126 @@
+import itertools
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from django.db import connections
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core import reservations
+from core.models import Item, Order
+from core.payments import handle_checkout_completion
+from core.stripe_service import StripeService
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch):
+    calls = {'expired': [], 'expires_at': None}
+    ids = itertools.count(1)
+
+    def fake_create(items, success_url, cancel_url, expires_at=None):
+        calls['expires_at'] = expires_at
+        return types.SimpleNamespace(id=f'cs_test_{next(ids)}', url='https://stripe.test/pay')
+
+    monkeypatch.setattr(StripeService, 'create_checkout_session', staticmethod(fake_create))
+    monkeypatch.setattr(StripeService, 'expire_checkout_session', staticmethod(calls['expired'].append))
+    return calls
+
+
+def checkout(client, *items):
+    return client.post('/api/create-checkout-session/', {'item_ids': [i.id for i in items]}, format='json')
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def test_held_item_rejects_other_buyers(auth_client, item_factory, user_factory, fake_stripe):
+    item = item_factory()
+    res = checkout(auth_client, item)
+    assert res.status_code == 200
+
+    item.refresh_from_db()
+    assert item.reserved_by == auth_client.user
+    assert item.reserved_until == fake_stripe['expires_at']
+
+    assert checkout(client_for(user_factory()), item).status_code == 409
+    assert Order.objects.count() == 1
+
+
+def test_cart_hold_is_all_or_nothing(auth_client, item_factory, user_factory, fake_stripe):
+    free, taken = item_factory(), item_factory()
+    reservations.reserve([taken.id], user_factory())
+
+    assert checkout(auth_client, free, taken).status_code == 409
+    free.refresh_from_db()
+    assert free.reserved_by is None
+
+
+def test_lapsed_hold_can_be_taken(auth_client, item_factory, user_factory, fake_stripe):
+    item = item_factory()
+    reservations.reserve([item.id], user_factory(), now=timezone.now() - timedelta(hours=1))
+    assert checkout(auth_client, item).status_code == 200
+
+
+def test_retry_by_same_buyer_supersedes_old_session(auth_client, item_factory, fake_stripe):
+    item = item_factory()
+    first = checkout(auth_client, item).data['sessionId']
+    second = checkout(auth_client, item).data['sessionId']
+
+    assert Order.objects.get(stripe_payment_intent=first).status == 'CANCELLED'
+    assert Order.objects.get(stripe_payment_intent=second).status == 'PENDING'
+    assert fake_stripe['expired'] == [first]
+
+    # The old session's expiry webhook must not release the new hold
+    reservations.cancel_session(first)
+    item.refresh_from_db()
+    assert item.reserved_by == auth_client.user
+
+
+def test_cancel_and_expiry_release_the_hold(auth_client, item_factory, user_factory, fake_stripe):
+    a, b = item_factory(), item_factory()
+    session_id = checkout(auth_client, a).data['sessionId']
+    res = auth_client.post('/api/cancel-checkout-session/', {'session_id': session_id})
+    assert res.status_code == 200
+    assert Order.objects.get(stripe_payment_intent=session_id).status == 'CANCELLED'
+    assert fake_stripe['expired'] == [session_id]
+    assert checkout(client_for(user_factory()), a).status_code == 200
+
+    session_id = checkout(auth_client, b).data['sessionId']
+    assert client_for(user_factory()).post('/api/cancel-checkout-session/',
+                                           {'session_id': session_id}).status_code == 404
+    reservations.cancel_session(session_id)
+    b.refresh_from_db()
+    assert b.reserved_by is None and b.reserved_until is None
+
+
+def test_completion_clears_the_hold(auth_client, item_factory, fake_stripe):
+    item = item_factory()
+    handle_checkout_completion({'id': checkout(auth_client, item).data['sessionId']})
+    item.refresh_from_db()
+    assert item.is_sold and item.reserved_by is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_hundred_parallel_checkouts_one_winner(item_factory, user_factory, fake_stripe):
+    item = item_factory()
+    buyers = [user_factory() for _ in range(100)]
+
+    def attempt(buyer):
+        try:
+            return checkout(client_for(buyer), item).status_code
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        codes = list(pool.map(attempt, buyers))
+
+    assert codes.count(200) == 1
+    assert codes.count(409) == 99
+    assert Order.objects.filter(item=item).count() == 1
+    assert Item.objects.get(id=item.id).reserved_by_id == buyers[codes.index(200)].id
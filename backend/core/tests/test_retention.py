@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+from chat.models import ArchivedMessage, Conversation, Message
+from core.retention import archive_messages, prune_notifications
+from notifications import unread
+from notifications.models import Notification
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def pair(user_factory):
+    return user_factory(), user_factory()
+
+
+def notification(recipient, sender, kind, days_old, is_read=False):
+    n = Notification.objects.create(recipient=recipient, sender=sender, notification_type=kind,
+                                    message='m', is_read=is_read)
+    Notification.objects.filter(id=n.id).update(created_at=timezone.now() - timedelta(days=days_old))
+    return n
+
+
+def test_notifications_expire_per_type_in_batches(pair, settings):
+    settings.NOTIFICATION_RETENTION_DAYS = {'like': 30, 'follow': 0, 'message': 7}
+    recipient, sender = pair
+    for _ in range(5):
+        notification(recipient, sender, 'like', 40)
+    kept = [notification(recipient, sender, 'like', 10), notification(recipient, sender, 'follow', 400),
+            notification(recipient, sender, 'message', 3)]
+    notification(recipient, sender, 'message', 8, is_read=True)
+
+    deleted = prune_notifications(timezone.now(), batch_size=2)
+    assert deleted == {'like': 5, 'message': 1}
+    assert set(Notification.objects.values_list('id', flat=True)) == {n.id for n in kept}
+
+
+def test_pruning_forgets_cached_unread_counts(pair, settings):
+    caches['shared'].clear()
+    settings.NOTIFICATION_RETENTION_DAYS = {'like': 30}
+    recipient, sender = pair
+    notification(recipient, sender, 'like', 40)
+    notification(recipient, sender, 'like', 1)
+    assert unread.count(recipient.id) == 2
+
+    prune_notifications(timezone.now())
+    assert unread.count(recipient.id) == 1
+
+
+def test_messages_are_archived_only_when_enabled(pair, settings):
+    conversation = Conversation.objects.create()
+    conversation.participants.add(*pair)
+    old = Message.objects.create(conversation=conversation, sender=pair[0], content='old')
+    Message.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=400))
+    recent = Message.objects.create(conversation=conversation, sender=pair[1], content='recent')
+
+    assert archive_messages(timezone.now()) == 0
+
+    settings.MESSAGE_ARCHIVE_DAYS = 365
+    call_command('prune_history', '--batch-size', '1')
+    assert list(Message.objects.values_list('id', flat=True)) == [recent.id]
+    archived = ArchivedMessage.objects.get()
+    assert (archived.id, archived.content, archived.sender_id) == (old.id, 'old', pair[0].id)
+
+
+def test_message_notifications_coalesce_per_sender(pair):
+    recipient, sender = pair
+    conversation = Conversation.objects.create()
+    conversation.participants.add(recipient, sender)
+    for text in ('a', 'b', 'c'):
+        Message.objects.create(conversation=conversation, sender=sender, content=text)
+    assert Notification.objects.filter(recipient=recipient, notification_type='message').count() == 1
+
+    Notification.objects.update(is_read=True)
+    Message.objects.create(conversation=conversation, sender=sender, content='d')
+    assert Notification.objects.filter(recipient=recipient, notification_type='message', is_read=False).count() == 1
@@ -0,0 +1,158 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core import ratings
+from core.models import CustomUser, Item
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    caches['shared'].clear()
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def review(client, item, rating):
+    return client.post('/api/reviews/', {'item': item.id, 'rating': rating, 'comment': 'ok'})
+
+
+def test_item_and_seller_ratings_follow_review_writes(item_factory, user_factory):
+    seller = user_factory()
+    a, b = item_factory(seller=seller), item_factory(seller=seller)
+    alice, bob = client_for(user_factory()), client_for(user_factory())
+
+    first = review(alice, a, 5).data['id']
+    review(bob, a, 2)
+    review(alice, b, 4)
+    a.refresh_from_db()
+    assert (a.rating_sum, a.rating_count, a.rating_avg) == (7, 2, 3.5)
+    assert a.rating_histogram == {1: 0, 2: 1, 3: 0, 4: 0, 5: 1}
+    seller.refresh_from_db()
+    assert (seller.rating_count, seller.rating_avg) == (3, 11 / 3)
+
+    assert alice.patch(f'/api/reviews/{first}/', {'rating': 3}).status_code == 200
+    a.refresh_from_db()
+    assert (a.rating_avg, a.rating_5, a.rating_3) == (2.5, 0, 1)
+
+    assert alice.delete(f'/api/reviews/{first}/').status_code == 204
+    bob_review = a.reviews.get().id
+    assert bob.delete(f'/api/reviews/{bob_review}/').status_code == 204
+    a.refresh_from_db()
+    assert (a.rating_sum, a.rating_count, a.rating_avg) == (0, 0, None)
+    seller.refresh_from_db()
+    assert (seller.rating_sum, seller.rating_count, seller.rating_avg) == (4, 1, 4.0)
+
+
+def test_only_the_reviewer_can_change_a_review(item_factory, user_factory):
+    item = item_factory()
+    review_id = review(client_for(user_factory()), item, 5).data['id']
+    other = client_for(user_factory())
+    assert other.patch(f'/api/reviews/{review_id}/', {'rating': 1}).status_code == 403
+    assert other.delete(f'/api/reviews/{review_id}/').status_code == 403
+    assert Item.objects.get(id=item.id).rating_avg == 5.0
+
+
+def test_stale_saves_keep_the_totals(item_factory, user_factory):
+    item = item_factory()
+    seller = CustomUser.objects.get(id=item.seller_id)
+    review(client_for(user_factory()), item, 4)
+
+    item.title = 'Renamed'
+    item.save()
+    seller.bio = 'Hi'
+    seller.save()
+    assert Item.objects.get(id=item.id).rating_count == 1
+    assert CustomUser.objects.get(id=seller.id).rating_count == 1
+
+
+def test_items_sort_by_stored_rating_without_reading_reviews(api_client, item_factory, user_factory):
+    low, unrated, high = item_factory(), item_factory(), item_factory()
+    review(client_for(user_factory()), low, 2)
+    review(client_for(user_factory()), high, 5)
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = api_client.get('/api/items/?sort=rating')
+    assert not any('core_review' in q['sql'] for q in ctx.captured_queries)
+    assert [row['id'] for row in res.data['results']] == [high.id, low.id, unrated.id]
+    assert res.data['results'][0]['average_rating'] == 5.0
+    assert res.data['results'][0]['seller']['seller_reviews_count'] == 1
+
+
+def test_review_list_needs_an_item_and_pages_by_cursor(api_client, item_factory, user_factory,
+                                                       django_assert_max_num_queries):
+    item, other = item_factory(), item_factory()
+    for _ in range(22):
+        review(client_for(user_factory()), item, 4)
+    review(client_for(user_factory()), other, 1)
+
+    assert api_client.get('/api/reviews/').status_code == 400
+    assert api_client.get('/api/reviews/?item=999999').status_code == 404
+
+    with django_assert_max_num_queries(2):
+        first = api_client.get(f'/api/reviews/?item={item.id}')
+    assert len(first.data['results']) == 20
+    assert set(first.data['results'][0]['reviewer']) == {'id', 'username', 'profile_picture', 'eco_tier'}
+    assert first.data['rating'] == {'average': 4.0, 'count': 22, 'histogram': {1: 0, 2: 0, 3: 0, 4: 22, 5: 0}}
+
+    rest = api_client.get(first.data['next'])
+    assert len(rest.data['results']) == 2 and rest.data['next'] is None
+    assert {r['item'] for r in first.data['results'] + rest.data['results']} == {item.id}
+
+
+def test_first_page_is_cached_until_a_review_write(api_client, item_factory, user_factory,
+                                                  django_assert_num_queries, django_capture_on_commit_callbacks):
+    item = item_factory()
+    alice = client_for(user_factory())
+    review_id = review(alice, item, 5).data['id']
+    api_client.get(f'/api/reviews/?item={item.id}')
+
+    with django_assert_num_queries(0):
+        cached = api_client.get(f'/api/reviews/?item={item.id}')
+    assert cached.data['rating']['count'] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        alice.patch(f'/api/reviews/{review_id}/', {'comment': 'changed my mind'})
+    assert api_client.get(f'/api/reviews/?item={item.id}').data['results'][0]['comment'] == 'changed my mind'
+    with django_capture_on_commit_callbacks(execute=True):
+        review(client_for(user_factory()), item, 1)
+    assert api_client.get(f'/api/reviews/?item={item.id}').data['rating']['count'] == 2
+
+
+def test_cascaded_review_deletes_take_the_ratings_off(item_factory, user_factory):
+    seller = user_factory()
+    kept, doomed = item_factory(seller=seller), item_factory(seller=seller)
+    reviewer, critic = user_factory(), client_for(user_factory())
+    review(client_for(reviewer), kept, 5)
+    review(critic, kept, 1)
+    review(critic, doomed, 3)
+
+    doomed.delete()
+    seller.refresh_from_db()
+    assert (seller.rating_sum, seller.rating_count) == (6, 2)
+
+    reviewer.delete()
+    kept.refresh_from_db()
+    seller.refresh_from_db()
+    assert (kept.rating_sum, kept.rating_count, kept.rating_avg, kept.rating_5) == (1, 1, 1.0, 0)
+    assert (seller.rating_sum, seller.rating_count, seller.rating_avg) == (1, 1, 1.0)
+
+
+def test_a_page_read_before_a_write_is_never_served_after_it(api_client, item_factory):
+    item = item_factory()
+    version, page = ratings.cached_first_page(item.id)
+    assert page is None
+    ratings.forget_first_page(item.id)  # a review write commits mid-read
+    ratings.cache_first_page(item.id, version, {'stale': True})
+    assert ratings.cached_first_page(item.id)[1] is None
+
+    api_client.get(f'/api/reviews/?item=00{item.id}')
+    assert ratings.cached_first_page(item.id)[1]['rating']['count'] == 0
+    assert api_client.get('/api/reviews/?item=²').status_code == 400
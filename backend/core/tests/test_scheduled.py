@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import call_command
+from core import scheduled
+
+pytestmark = pytest.mark.django_db
+
+
+def test_due_commands_by_minute():
+    assert scheduled.due(datetime(2026, 1, 1, 0, 0, tzinfo=timezone.utc)) == [c for c, _ in scheduled.SCHEDULE]
+    assert scheduled.due(datetime(2026, 1, 1, 14, 35, tzinfo=timezone.utc)) == [
+        'process_stripe_events', 'advance_drops', 'build_feed_candidates']
+    assert scheduled.due(datetime(2026, 1, 1, 14, 36, tzinfo=timezone.utc)) == [
+        'process_stripe_events', 'advance_drops']
+
+
+def test_cron_endpoint_needs_the_secret(api_client, settings, monkeypatch):
+    calls = []
+    monkeypatch.setattr(scheduled, 'call_command', lambda command, **kwargs: calls.append(command))
+
+    settings.CRON_SECRET = ''
+    assert api_client.post('/api/cron/', HTTP_X_CRON_SECRET='').status_code == 404
+    settings.CRON_SECRET = 's3cret'
+    assert api_client.post('/api/cron/', HTTP_X_CRON_SECRET='wrong').status_code == 404
+    assert calls == []
+
+    res = api_client.post('/api/cron/', HTTP_X_CRON_SECRET='s3cret')
+    assert res.status_code == 200
+    assert res.data['ran'] == calls and 'process_stripe_events' in calls
+
+
+def test_a_failing_command_does_not_stop_the_rest(monkeypatch):
+    def flaky(command, **kwargs):
+        if command == 'process_stripe_events':
+            raise RuntimeError('boom')
+    monkeypatch.setattr(scheduled, 'call_command', flaky)
+
+    ran, failed = scheduled.run_due(datetime(2026, 1, 1, 14, 36, tzinfo=timezone.utc))
+    assert (ran, failed) == (['advance_drops'], ['process_stripe_events'])
+
+
+def test_run_scheduled_runs_every_real_command_at_midnight(monkeypatch):
+    monkeypatch.setattr('core.management.commands.run_scheduled.timezone.now',
+                        lambda: datetime(2026, 1, 1, tzinfo=timezone.utc))
+    call_command('run_scheduled')
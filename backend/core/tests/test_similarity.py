@@ -0,0 +1,69 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.similarity_index import get_similarity_index, price_bucket
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def index(settings, tmp_path):
+    settings.SIMILARITY_INDEX_DIR = str(tmp_path / 'similarity')
+    return get_similarity_index()
+
+
+def test_only_the_build_writes_the_index(api_client, index, item_factory):
+    jacket = item_factory(title='Blue denim jacket', description='Levis trucker jacket', size='M')
+    twin = item_factory(title='Denim jacket', description='Classic blue trucker', size='M')
+    item_factory(title='Silk scarf', description='Floral print', size='OS', price='90.00')
+    assert not index.exists()
+
+    call_command('build_similarity_index')
+    assert index.similar(jacket.id, k=1) == [twin.id]
+    assert not index.vectors.flags.writeable
+
+    late = item_factory(title='Denim trucker jacket', size='M')
+    assert index.similar(late.id) is None
+    assert api_client.get(f'/api/items/{late.id}/similar/').data == []
+
+    twin.is_sold = True
+    twin.save()
+    assert index.similar(jacket.id, k=1) == [twin.id]  # unchanged until the next build
+    assert api_client.get(f'/api/items/{jacket.id}/similar/?k=1').data == []
+
+    call_command('build_similarity_index')
+    assert index.similar(jacket.id, k=1) == [late.id]
+    assert index.similar(twin.id) is not None  # sold items can still be queried from
+
+
+def test_price_buckets_are_log_scale():
+    assert price_bucket(400) == price_bucket(450)
+    assert price_bucket(400) != price_bucket(4000)
+
+
+def test_similar_endpoint_only_fetches_results(api_client, index, item_factory):
+    tee = item_factory(title='Band tee', description='Black cotton band tee')
+    other = item_factory(title='Black band tee', description='Cotton tour tee')
+    call_command('build_similarity_index')
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = api_client.get(f'/api/items/{tee.id}/similar/?k=5')
+    assert res.status_code == 200
+    assert [i['id'] for i in res.data] == [other.id]
+    item_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "core_item"' in q['sql']]
+    assert len(item_queries) == 1 and ' IN ' in item_queries[0]
+
+    assert api_client.get('/api/items/999999/similar/').status_code == 404
+
+
+def test_similar_endpoint_never_builds_a_missing_index(api_client, index, item_factory, settings, tmp_path):
+    a = item_factory(title='Leather boots')
+    item_factory(title='Leather ankle boots')
+    settings.SIMILARITY_INDEX_DIR = str(tmp_path / 'fresh')
+
+    assert api_client.get(f'/api/items/{a.id}/similar/').status_code == 503
+    assert not get_similarity_index().exists()
+
+    settings.SIMILARITY_INDEX_DIR = ''
+    assert api_client.get(f'/api/items/{a.id}/similar/').status_code == 503
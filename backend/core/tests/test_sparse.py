@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from chat.models import Conversation
+from core.models import Item, ItemImage, Review, Wishlist
+from notifications.models import Notification
+
+pytestmark = pytest.mark.django_db
+
+
+def item_selects(ctx):
+    return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and 'FROM "core_item"' in q['sql']]
+
+
+def test_fields_trim_the_payload_and_the_query(api_client, item_factory):
+    item = item_factory()
+    ItemImage.objects.create(item=item, image='item_images/a.jpg')
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = api_client.get('/api/items/?fields=id,title,seller.username')
+    assert res.data['results'] == [{'id': item.id, 'title': item.title, 'seller': {'username': item.seller.username}}]
+    select = item_selects(ctx)[-1]
+    assert '"core_customuser"."username"' in select
+    assert '"core_item"."description"' not in select and '"core_customuser"."bio"' not in select
+    assert not any('core_itemimage' in q['sql'] or 'core_like' in q['sql'] for q in ctx.captured_queries)
+
+    res = api_client.get('/api/items/?fields=id,images.image')
+    assert set(res.data['results'][0]) == {'id', 'images'}
+    assert set(res.data['results'][0]['images'][0]) == {'image'}
+
+
+def test_expression_ordering_keeps_working(api_client, item_factory):
+    low, high = item_factory(), item_factory()
+    item_factory()
+    Item.objects.filter(id=low.id).update(rating_avg=2.0, rating_count=1)
+    Item.objects.filter(id=high.id).update(rating_avg=4.5, rating_count=2)
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = api_client.get('/api/items/?sort=rating&fields=id')
+    assert res.status_code == 200
+    assert [r['id'] for r in res.data['results']][:2] == [high.id, low.id]
+    select = item_selects(ctx)[-1]
+    assert '"core_item"."rating_avg"' in select and '"core_item"."description"' not in select
+
+
+def test_full_shape_without_params(api_client, item_factory):
+    item_factory()
+    row = api_client.get('/api/items/').data['results'][0]
+    assert {'description', 'is_liked', 'rating_histogram'} <= set(row)
+    assert {'followers_count', 'social_links'} <= set(row['seller'])
+
+
+def test_method_fields_keep_their_sources(auth_client, item_factory):
+    item = item_factory()
+    Wishlist.objects.create(user=auth_client.user, item=item)
+    res = auth_client.get('/api/wishlist/?fields=id,item.view_count,item.rating_histogram,item.seller.email')
+    row = res.data['results'][0]
+    assert set(row['item']) == {'view_count', 'rating_histogram', 'seller'}
+    assert row['item']['rating_histogram'] == {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0}
+    assert row['item']['seller'] == {'email': None}
+
+
+def test_expand_nests_related_objects(auth_client, item_factory, user_factory, django_assert_num_queries):
+    sender = user_factory()
+    for _ in range(3):
+        Notification.objects.create(recipient=auth_client.user, sender=sender,
+                                    notification_type='like', message='liked your item')
+    assert 'sender' not in auth_client.get('/api/notifications/').data['results'][0]
+
+    with django_assert_num_queries(2):  # ETag aggregate + one joined page
+        res = auth_client.get('/api/notifications/?expand=sender')
+    assert res.data['results'][0]['sender']['username'] == sender.username
+
+    item = item_factory()
+    Review.objects.create(item=item, reviewer=sender, rating=4, comment='nice')
+    res = auth_client.get(f'/api/reviews/?item={item.id}&expand=item&fields=id,item.title')
+    assert res.data['results'] == [{'id': Review.objects.get().id, 'item': {'title': item.title}}]
+
+    conversation = Conversation.objects.create(item=item)
+    conversation.participants.add(auth_client.user, sender)
+    res = auth_client.get('/api/conversations/?fields=id,item.title,participants.username')
+    assert res.data['results'][0]['item'] == {'title': item.title}
+    assert {p['username'] for p in res.data['results'][0]['participants']} == {sender.username, 'authuser'}
+
+
+def test_nested_joins_the_fields_leave_out_are_dropped(auth_client, item_factory):
+    item = item_factory()
+    Wishlist.objects.create(user=auth_client.user, item=item)
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = auth_client.get('/api/wishlist/?fields=item.title')
+    assert res.status_code == 200
+    assert res.data['results'] == [{'item': {'title': item.title}}]
+    assert not any('core_customuser"."username' in q['sql'] for q in ctx.captured_queries if 'core_wishlist' in q['sql'])
+
+    res = auth_client.get('/api/wishlist/?fields=item.title,item.seller.username')
+    assert res.data['results'] == [{'item': {'title': item.title, 'seller': {'username': item.seller.username}}}]
+
+
+def test_writes_ignore_fields(auth_client):
+    res = auth_client.post('/api/items/?fields=id', {
+        'title': 'Denim', 'description': 'Blue', 'price': '10.00', 'size': 'M', 'condition': 'GOOD'})
+    assert res.status_code == 201
+    assert res.data['title'] == 'Denim'
@@ -0,0 +1,56 @@
+import json
+import threading
+
+import pytest
+import stripe
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.fake_stripe import FakeStripe, sign
+from core.models import ItemImage, Order
+from core.stripe_service import StripeService
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch):
+    fake = FakeStripe()
+    server = fake.serve(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    monkeypatch.setattr(stripe, 'api_base', f'http://{host}:{port}')
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def test_checkout_runs_against_fake_stripe_with_one_image_query(auth_client, item_factory, fake_stripe):
+    items = [item_factory() for _ in range(5)]
+    for item in items:
+        ItemImage.objects.create(item=item, image=f'item_images/{item.id}.jpg')
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = auth_client.post('/api/create-checkout-session/', {'item_ids': [i.id for i in items]}, format='json')
+    assert res.status_code == 200
+    assert res.data['sessionId'].startswith('cs_fake_')
+    assert len([q for q in ctx.captured_queries if 'core_itemimage' in q['sql']]) == 1
+
+    session = fake_stripe.sessions[res.data['sessionId']]
+    assert session['metadata']['item_ids'] == ','.join(str(i.id) for i in items)
+    assert Order.objects.filter(stripe_payment_intent=session['id']).count() == 5
+
+    StripeService.expire_checkout_session(session['id'])
+    assert session['status'] == 'expired'
+
+
+def test_stripe_client_is_pooled_with_timeouts(settings):
+    client = stripe.default_http_client
+    assert isinstance(client, stripe.RequestsClient)
+    assert client._timeout == (settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT)
+
+
+def test_fake_webhooks_pass_real_signature_verification():
+    payload = json.dumps({'id': 'evt_fake_1', 'object': 'event', 'type': 'checkout.session.completed',
+                          'data': {'object': {'id': 'cs_fake_1'}}}).encode()
+    event = StripeService.construct_webhook_event(payload, sign(payload, 'whsec_dummy'), 'whsec_dummy')
+    assert event['data']['object']['id'] == 'cs_fake_1'
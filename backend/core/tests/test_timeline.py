@@ -0,0 +1,69 @@
+import pytest
+from core.models import Follow, TimelineEntry
+
+pytestmark = pytest.mark.django_db
+
+
+def page(client, url='/api/items/following/?limit=2'):
+    res = client.get(url)
+    assert res.status_code == 200
+    return [i['id'] for i in res.data['results']], res.data['next']
+
+
+def test_new_listing_fans_out_to_followers(auth_client, item_factory, user_factory):
+    seller = user_factory(username='seller')
+    Follow.objects.create(follower=auth_client.user, following=seller)
+    first, second, third = (item_factory(seller=seller) for _ in range(3))
+    item_factory()  # not followed
+
+    assert TimelineEntry.objects.filter(user=auth_client.user).count() == 3
+    ids, next_url = page(auth_client)
+    assert ids == [third.id, second.id]
+    ids, next_url = page(auth_client, next_url)
+    assert ids == [first.id]
+    assert next_url is None
+
+
+def test_follow_backfills_and_unfollow_clears(auth_client, item_factory, user_factory):
+    seller = user_factory(username='seller')
+    old = item_factory(seller=seller)
+
+    auth_client.post('/api/users/seller/follow/')
+    assert page(auth_client)[0] == [old.id]
+
+    auth_client.delete('/api/users/seller/unfollow/')
+    assert page(auth_client)[0] == []
+
+
+def test_large_seller_is_read_on_demand(auth_client, item_factory, user_factory, settings):
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 1
+    star = user_factory(username='star')
+    Follow.objects.create(follower=auth_client.user, following=star)
+    Follow.objects.create(follower=user_factory(), following=star)
+
+    pushed_before = TimelineEntry.objects.count()
+    listing = item_factory(seller=star)
+    star.refresh_from_db()
+
+    assert star.fanout_on_read is True
+    assert TimelineEntry.objects.count() == pushed_before
+    assert page(auth_client)[0] == [listing.id]
+
+
+def test_migration_backfills_existing_follows(auth_client, item_factory, user_factory, settings):
+    from importlib import import_module
+    from django.apps import apps
+    backfill = import_module('core.migrations.0013_timelineentry').backfill_timelines
+    seller, big = user_factory(), user_factory()
+    items = [item_factory(seller=seller) for _ in range(3)]
+    pulled = item_factory(seller=big)
+    Follow.objects.create(follower=auth_client.user, following=seller)
+    for fan in [auth_client.user, user_factory(), user_factory()]:
+        Follow.objects.create(follower=fan, following=big)
+    TimelineEntry.objects.all().delete()
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 2
+
+    backfill(apps, None)
+    assert page(auth_client, '/api/items/following/')[0] == [pulled.id] + [i.id for i in reversed(items)]
+    big.refresh_from_db()
+    assert big.fanout_on_read and not TimelineEntry.objects.filter(seller=big).exists()
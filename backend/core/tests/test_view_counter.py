@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models import Item
+from core.view_counter import ViewCounter, view_counter, viewer_key
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_counter(settings):
+    settings.VIEW_COUNT_FLUSH_SECONDS = 3600
+    caches['views'].clear()
+    view_counter.flush()
+
+
+def test_detail_views_are_buffered_deduped_and_exposed(auth_client, item_factory):
+    item = item_factory()
+    api_client = APIClient()
+
+    assert api_client.get(f'/api/items/{item.id}/').data['view_count'] == 1
+    api_client.get(f'/api/items/{item.id}/')  # same anonymous viewer, deduped
+    assert auth_client.get(f'/api/items/{item.id}/').data['view_count'] == 2
+    item.refresh_from_db()
+    assert item.view_count == 0  # nothing written yet
+
+    view_counter.flush()
+    item.refresh_from_db()
+    assert item.view_count == 2
+
+
+def test_sellers_own_views_do_not_count(auth_client, item_factory):
+    item = item_factory(seller=auth_client.user)
+    assert auth_client.get(f'/api/items/{item.id}/').data['view_count'] == 0
+
+
+def test_flush_is_one_update_for_many_views(item_factory, settings):
+    settings.VIEW_COUNT_MAX_PENDING = 10 ** 6
+    items = [item_factory() for _ in range(5)]
+    counter = ViewCounter()
+
+    def viewer(t):
+        for n in range(500):
+            counter.record(items[n % 5].id, f'u{t}-{n}')
+
+    threads = [threading.Thread(target=viewer, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert counter.flush() == 5
+    assert len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "core_item"')]) == 1
+    assert list(Item.objects.values_list('view_count', flat=True)) == [800] * 5
+
+
+def test_flush_triggers_on_interval(item_factory, settings):
+    settings.VIEW_COUNT_FLUSH_SECONDS = 0
+    item = item_factory()
+    ViewCounter().record(item.id, 'u1')
+    item.refresh_from_db()
+    assert item.view_count == 1
+
+
+def test_dedupe_window_survives_many_viewers(item_factory):
+    item = item_factory()
+    counter = ViewCounter()
+    assert counter.record(item.id, 'u0')
+    for n in range(1, 1000):
+        counter.record(item.id, f'u{n}')
+    assert not counter.record(item.id, 'u0')
+    counter.flush()
+
+
+def test_anonymous_viewer_is_the_ip_the_proxy_saw(rf, settings):
+    settings.TRUSTED_PROXY_HOPS = 1
+    request = rf.get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+    request.user = AnonymousUser()
+    assert viewer_key(request) == 'a203.0.113.7'
+
+    settings.TRUSTED_PROXY_HOPS = 2
+    assert viewer_key(request) == 'a1.1.1.1'
+    request.META.pop('HTTP_X_FORWARDED_FOR')
+    assert viewer_key(request) == 'a10.0.0.1'
+
+
+def test_quiet_buffer_is_flushed_by_a_timer(settings, monkeypatch):
+    settings.VIEW_COUNT_BACKGROUND_FLUSH = True
+    settings.VIEW_COUNT_FLUSH_SECONDS = 0.01
+    counter = ViewCounter()
+    counter._last_flush = time.monotonic() + 60  # not due on the next record
+    flushed = threading.Event()
+    monkeypatch.setattr(counter, 'flush', flushed.set)
+
+    counter.record(1, 'u1')
+    assert flushed.wait(5)
@@ -0,0 +1,128 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.models import ClosetItem
+from core.wardrobe_service import WardrobeService, color_embedding, harmony_scores, infer_category
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def png():
+    buf = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buf, 'PNG')
+    return SimpleUploadedFile('c.png', buf.getvalue(), content_type='image/png')
+
+
+@pytest.fixture
+def closet_factory(db):
+    def make(user, category, color=''):
+        image = png()
+        return ClosetItem.objects.create(user=user, image=image, category=category, color=color)
+
+    return make
+
+
+def test_color_embedding_is_precomputed_on_save(user_factory, closet_factory):
+    piece = closet_factory(user_factory(), 'TOP', 'Navy blue')
+    assert piece.color_embedding == color_embedding('navy')
+    assert ClosetItem.objects.get(pk=piece.pk).color_embedding == color_embedding('navy')
+
+    assert color_embedding('chartreuse-ish') is None
+
+
+def test_harmony_prefers_complement_over_clash():
+    blue = np.array(color_embedding('blue'))
+    candidates = np.array([color_embedding('orange'), color_embedding('green'), color_embedding('black')])
+    orange, green, black = harmony_scores(blue, candidates)
+    assert orange > green
+    assert black > green  # neutrals go with anything
+
+
+def test_infer_category_from_title():
+    assert infer_category('Vintage Levi 501 jeans') == 'BOTTOM'
+    assert infer_category('Nike Windbreaker') == 'OUTERWEAR'
+    assert infer_category('Mystery box') is None
+
+
+def test_outfit_is_one_per_category_excluding_target_category(user_factory, item_factory, closet_factory):
+    owner = user_factory()
+    closet_factory(owner, 'TOP', 'white')
+    closet_factory(owner, 'BOTTOM', 'green')
+    best_bottom = closet_factory(owner, 'BOTTOM', 'orange')
+    closet_factory(owner, 'SHOES', 'black')
+    target = item_factory(title='Blue denim shirt', description='Cotton shirt')
+
+    with CaptureQueriesContext(connection) as ctx:
+        outfit = WardrobeService.generate_outfit(target, ClosetItem.objects.filter(user=owner))
+
+    assert len(ctx.captured_queries) == 1
+    assert [c.category for c in outfit] == ['BOTTOM', 'SHOES']
+    assert outfit[0] == best_bottom
+
+
+def test_match_outfit_endpoint(auth_client, item_factory, closet_factory):
+    closet_factory(auth_client.user, 'SHOES', 'white')
+    item = item_factory(title='Red hoodie')
+
+    res = auth_client.get(f'/api/items/{item.id}/match_outfit/')
+    assert res.status_code == 200
+    assert [c['category'] for c in res.data] == ['SHOES']
+
+
+def test_closet_matrix_is_cached_and_invalidated_by_closet_edits(auth_client, item_factory):
+    from core.wardrobe_service import closet_cache
+    closet_cache.clear()
+    item = item_factory(title='Red hoodie')
+    created = auth_client.post('/api/closet/', {'image': png(), 'category': 'SHOES', 'color': 'white'})
+    assert created.status_code == 201
+
+    assert auth_client.get(f'/api/items/{item.id}/match_outfit/').data[0]['color'] == 'white'
+    assert closet_cache.get(auth_client.user.id).ids.tolist() == [created.data['id']]
+
+    auth_client.patch(f"/api/closet/{created.data['id']}/", {'color': 'black'})
+    assert auth_client.get(f'/api/items/{item.id}/match_outfit/').data[0]['color'] == 'black'
+
+    auth_client.delete(f"/api/closet/{created.data['id']}/")
+    assert auth_client.get(f'/api/items/{item.id}/match_outfit/').data == []
+
+
+def test_cached_match_reads_only_the_winners(auth_client, item_factory, closet_factory):
+    from core.wardrobe_service import closet_cache
+    closet_cache.clear()
+    for color in ('white', 'black', 'navy', 'olive'):
+        closet_factory(auth_client.user, 'BOTTOM', color)
+    item = item_factory(title='Red hoodie')
+    auth_client.get(f'/api/items/{item.id}/match_outfit/')  # warm
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = auth_client.get(f'/api/items/{item.id}/match_outfit/')
+    assert len(res.data) == 1
+    assert not any('core_closetitem' in q['sql'] and 'IN' not in q['sql'] for q in ctx.captured_queries)
+
+
+def test_closet_cache_skips_matrices_that_raced_an_invalidation_and_expires(auth_client, closet_factory):
+    from core.wardrobe_service import ClosetMatrixCache
+    cache = ClosetMatrixCache(max_users=10, ttl=60)
+    stale = cache.get(auth_client.user.id)
+    cache.invalidate(auth_client.user.id)
+    cache.put(auth_client.user.id, stale, generation=0)  # read began before the invalidation
+    assert len(cache) == 0
+
+    closet_factory(auth_client.user, 'SHOES', 'white')
+    assert len(cache.get(auth_client.user.id).ids) == 1
+    assert len(cache) == 1
+
+    expiring = ClosetMatrixCache(max_users=10, ttl=0)
+    expiring.get(auth_client.user.id)
+    closet_factory(auth_client.user, 'BOTTOM', 'black')  # no signal reaches this instance
+    assert len(expiring.get(auth_client.user.id).ids) == 2
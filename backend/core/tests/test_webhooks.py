@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from core import payments
+from core.models import Order, StripeEvent
+from core.stripe_service import StripeService
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def trust_signatures(monkeypatch):
+    monkeypatch.setattr(StripeService, 'construct_webhook_event',
+                        staticmethod(lambda payload, sig, secret: json.loads(payload)))
+
+
+def post_event(client, event_id, type, obj):
+    event = {'id': event_id, 'type': type, 'created': 1760000000, 'data': {'object': obj}}
+    return client.post('/api/stripe-webhook/', event, format='json', HTTP_STRIPE_SIGNATURE='t=1,v1=x')
+
+
+def test_redelivered_event_is_stored_and_applied_once(api_client, item_factory, user_factory):
+    item = item_factory()
+    buyer = user_factory(username='buyer')
+    Order.objects.create(buyer=buyer, item=item, status='PENDING', total_amount=item.price,
+                         stripe_payment_intent='cs_1')
+
+    for _ in range(3):
+        assert post_event(api_client, 'evt_1', 'checkout.session.completed', {'id': 'cs_1'}).status_code == 200
+
+    event = StripeEvent.objects.get()
+    assert event.status == 'PROCESSED' and event.attempts == 1
+    assert event.payload['data']['object']['id'] == 'cs_1'
+    buyer.refresh_from_db()
+    assert buyer.eco_points == 20
+
+
+def test_unhandled_types_are_still_recorded(api_client):
+    assert post_event(api_client, 'evt_2', 'payment_intent.succeeded', {'id': 'pi_1'}).status_code == 200
+    assert StripeEvent.objects.get(event_id='evt_2').status == 'PROCESSED'
+
+
+def test_failures_retry_then_dead_letter_then_replay(api_client, settings, monkeypatch):
+    settings.STRIPE_EVENT_MAX_ATTEMPTS = 2
+
+    def broken(session):
+        raise RuntimeError('db hiccup')
+    monkeypatch.setitem(payments.HANDLERS, 'checkout.session.completed', broken)
+
+    post_event(api_client, 'evt_3', 'checkout.session.completed', {'id': 'cs_3'})
+    event = StripeEvent.objects.get(event_id='evt_3')
+    assert event.status == 'FAILED' and event.attempts == 1
+    assert 'db hiccup' in event.last_error
+    assert payments.process_due() == 0  # not due yet
+
+    StripeEvent.objects.filter(pk=event.pk).update(next_attempt_at=timezone.now())
+    call_command('process_stripe_events')
+    event.refresh_from_db()
+    assert event.status == 'DEAD' and event.next_attempt_at is None
+    assert payments.process_due() == 0
+
+    monkeypatch.setitem(payments.HANDLERS, 'checkout.session.completed', lambda session: None)
+    call_command('replay_stripe_events', '--status', 'DEAD')
+    event.refresh_from_db()
+    assert event.status == 'PROCESSED' and event.last_error == ''
+
+
+def test_purchase_bookkeeping_commits_with_the_event(item_factory, user_factory, settings, monkeypatch,
+                                                     django_capture_on_commit_callbacks):
+    settings.TASKS_EAGER = False
+    sent = []
+    monkeypatch.setattr('notifications.signals.send_order_emails', sent.append)
+    monkeypatch.setattr('core.tasks._executor.submit', lambda run, fn, args, kwargs: fn(*args, **kwargs))
+    item = item_factory()
+    buyer = user_factory(username='buyer')
+    Order.objects.create(buyer=buyer, item=item, status='PENDING', total_amount=item.price,
+                         stripe_payment_intent='cs_9')
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        payments.handle_checkout_completion({'id': 'cs_9'})
+        buyer.refresh_from_db()
+        item.seller.refresh_from_db()
+        assert (buyer.eco_points, buyer.items_bought_count, item.seller.items_sold_count) == (20, 1, 1)
+        assert sent == []  # emails wait for the commit
+
+    for callback in callbacks:
+        callback()
+    assert len(sent) == 1
@@ -0,0 +1,67 @@
+"""
+Following feed: new listings from the sellers a user follows.
+
+Hybrid fan-out. When a seller with at most FEED_FANOUT_MAX_FOLLOWERS followers
+lists an item, one TimelineEntry per follower is bulk-inserted (fan-out on
+write), so reading the feed is a single index range scan on the follower's
+inbox. Sellers above the threshold are flagged fanout_on_read and their
+listings are pulled at read time instead, which caps write amplification to
+one bulk insert of bounded size per listing.
+"""
+from django.conf import settings
+
+from .models import CustomUser, Follow, Item, TimelineEntry
+
+BACKFILL_ON_FOLLOW = 20
+
+
+def fan_out(item):
+    """Push a newly created item into its seller's followers' inboxes."""
+    seller = item.seller
+    if seller.fanout_on_read:
+        return
+    follower_ids = list(
+        Follow.objects.filter(following_id=seller.id)
+        .values_list('follower_id', flat=True)[:settings.FEED_FANOUT_MAX_FOLLOWERS + 1]
+    )
+    if len(follower_ids) > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        CustomUser.objects.filter(id=seller.id).update(fanout_on_read=True)
+        seller.fanout_on_read = True
+        return
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=uid, item_id=item.id, seller_id=seller.id) for uid in follower_ids],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_follow(follow):
+    """A new follow sees the seller's recent listings straight away."""
+    if follow.following.fanout_on_read:
+        return
+    item_ids = Item.objects.filter(seller_id=follow.following_id).order_by('-id').values_list(
+        'id', flat=True)[:BACKFILL_ON_FOLLOW]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=follow.follower_id, item_id=i, seller_id=follow.following_id) for i in item_ids],
+        ignore_conflicts=True,
+    )
+
+
+def drop_follow(follower_id, seller_id):
+    TimelineEntry.objects.filter(user_id=follower_id, seller_id=seller_id).delete()
+
+
+def following_item_ids(user, before=None, limit=20):
+    """Item ids for one page of the following feed, newest first, keyset-paginated
+    on item id: ids strictly below `before`."""
+    inbox = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        inbox = inbox.filter(item_id__lt=before)
+    ids = set(inbox.order_by('-item_id').values_list('item_id', flat=True)[:limit])
+
+    pulled_sellers = CustomUser.objects.filter(followers__follower=user, fanout_on_read=True)
+    pulled = Item.objects.filter(seller__in=pulled_sellers)
+    if before is not None:
+        pulled = pulled.filter(id__lt=before)
+    ids.update(pulled.order_by('-id').values_list('id', flat=True)[:limit])
+
+    return sorted(ids, reverse=True)[:limit]
@@ -0,0 +1,44 @@
+"""
+Trending items: likes and wishlist adds weighted by an exponential time decay,
+
+    score = sum(weight * 2 ** (-age_hours / TRENDING_HALF_LIFE_HOURS))
+
+recomputed in bulk by `manage.py compute_trending` and stored in the indexed
+Item.trending_score column, so serving the trending list is one index scan.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Item, Like, Wishlist
+
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW = timedelta(days=7)  # events older than this contribute < 1%
+EVENT_WEIGHTS = {'like': 1.0, 'wishlist': 2.0}
+
+
+def compute_trending(now=None):
+    """Recompute trending_score for every item with recent engagement and zero
+    out the ones that dropped out of the window. Returns the number scored."""
+    now = now or timezone.now()
+    since = now - TRENDING_WINDOW
+    scores = defaultdict(float)
+    events = (
+        ('like', Like.objects.filter(created_at__gte=since).values_list('item_id', 'created_at')),
+        ('wishlist', Wishlist.objects.filter(added_at__gte=since).values_list('item_id', 'added_at')),
+    )
+    for kind, rows in events:
+        weight = EVENT_WEIGHTS[kind]
+        for item_id, at in rows.iterator(chunk_size=5000):
+            age_hours = (now - at).total_seconds() / 3600
+            scores[item_id] += weight * 2 ** (-age_hours / TRENDING_HALF_LIFE_HOURS)
+
+    with transaction.atomic():
+        Item.objects.filter(trending_score__gt=0).exclude(id__in=list(scores)).update(trending_score=0.0)
+        Item.objects.bulk_update(
+            [Item(id=item_id, trending_score=round(score, 6)) for item_id, score in scores.items()],
+            ['trending_score'], batch_size=1000,
+        )
+    return len(scores)
@@ -0,0 +1,127 @@
+"""
+Buffered item view counting.
+
+Views are tallied in a per-process buffer and written back at most every
+VIEW_COUNT_FLUSH_SECONDS (or sooner if VIEW_COUNT_MAX_PENDING distinct items
+are waiting) as a single
+
+    UPDATE core_item SET view_count = view_count + CASE id WHEN .. THEN .. END
+    WHERE id IN (..)
+
+so DB writes are bounded by the flush rate, not the view rate. The same flush
+adds the views to the sellers' daily rollups (core/analytics.py). A background
+timer flushes a buffer that no later view arrives to flush, and the buffer is
+flushed again at exit.
+
+A viewer is counted once per item per VIEW_DEDUPE_SECONDS. The dedupe keys
+live in the per-process 'views' cache, sized by VIEW_DEDUPE_MAX_KEYS so the
+window isn't cut short by culling. That keeps the hot path free of network
+calls, at the cost of a viewer possibly counting once per instance. Anonymous
+viewers are keyed by the client IP the trusted proxy saw (TRUSTED_PROXY_HOPS),
+never by client-supplied X-Forwarded-For entries.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+def viewer_key(request):
+    if request.user.is_authenticated:
+        return f'u{request.user.id}'
+    return f'a{client_ip(request)}'
+
+
+def client_ip(request):
+    """The address the outermost trusted proxy saw. Each of the
+    TRUSTED_PROXY_HOPS proxies appends one X-Forwarded-For entry, so entries
+    to the left of those are whatever the client chose to send."""
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded = [p.strip() for p in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if p.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class ViewCounter:
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self.flushes = 0
+
+    def record(self, item_id, viewer):
+        """Count one view; returns False if this viewer was already counted."""
+        if not caches['views'].add(f'view:{item_id}:{viewer}', 1, settings.VIEW_DEDUPE_SECONDS):
+            return False
+        with self._lock:
+            self._pending[item_id] += 1
+            due = (len(self._pending) >= settings.VIEW_COUNT_MAX_PENDING
+                   or time.monotonic() - self._last_flush >= settings.VIEW_COUNT_FLUSH_SECONDS)
+            if not due and self._timer is None and settings.VIEW_COUNT_BACKGROUND_FLUSH:
+                self._timer = threading.Timer(settings.VIEW_COUNT_FLUSH_SECONDS, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+        return True
+
+    def _flush_in_background(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def pending(self, item_id):
+        return self._pending.get(item_id, 0)
+
+    def flush(self):
+        """Write all buffered increments in one UPDATE; returns rows touched."""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+
+        from .models import Item
+        try:
+            updated = Item.objects.filter(id__in=list(batch)).update(view_count=F('view_count') + Case(
+                *[When(id=item_id, then=Value(n)) for item_id, n in batch.items()],
+                default=Value(0), output_field=PositiveIntegerField(),
+            ))
+        except Exception:
+            logger.exception('View count flush failed; keeping %d items buffered', len(batch))
+            with self._lock:
+                self._pending.update(batch)
+            return 0
+        self.flushes += 1
+        self._roll_up(batch)
+        return updated
+
+    @staticmethod
+    def _roll_up(batch):
+        from . import analytics
+        from .models import Item
+        try:
+            per_seller = Counter()
+            for item_id, seller_id in Item.objects.filter(id__in=list(batch)).values_list('id', 'seller_id'):
+                per_seller[seller_id] += batch[item_id]
+            for seller_id, n in per_seller.items():
+                analytics.bump(seller_id, views=n)
+        except Exception:
+            logger.exception('Seller view rollup failed for %d items', len(batch))
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.flush)
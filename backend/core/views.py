@@ -1,11 +1,17 @@
+import hmac
+import json
 import logging
 import os
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth import get_user_model
 from .models import Item, Like, ClosetItem, DropEvent, Follow, Order, Review, Wishlist
 from .serializers import (
@@ -13,25 +19,36 @@ from .serializers import (
     DropEventSerializer, FollowSerializer, OrderSerializer, ReviewSerializer, WishlistSerializer
 )
 from .ai_service import AIService
+from . import (
+    analytics, drop_mode, fastpath, feed_service, payments, ratings, reservations, scheduled, tasks, timeline_service,
+)
+from .similarity_index import get_similarity_index
+from .view_counter import view_counter, viewer_key
+from .wardrobe_service import WardrobeService
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
 def health_check(request):
-    """Liveness + DB connectivity probe used by the deploy workflow."""
+    """Liveness + DB connectivity probe used by the deploy workflow, with
+    connection pool stats when pooling is on."""
     from django.http import JsonResponse
     from django.db import connection
+    from .db import pool_stats
     try:
         connection.ensure_connection()
         db_status = 'connected'
     except Exception:
         db_status = 'error'
-    return JsonResponse({'status': 'ok', 'database': db_status})
+    return JsonResponse({'status': 'ok', 'database': db_status, 'pool': pool_stats()})
 
 
 from rest_framework.views import APIView
+from .pagination import NewestFirstCursorPagination
 from .security import LoginRateThrottle, RegisterRateThrottle, IsOwnerOrReadOnly
+from .conditional import CATALOGUE_VERSION_KEY, conditional, user_version_key
+from .sparse import SparseQuerysetMixin
 
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -59,14 +76,14 @@ class RegisterView(APIView):
             'access': str(refresh.access_token),
         }, status=status.HTTP_201_CREATED)
 
-class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+class LeaderboardViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all().order_by('-eco_points')
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
 
     def list(self, request, *args, **kwargs):
         # Return top 10 users
-        queryset = self.get_queryset()[:10]
+        queryset = self.filter_queryset(self.get_queryset())[:10]
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -82,17 +99,75 @@ class ClosetItemViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 class DropEventViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = DropEvent.objects.filter(is_active=True).order_by('start_time')
+    """Drops by time window: ?window=upcoming|live|ended. Without it, upcoming
+    and live drops, soonest first. `manage.py advance_drops` retires ended drops."""
+    queryset = DropEvent.objects.annotate(item_count=Count('items'))
     serializer_class = DropEventSerializer
     permission_classes = [permissions.AllowAny]
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        now = timezone.now()
+        window = self.request.query_params.get('window')
+        if window == 'ended':
+            return queryset.filter(end_time__lte=now).order_by('-start_time')
+        queryset = queryset.filter(is_active=True, end_time__gt=now)
+        if window == 'upcoming':
+            queryset = queryset.filter(start_time__gt=now)
+        elif window == 'live':
+            queryset = queryset.filter(start_time__lte=now)
+        return queryset.order_by('start_time')
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def admission(self, request, pk=None):
+        """This instance's checkout admission stats for the drop."""
+        stats = drop_mode.admission_gate.stats.get(int(pk), drop_mode.GateStats())
+        return Response(stats.as_dict())
+
+# Counters on the user row that change through UPDATEs, which send no signal
+# to bump the user's version (core/conditional.py)
+USER_STAT_COLUMNS = ('eco_points', 'eco_tier', 'co2_saved', 'water_saved', 'items_sold_count',
+                     'items_bought_count', 'rating_sum', 'rating_count')
+
+
+def user_validators(view, request, username=None, **kwargs):
+    row = User.objects.filter(username=username).values('id', *USER_STAT_COLUMNS).first()
+    return row, None, [user_version_key(row['id'])] if row else []
+
+
+def item_validators(view, request, pk=None, **kwargs):
+    if not str(pk).isdigit():
+        return None, None
+    row = Item.objects.filter(pk=pk).values(
+        'updated_at', 'likes_count', 'view_count', 'rating_sum', 'rating_count', 'is_sold', 'seller_id',
+        *(f'seller__{c}' for c in USER_STAT_COLUMNS),
+    ).first()
+    if row is None:
+        return None, None
+    # Recorded here rather than in retrieve() so a 304 still counts as a view
+    if row['seller_id'] != request.user.id:
+        view_counter.record(int(pk), viewer_key(request))
+    return row, row['updated_at'], [user_version_key(row['seller_id'])]
+
+
+def item_list_validators(view, request, *args, **kwargs):
+    stats = view.filter_queryset(view.get_queryset()).order_by().aggregate(last=Max('updated_at'), top=Max('id'))
+    return stats, stats['last'], [CATALOGUE_VERSION_KEY]
+
+
+class UserViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     lookup_field = 'username'
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     parser_classes = (JSONParser, MultiPartParser, FormParser)
 
+    @conditional(user_validators)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get', 'patch'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
         """Get or update current user profile"""
@@ -174,15 +249,32 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def dashboard_stats(self, request):
-        user = request.user
-        total_listings = Item.objects.filter(seller=user).count()
-        total_likes = Like.objects.filter(item__seller=user).count()
-        
+        """Lifetime totals and a daily series for ?start=&end= (YYYY-MM-DD,
+        default the last 30 days), read from the seller's daily rollups."""
+        raw = [request.query_params.get(k) for k in ('start', 'end')]
+        try:
+            start, end = (parse_date(value) if value else None for value in raw)
+        except ValueError:  # well-formed but impossible, e.g. 2024-13-01
+            start = end = None
+        # parse_date returns None for malformed input rather than raising
+        malformed = any(value and parsed is None for value, parsed in zip(raw, (start, end)))
+        if malformed or (start and end and start > end):
+            return Response({'error': 'start/end must be YYYY-MM-DD with start <= end'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        stats = analytics.dashboard(request.user, start, end)
+        totals = stats['totals']
         return Response({
-            'username': user.username,
-            'total_listings': total_listings,
-            'total_likes': total_likes,
-            'total_sales': 0, # Placeholder
+            'username': request.user.username,
+            'total_listings': totals['listings'],
+            'total_likes': totals['likes'],
+            'total_sales': totals['revenue'],
+            'total_orders': totals['orders'],
+            'total_views': totals['views'],
+            'co2_saved': totals['co2_saved'],
+            'water_saved': totals['water_saved'],
+            'start': stats['start'],
+            'end': stats['end'],
+            'series': stats['series'],
         })
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
@@ -203,19 +295,20 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             'MEDIA_URL': django_settings.MEDIA_URL,
         })
 
-class ItemViewSet(viewsets.ModelViewSet):
-    queryset = Item.objects.all().select_related('seller').prefetch_related(
-        'images', 'likes', 'reviews'
-    ).order_by('-created_at')
+FEATURED_COUNT = 12
+
+
+class ItemViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Item.objects.all().select_related('seller').prefetch_related('images').order_by('-created_at')
     serializer_class = ItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'description']
 
     def get_queryset(self):
-        queryset = Item.objects.all().select_related('seller').prefetch_related(
-            'images', 'likes', 'reviews'
-        ).order_by('-created_at')
+        queryset = Item.objects.all().select_related('seller').prefetch_related('images').order_by('-created_at')
+        if self.request.query_params.get('sort') == 'rating':
+            queryset = queryset.order_by(F('rating_avg').desc(nulls_last=True), '-rating_count', '-created_at')
         seller_username = self.request.query_params.get('seller_username', None)
         if seller_username is not None:
             queryset = queryset.filter(seller__username=seller_username)
@@ -224,6 +317,28 @@ class ItemViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(drops__id=drop)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Drop launch traffic: serve the pre-rendered list when it's warm
+        drop = request.query_params.get('drop')
+        if drop and not set(request.query_params) - {'drop', 'page'}:
+            rows = drop_mode.cached_items(drop)
+            if rows is not None:
+                page = self.paginate_queryset(rows)
+                return self.get_paginated_response(drop_mode.personalise(page, request.user))
+        return self.catalogue(request, *args, **kwargs)
+
+    @conditional(item_list_validators)
+    def catalogue(self, request, *args, **kwargs):
+        if fastpath.enabled(request):
+            return fastpath.list_response(self, self.get_queryset(), fastpath.item_plan(), fastpath.items)
+        return super().list(request, *args, **kwargs)
+
+    @conditional(item_validators)
+    def retrieve(self, request, *args, **kwargs):
+        item = self.get_object()
+        serializer = self.get_serializer(item)
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
         # Eco points awarded by post_save signal in core/signals.py
@@ -250,23 +365,89 @@ class ItemViewSet(viewsets.ModelViewSet):
         Suggests items from the user's closet that match this item.
         """
         item = self.get_object()
-        user_closet = ClosetItem.objects.filter(user=request.user)
-        
-        from .wardrobe_service import WardrobeService # Import here to avoid circular dependency if any
-        
-        matches = WardrobeService.generate_outfit(item, user_closet)
+        matches = WardrobeService.suggest_for_user(item, request.user)
         serializer = ClosetItemSerializer(matches, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
+    def similar(self, request, pk=None):
+        """
+        "More like this": the top-k (?k=, default 12, max 50) unsold items most
+        similar to this one. Served from the similarity index, built offline;
+        the item table is only read for the final id__in fetch of the results,
+        which also drops anything sold or deleted since the last build.
+        """
+        index = get_similarity_index()
+        if index is None:
+            return Response({'error': 'Similarity index is disabled'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        try:
+            item_id = int(pk)
+            k = min(max(int(request.query_params.get('k', 12)), 1), 50)
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid id or k'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not index.exists():
+            # Built offline by `manage.py build_similarity_index`, never per request
+            return Response({'error': 'Similarity index is not built'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        ids = index.similar(item_id, k)
+        if ids is None:
+            if not Item.objects.filter(id=item_id).exists():
+                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+            ids = []  # listed since the last build
+        items = Item.objects.filter(id__in=ids, is_sold=False).select_related('seller').prefetch_related(
+            'images').in_bulk()
+        serializer = self.get_serializer([items[i] for i in ids if i in items], many=True,
+                                         context={'request': request})
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def featured(self, request):
-        """Return featured items for the homepage gallery"""
-        items = Item.objects.filter(is_sold=False).select_related('seller').prefetch_related(
-            'images', 'likes', 'reviews'
-        ).order_by('-created_at')[:12]
+        """Return featured items for the homepage gallery: ranked for the
+        signed-in user (follows, likes, wishlist), global popularity otherwise."""
+        # Over-fetch so items sold since the feed was ranked don't leave the gallery short
+        ids = feed_service.feed_ids(request.user)[:FEATURED_COUNT * 3]
+        if fastpath.enabled(request):
+            rows = {row['id']: row for row in Item.objects.filter(id__in=ids, is_sold=False)
+                    .values(*fastpath.item_plan().columns)}
+            return Response(fastpath.items([rows[i] for i in ids if i in rows][:FEATURED_COUNT], request))
+        items = Item.objects.filter(id__in=ids, is_sold=False).select_related('seller').prefetch_related(
+            'images').in_bulk()
+        serializer = self.get_serializer([items[i] for i in ids if i in items][:FEATURED_COUNT], many=True,
+                                         context={'request': request})
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def trending(self, request):
+        """Unsold items by time-decayed engagement (see core/trending.py)."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        items = Item.objects.filter(is_sold=False, trending_score__gt=0).select_related('seller').prefetch_related(
+            'images').order_by('-trending_score')[:limit]
         serializer = self.get_serializer(items, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def following(self, request):
+        """New listings from sellers the user follows, newest first. Keyset
+        paginated: pass the `next` link (or ?before=<item id>) for older items."""
+        try:
+            before = int(request.query_params['before']) if 'before' in request.query_params else None
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            return Response({'error': 'Invalid before or limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = timeline_service.following_item_ids(request.user, before, limit)
+        items = Item.objects.filter(id__in=ids).select_related('seller').prefetch_related('images').in_bulk()
+        serializer = self.get_serializer([items[i] for i in ids if i in items], many=True,
+                                         context={'request': request})
+        next_url = None
+        if len(ids) == limit:
+            next_url = replace_query_param(request.build_absolute_uri(), 'before', ids[-1])
+        return Response({'next': next_url, 'results': serializer.data})
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def like(self, request, pk=None):
         item = self.get_object()
@@ -350,21 +531,29 @@ class GoogleLogin(APIView):
 
 # Phase 1 ViewSets
 
-class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+class OrderViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
-    
+    pagination_class = NewestFirstCursorPagination
+
     def get_queryset(self):
-        """Return orders where user is buyer or seller"""
-        return Order.objects.filter(
-            Q(buyer=self.request.user) | Q(item__seller=self.request.user)
-        )
+        """Orders the user bought (?role=buyer), sold (?role=seller), or both.
+        Each role is a range scan on its own (role, -created_at) index."""
+        user = self.request.user
+        role = self.request.query_params.get('role')
+        if role == 'buyer':
+            queryset = Order.objects.filter(buyer=user)
+        elif role == 'seller':
+            queryset = Order.objects.filter(seller=user)
+        else:
+            queryset = Order.objects.filter(Q(buyer=user) | Q(seller=user))
+        return queryset.select_related('buyer', 'seller', 'item').prefetch_related('item__images')
     
     @action(detail=True, methods=['patch'], permission_classes=[permissions.IsAuthenticated])
     def update_status(self, request, pk=None):
         """Update order status (seller only)"""
         order = self.get_object()
-        if order.item.seller != request.user:
+        if order.seller_id != request.user.id:
             return Response(
                 {'error': 'Only seller can update status'},
                 status=status.HTTP_403_FORBIDDEN
@@ -372,8 +561,11 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
         
         new_status = request.data.get('status')
         if new_status in dict(Order.STATUS_CHOICES):
-            order.status = new_status
-            order.save()
+            if new_status != order.status and not order.transition_to(new_status):
+                return Response(
+                    {'error': 'Order status changed meanwhile, reload and try again'},
+                    status=status.HTTP_409_CONFLICT
+                )
             serializer = self.get_serializer(order)
             return Response(serializer.data)
         return Response(
@@ -382,26 +574,70 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
         )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    pagination_class = NewestFirstCursorPagination
+    owner_field = 'reviewer'
+
     def get_queryset(self):
+        queryset = Review.objects.select_related('reviewer')
         item_id = self.request.query_params.get('item')
         if item_id:
-            return Review.objects.filter(item_id=item_id)
-        return Review.objects.all()
-    
-    def perform_create(self, serializer):
-        serializer.save(reviewer=self.request.user)
-
+            queryset = queryset.filter(item_id=item_id)
+        return queryset
 
-class WishlistViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        """One item's reviews (?item= is required), newest first, keyset
+        paginated on the (item, -created_at) index, with the item's stored
+        rating summary. The first page is served from the shared cache."""
+        try:
+            item_id = int(request.query_params.get('item', ''))
+        except ValueError:
+            return Response({'error': 'item is required'}, status=status.HTTP_400_BAD_REQUEST)
+        first_page = set(request.query_params) == {'item'}
+        if first_page:
+            version, data = ratings.cached_first_page(item_id)
+            if data is not None:
+                return Response(data)
+        item = get_object_or_404(Item.objects.only('id', *Item.RATING_FIELDS), id=item_id)
+        response = super().list(request, *args, **kwargs)
+        response.data['rating'] = ratings.summary(item)
+        if first_page:
+            ratings.cache_first_page(item_id, version, response.data)
+        return response
+
+    # Each write updates the stored item and seller ratings (core/ratings.py)
+    # in the same transaction
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            review = serializer.save(reviewer=self.request.user)
+            ratings.apply(review.item_id, added=[review.rating])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old_item_id, old_rating = (Review.objects.select_for_update()
+                                       .values_list('item_id', 'rating').get(pk=serializer.instance.pk))
+            review = serializer.save()
+            if review.item_id == old_item_id:
+                ratings.apply(review.item_id, added=[review.rating], removed=[old_rating])
+            else:
+                ratings.apply(old_item_id, removed=[old_rating])
+                ratings.apply(review.item_id, added=[review.rating])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.item_id, instance.rating = (Review.objects.select_for_update()
+                                                 .values_list('item_id', 'rating').get(pk=instance.pk))
+            instance.delete()  # core/signals.py takes the rating off
+
+
+class WishlistViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        return Wishlist.objects.filter(user=self.request.user).select_related('item__seller').prefetch_related('item__images')
     
     def create(self, request):
         item_id = request.data.get('item')
@@ -440,7 +676,7 @@ class WishlistViewSet(viewsets.ModelViewSet):
         return Response({'error': 'Item not in wishlist'}, status=status.HTTP_404_NOT_FOUND)
 
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from .models import EcoPointsHistory
 from .serializers import EcoPointsHistorySerializer
 
@@ -478,13 +714,22 @@ def create_checkout_session(request):
     if not item_ids:
         return Response({'error': 'No items provided'}, status=status.HTTP_400_BAD_REQUEST)
 
-    items = list(Item.objects.filter(id__in=item_ids))
+    drop_id = drop_mode.live_drop_for(item_ids)
+    if drop_id is not None:
+        try:
+            drop_mode.admission_gate.admit(drop_id)
+        except drop_mode.QueueFull as e:
+            return Response({'error': 'This drop is very busy, please try again in a moment'},
+                            status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={'Retry-After': str(e.retry_after)})
+
+    items = list(Item.objects.filter(id__in=item_ids).prefetch_related('images'))
     if len(items) != len(item_ids):
         return Response({'error': 'One or more items were not found'}, status=status.HTTP_404_NOT_FOUND)
 
     # Validate every item up front — never create a session for a partially-valid cart
     for item in items:
-        if item.seller == request.user:
+        if item.seller_id == request.user.id:
             return Response({'error': f'Cannot purchase your own item: {item.title}'},
                             status=status.HTTP_400_BAD_REQUEST)
         if item.is_sold:
@@ -493,23 +738,70 @@ def create_checkout_session(request):
 
     frontend_url = settings.FRONTEND_URL if hasattr(settings, 'FRONTEND_URL') else 'http://localhost:3000'
     success_url = f"{frontend_url}/orders?success=true&session_id={{CHECKOUT_SESSION_ID}}"
-    cancel_url = f"{frontend_url}/items/{items[0].id}" if len(items) == 1 else f"{frontend_url}/"
+    cancel_url = (f"{frontend_url}/items/{items[0].id}" if len(items) == 1 else f"{frontend_url}/") + "?checkout=cancelled"
+
+    try:
+        hold_until = reservations.reserve(item_ids, request.user)
+    except reservations.ItemUnavailable:
+        return Response({'error': 'Someone else is checking out one of these items right now'},
+                        status=status.HTTP_409_CONFLICT)
 
     try:
-        session = StripeService.create_checkout_session(items, success_url, cancel_url)
+        # Stripe refuses payment after expires_at, so a buyer can't pay for a lapsed hold
+        session = StripeService.create_checkout_session(items, success_url, cancel_url,
+                                                        expires_at=hold_until)
 
         # One Order per item, all keyed to session.id (payment_intent is None at creation time)
         Order.objects.bulk_create([
-            Order(buyer=request.user, item=item, status='PENDING',
+            Order(buyer=request.user, item=item, seller_id=item.seller_id, status='PENDING',
                   stripe_payment_intent=session.id, total_amount=item.price)
             for item in items
         ])
-
-        return Response({'sessionId': session.id, 'url': session.url})
     except Exception as e:
+        reservations.release(item_ids, request.user)
         logger.exception('Stripe checkout session creation failed')
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    for old_session_id in reservations.supersede(item_ids, request.user, session.id):
+        try:
+            StripeService.expire_checkout_session(old_session_id)
+        except Exception:
+            logger.warning('Could not expire superseded Stripe session %s', old_session_id)
+
+    return Response({'sessionId': session.id, 'url': session.url})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def cancel_checkout_session(request):
+    """Buyer backed out of Stripe Checkout: cancel the session's pending orders
+    and release the items straight away instead of when the hold lapses."""
+    session_id = request.data.get('session_id')
+    if not session_id:
+        return Response({'error': 'session_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if not reservations.cancel_session(session_id, buyer=request.user):
+        return Response({'error': 'No pending checkout for this session'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        StripeService.expire_checkout_session(session_id)
+    except Exception:
+        logger.warning('Could not expire cancelled Stripe session %s', session_id)
+    return Response({'status': 'cancelled'})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([])
+@csrf_exempt
+def run_scheduled_jobs(request):
+    """Cloud Scheduler's once-a-minute tick (core/scheduled.py). Authenticated
+    by the shared X-Cron-Secret header; disabled while CRON_SECRET is unset."""
+    secret = request.META.get('HTTP_X_CRON_SECRET', '')
+    if not settings.CRON_SECRET or not hmac.compare_digest(secret, settings.CRON_SECRET):
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    ran, failed = scheduled.run_due(timezone.now())
+    return Response({'ran': ran, 'failed': failed},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR if failed else status.HTTP_200_OK)
+
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
@@ -533,30 +825,8 @@ def stripe_webhook(request):
     except stripe.error.SignatureVerificationError:
         return Response({'error': 'Invalid signature'}, status=400)
     
-    # Handle the event
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        handle_checkout_completion(session)
-    elif event['type'] == 'payment_intent.succeeded':
-        payment_intent = event['data']['object']
-        # Handle successful payment intent if needed
-        pass
-    
-    return Response({'status': 'success'})
-
+    # Inbox it and acknowledge; redeliveries of a known event id stop here
+    if payments.receive(json.loads(payload)):
+        tasks.enqueue(payments.process_due)
 
-def handle_checkout_completion(session):
-    """Mark every order for this checkout session PAID. Idempotent: a replayed
-    webhook skips orders already PAID, so no double eco points or emails."""
-    session_id = session.get('id')
-    orders = Order.objects.filter(stripe_payment_intent=session_id)
-    if not orders:
-        logger.warning('Stripe webhook: no orders found for session %s', session_id)
-        return
-
-    for order in orders:
-        if order.status == 'PAID':
-            continue
-        order.status = 'PAID'
-        order.save()  # PENDING→PAID triggers award_points_for_purchase + order emails
-        Item.objects.filter(id=order.item_id).update(is_sold=True)
+    return Response({'status': 'success'})
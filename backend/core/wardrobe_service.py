@@ -1,30 +1,258 @@
-import random
+import colorsys
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+# Named colours sellers and closet owners actually type, mapped to RGB. The first
+# palette word found in free text wins, so "navy blue" embeds as navy.
+COLOR_PALETTE = {
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+    'cream': (255, 253, 208),
+    'ivory': (255, 255, 240),
+    'grey': (128, 128, 128),
+    'gray': (128, 128, 128),
+    'charcoal': (54, 69, 79),
+    'beige': (225, 198, 153),
+    'khaki': (195, 176, 145),
+    'tan': (210, 180, 140),
+    'brown': (120, 72, 36),
+    'camel': (193, 154, 107),
+    'red': (200, 30, 30),
+    'burgundy': (128, 0, 32),
+    'maroon': (128, 0, 0),
+    'pink': (255, 160, 190),
+    'orange': (240, 130, 30),
+    'rust': (183, 65, 14),
+    'yellow': (245, 215, 40),
+    'mustard': (225, 173, 1),
+    'gold': (212, 175, 55),
+    'green': (40, 150, 60),
+    'olive': (110, 110, 40),
+    'sage': (156, 175, 136),
+    'teal': (0, 128, 128),
+    'blue': (30, 80, 200),
+    'denim': (21, 96, 189),
+    'navy': (20, 30, 80),
+    'purple': (110, 40, 150),
+    'lavender': (190, 170, 230),
+    'silver': (192, 192, 192),
+}
+
+# What completes an outfit around each category, best first. Categories not
+# listed for a target still get matched, just after these.
+COMPLEMENTS = {
+    'TOP': ['BOTTOM', 'SHOES', 'OUTERWEAR', 'ACCESSORY'],
+    'BOTTOM': ['TOP', 'SHOES', 'OUTERWEAR', 'ACCESSORY'],
+    'SHOES': ['BOTTOM', 'TOP', 'ACCESSORY', 'OUTERWEAR'],
+    'OUTERWEAR': ['TOP', 'BOTTOM', 'SHOES', 'ACCESSORY'],
+    'ACCESSORY': ['TOP', 'BOTTOM', 'SHOES', 'OUTERWEAR'],
+}
+
+CATEGORY_KEYWORDS = {
+    'BOTTOM': ['jeans', 'denims', 'trousers', 'pants', 'chinos', 'skirt', 'shorts', 'joggers'],
+    'OUTERWEAR': ['jacket', 'coat', 'windbreaker', 'blazer', 'parka', 'puffer', 'cardigan'],
+    'SHOES': ['sneakers', 'shoes', 'boots', 'loafers', 'heels', 'sandals', 'trainers'],
+    'ACCESSORY': ['bag', 'hat', 'cap', 'belt', 'scarf', 'watch', 'sunglasses', 'jewellery', 'jewelry'],
+    'TOP': ['shirt', 'tee', 't-shirt', 'top', 'blouse', 'sweater', 'hoodie', 'sweatshirt', 'polo', 'kurta'],
+}
+
+# Embedding layout: unit hue vector (cos, sin), saturation, lightness.
+NEUTRAL_EMBEDDING = [1.0, 0.0, 0.0, 0.5]
+NEUTRAL_SATURATION = 0.15
+
+_WORD_RE = re.compile(r"[a-z0-9\-]+")
+
+
+def color_embedding(color):
+    """Embed a free-text colour name as [cos(hue), sin(hue), saturation,
+    lightness], or None when no known colour appears in the text."""
+    words = _WORD_RE.findall((color or '').lower())
+    for word in words:
+        rgb = COLOR_PALETTE.get(word)
+        if rgb:
+            h, l, s = colorsys.rgb_to_hls(*(c / 255 for c in rgb))
+            angle = 2 * np.pi * h
+            return [round(float(np.cos(angle)), 4), round(float(np.sin(angle)), 4), round(s, 4), round(l, 4)]
+    return None
+
+
+def infer_category(text):
+    """Best-effort category for a marketplace Item, which has no category field."""
+    words = set(_WORD_RE.findall((text or '').lower()))
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if words.intersection(keywords):
+            return category
+    return None
+
+
+def harmony_scores(target, candidates):
+    """Vectorised colour-harmony score in [0, 1] of each candidate row against
+    the target embedding. Neutrals go with everything; otherwise complementary,
+    analogous and triadic hue offsets score highest, plus a little for
+    light/dark contrast."""
+    cos_delta = np.clip(candidates[:, 0] * target[0] + candidates[:, 1] * target[1], -1.0, 1.0)
+    delta = np.degrees(np.arccos(cos_delta))
+
+    def bump(centre, width):
+        return np.exp(-((delta - centre) ** 2) / (2 * width ** 2))
+
+    hue_score = np.maximum.reduce([
+        bump(180, 25),        # complementary
+        0.9 * bump(30, 20),   # analogous
+        0.8 * bump(120, 20),  # triadic
+        0.6 * bump(0, 10),    # monochrome
+    ])
+    neutral = (candidates[:, 2] < NEUTRAL_SATURATION) | (target[2] < NEUTRAL_SATURATION)
+    score = np.where(neutral, 0.8, hue_score)
+    contrast = np.abs(candidates[:, 3] - target[3])
+    return np.clip(0.8 * score + 0.2 * contrast, 0.0, 1.0)
+
+
+CATEGORIES = list(COMPLEMENTS)
+
+
+class ClosetMatrix:
+    """One user's closet as parallel arrays: closet item ids, category codes
+    (indexes into CATEGORIES) and an (n, 4) float32 embedding matrix."""
+
+    __slots__ = ('ids', 'categories', 'embeddings')
+
+    def __init__(self, rows):
+        """rows: iterable of (id, category, color, color_embedding)."""
+        rows = list(rows)
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.categories = np.array([CATEGORIES.index(r[1]) for r in rows], dtype=np.int8)
+        self.embeddings = np.array(
+            [r[3] or color_embedding(r[2]) or NEUTRAL_EMBEDDING for r in rows], dtype=np.float32,
+        ).reshape(len(rows), 4)
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.categories.nbytes + self.embeddings.nbytes
+
+    def best_matches(self, target_item, k=3):
+        """Indexes of the top-k complementary pieces, at most one per category."""
+        if not len(self.ids):
+            return []
+
+        text = ' '.join(filter(None, [
+            getattr(target_item, 'title', ''),
+            getattr(target_item, 'description', ''),
+        ]))
+        target_category = getattr(target_item, 'category', None) or infer_category(text)
+        target_embedding = color_embedding(getattr(target_item, 'color', None) or text)
+
+        keep = self.categories != (CATEGORIES.index(target_category) if target_category else -1)
+        if not keep.any():
+            return []
+
+        # An unknown colour is treated as neutral: it goes with everything, so
+        # ranking falls back to outfit structure and light/dark contrast.
+        target = np.asarray(target_embedding or NEUTRAL_EMBEDDING, dtype=np.float32)
+        scores = harmony_scores(target, self.embeddings)
+
+        order = COMPLEMENTS.get(target_category, CATEGORIES)
+        rank_of_code = np.array([order.index(c) if c in order else len(order) for c in CATEGORIES])
+        ranks = rank_of_code[self.categories]
+
+        # Best item per category: sort by (category, -score, index) and take
+        # the first of each run.
+        idx = np.flatnonzero(keep)
+        idx = idx[np.lexsort((idx, -scores[idx], ranks[idx]))]
+        _, first = np.unique(ranks[idx], return_index=True)
+        return idx[first][:k].tolist()
+
+
+class ClosetMatrixCache:
+    """Process-local LRU of ClosetMatrix per user. Built lazily on first lookup
+    and dropped by the ClosetItem save/delete signals in core/signals.py.
+
+    Invalidation only reaches this process, so entries also expire after
+    `ttl` seconds; that bounds how long another instance serves a stale
+    closet. A matrix whose read raced an invalidation is returned but not
+    stored (per-user generation check)."""
+
+    def __init__(self, max_users, ttl=60):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                return entry[0]
+            generation = self._generations.get(user_id, 0)
+
+        from .models import ClosetItem
+        matrix = ClosetMatrix(
+            ClosetItem.objects.filter(user_id=user_id)
+            .order_by('-created_at')
+            .values_list('id', 'category', 'color', 'color_embedding')
+        )
+        self.put(user_id, matrix, generation)
+        return matrix
+
+    def put(self, user_id, matrix, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generations.get(user_id, 0):
+                return
+            self._entries[user_id] = (matrix, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(m.nbytes for m, _ in self._entries.values())
+
+
+closet_cache = ClosetMatrixCache(getattr(settings, 'WARDROBE_CACHE_MAX_USERS', 2000),
+                                 getattr(settings, 'WARDROBE_CACHE_TTL', 60))
+
 
 class WardrobeService:
     @staticmethod
-    def generate_outfit(target_item, user_closet_items):
+    def generate_outfit(target_item, user_closet_items, k=3):
         """
-        Suggests items from the user's closet that match the target item.
-        Returns a list of ClosetItem objects.
+        Suggests items from the given closet queryset that match the target item.
+        Returns up to k ClosetItem objects, at most one per category, best
+        outfit-completing and colour-harmonious pieces first.
         """
-        # Mock Logic:
-        # 1. Filter closet items to exclude the same category as the target item (e.g., don't match a top with a top)
-        # 2. Randomly select 1-3 items from the remaining categories.
-        
-        # In a real app, this would use color theory, style matching, etc.
-        
-        target_category = getattr(target_item, 'category', None) # Assuming Item might have category later, or we infer it
-        
-        # Simple category inference for the target item if it doesn't have a category field yet
-        # This is a placeholder since our Item model doesn't strictly have 'category' yet in the snippet I saw, 
-        # but let's assume we might add it or infer it from description.
-        # For now, we'll just return random items from the closet.
-        
-        if not user_closet_items.exists():
-            return []
+        closet = list(user_closet_items)
+        matrix = ClosetMatrix((c.id, c.category, c.color, c.color_embedding) for c in closet)
+        return [closet[i] for i in matrix.best_matches(target_item, k)]
 
-        # Pick 3 random items
-        count = user_closet_items.count()
-        num_to_pick = min(3, count)
-        
-        return random.sample(list(user_closet_items), num_to_pick)
+    @staticmethod
+    def suggest_for_user(target_item, user, k=3):
+        """Same as generate_outfit, but scores against the user's cached closet
+        matrix, so only the k winning rows are read from the database."""
+        from .models import ClosetItem
+        matrix = closet_cache.get(user.id)
+        ids = [int(matrix.ids[i]) for i in matrix.best_matches(target_item, k)]
+        if not ids:
+            return []
+        by_id = ClosetItem.objects.in_bulk(ids)
+        return [by_id[i] for i in ids if i in by_id]
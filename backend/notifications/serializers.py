@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from core.serializers import UserSummarySerializer
+from core.sparse import SparseFieldsMixin
 from .models import Notification
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'message', 'notification_type', 'is_read', 'created_at']
+        expandable_fields = {'sender': lambda: UserSummarySerializer(read_only=True)}
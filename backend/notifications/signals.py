@@ -1,8 +1,12 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from core.models import Like, Order, Follow
+from django.utils import timezone
+from core.models import Like, Follow
+from core import tasks
+from core.signals import orders_paid
 from chat.models import Message
 from .models import Notification
+from . import unread
 from core.emails import (
     send_order_confirmation,
     send_new_order_notification,
@@ -10,6 +14,11 @@ from core.emails import (
     send_new_follower_notification,
 )
 
+@receiver(post_save, sender=Notification)
+def count_unread(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        unread.incr(instance.recipient_id)
+
 @receiver(post_save, sender=Like)
 def create_like_notification(sender, instance, created, **kwargs):
     if created and instance.user != instance.item.seller:
@@ -26,23 +35,29 @@ def create_message_notification(sender, instance, created, **kwargs):
         # Determine recipient (the other person in the conversation)
         recipient = instance.conversation.participants.exclude(id=instance.sender.id).first()
         if recipient:
-            Notification.objects.create(
-                recipient=recipient,
-                sender=instance.sender,
-                notification_type='message',
-                message=f"New message from {instance.sender.username}"
-            )
+            # One unread notification per sender: later messages just move it to the top
+            coalesced = Notification.objects.filter(
+                recipient=recipient, sender=instance.sender, notification_type='message', is_read=False,
+            ).update(created_at=timezone.now())
+            if not coalesced:
+                Notification.objects.create(
+                    recipient=recipient,
+                    sender=instance.sender,
+                    notification_type='message',
+                    message=f"New message from {instance.sender.username}"
+                )
             send_new_message_notification(instance)
 
-@receiver(post_save, sender=Order)
-def order_paid(sender, instance, created, **kwargs):
-    """Send order emails only once the order is actually PAID — never on the
-    PENDING order created at checkout. Relies on _old_status set by the pre_save
-    hook in core.signals.capture_old_order_status."""
-    old_status = getattr(instance, '_old_status', None)
-    if instance.status == 'PAID' and old_status != 'PAID':
-        send_order_confirmation(instance)     # to buyer
-        send_new_order_notification(instance)  # to seller
+@receiver(orders_paid)
+def order_paid(sender, orders, **kwargs):
+    """Send order emails only once an order is actually PAID — never on the
+    PENDING order created at checkout. Best effort, after commit."""
+    tasks.enqueue(send_order_emails, orders)
+
+def send_order_emails(orders):
+    for order in orders:
+        send_order_confirmation(order)     # to buyer
+        send_new_order_notification(order)  # to seller
 
 @receiver(post_save, sender=Follow)
 def follow_created(sender, instance, created, **kwargs):
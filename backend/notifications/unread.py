@@ -0,0 +1,42 @@
+"""
+Per-user unread notification counts for the bell badge.
+
+The count lives in the shared cache: each new notification increments it and
+mark_all_read resets it, once the write commits; pruning forgets it. A missing count is recounted
+from the (recipient, is_read) index and cached for NOTIFICATION_UNREAD_TTL,
+which also bounds drift from a notification racing a recount.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Notification
+
+UNREAD_KEY = 'notifications:unread:{}'
+
+
+def count(user_id):
+    key = UNREAD_KEY.format(user_id)
+    n = caches['shared'].get(key)
+    if n is None:
+        n = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        caches['shared'].add(key, n, settings.NOTIFICATION_UNREAD_TTL)
+    return n
+
+
+def incr(user_id):
+    def bump():
+        try:
+            caches['shared'].incr(UNREAD_KEY.format(user_id))
+        except ValueError:
+            pass  # not cached; the next read recounts
+    transaction.on_commit(bump)
+
+
+def reset(user_id):
+    transaction.on_commit(
+        lambda: caches['shared'].set(UNREAD_KEY.format(user_id), 0, settings.NOTIFICATION_UNREAD_TTL))
+
+
+def forget(*user_ids):
+    caches['shared'].delete_many([UNREAD_KEY.format(i) for i in user_ids])
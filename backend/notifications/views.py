@@ -1,17 +1,43 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count, Max, Q
+from core import fastpath
+from core.conditional import conditional
+from core.pagination import NewestFirstCursorPagination
+from core.sparse import SparseQuerysetMixin
 from .models import Notification
 from .serializers import NotificationSerializer
+from . import unread
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+def notification_validators(view, request, *args, **kwargs):
+    stats = view.get_queryset().order_by().aggregate(
+        n=Count('id'), last_id=Max('id'), unread=Count('id', filter=Q(is_read=False)), last=Max('created_at'),
+    )
+    return stats, stats['last']
+
+
+class NotificationViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NewestFirstCursorPagination
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user)
 
+    @conditional(notification_validators)
+    def list(self, request, *args, **kwargs):
+        if fastpath.enabled(request):
+            return fastpath.list_response(self, self.get_queryset(), fastpath.notification_plan(),
+                                          fastpath.notifications)
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        unread.reset(request.user.id)
         return Response({'status': 'ok'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': unread.count(request.user.id)})
@@ -15,6 +15,10 @@ interface DashboardStats {
     total_listings: number;
     total_likes: number;
     total_sales: number;
+    total_orders: number;
+    total_views: number;
+    co2_saved: number;
+    water_saved: number;
 }
 
 export default function DashboardPage() {
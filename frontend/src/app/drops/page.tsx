@@ -17,7 +17,7 @@ interface DropEvent {
     start_time: string;
     end_time: string;
     image: string;
-    items: number[];
+    item_count: number;
 }
 
 export default function DropsPage() {
@@ -146,6 +146,7 @@ export default function DropsPage() {
                                 <div className="p-6">
                                     <h4 className="mb-2 text-xl font-bold text-foreground">{drop.title}</h4>
                                     <p className="line-clamp-2 text-sm text-muted-foreground">{drop.description}</p>
+                                    <p className="mt-3 font-mono text-xs text-muted">{drop.item_count} pieces</p>
                                 </div>
                             </div>
                         ))}
@@ -19,14 +19,14 @@ interface Order {
         username: string;
         profile_picture: string | null;
     };
+    seller: {
+        username: string;
+    };
     item: {
         id: number;
         title: string;
         price: string;
         images: Array<{ image: string }>;
-        seller: {
-            username: string;
-        };
     };
     status: string;
     total_amount: string;
@@ -53,10 +53,10 @@ function OrdersContent() {
     const router = useRouter();
     const searchParams = useSearchParams();
     const { clearCart } = useCart();
-    const [orders, setOrders] = useState<Order[]>([]);
+    const [purchases, setPurchases] = useState<Order[]>([]);
+    const [sales, setSales] = useState<Order[]>([]);
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState<'purchases' | 'sales'>('purchases');
-    const [currentUsername, setCurrentUsername] = useState<string | null>(null);
     const justPaid = searchParams.get('success') === 'true';
 
     useEffect(() => {
@@ -67,12 +67,14 @@ function OrdersContent() {
     }, [justPaid, clearCart, router]);
 
     useEffect(() => {
-        setCurrentUsername(localStorage.getItem('username'));
-
         const fetchOrders = async () => {
             try {
-                const response = await api.get('/api/orders/');
-                setOrders(unwrap<Order>(response));
+                const [bought, sold] = await Promise.all([
+                    api.get('/api/orders/?role=buyer'),
+                    api.get('/api/orders/?role=seller'),
+                ]);
+                setPurchases(unwrap<Order>(bought));
+                setSales(unwrap<Order>(sold));
             } catch (err) {
                 console.error('Failed to fetch orders', err);
             } finally {
@@ -83,8 +85,6 @@ function OrdersContent() {
         fetchOrders();
     }, []);
 
-    const purchases = orders.filter(order => order.buyer.username === currentUsername);
-    const sales = orders.filter(order => order.item && order.buyer.username !== currentUsername);
     const displayOrders = activeTab === 'purchases' ? purchases : sales;
 
     if (loading) {
@@ -197,7 +197,7 @@ function OrdersContent() {
                                         </span>
                                         {activeTab === 'purchases' && (
                                             <span className="text-sm text-muted-foreground">
-                                                Sold by @{order.item.seller?.username || 'Unknown'}
+                                                Sold by @{order.seller?.username || 'Unknown'}
                                             </span>
                                         )}
                                         {activeTab === 'sales' && (
@@ -4,7 +4,7 @@ import { useState } from 'react';
 import { ShoppingBag, ShoppingCart } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import api from '@/lib/api';
-import { useCart } from '@/context/CartContext';
+import { CHECKOUT_SESSION_KEY, useCart } from '@/context/CartContext';
 import { motion } from 'framer-motion';
 
 interface BuyButtonProps {
@@ -38,6 +38,7 @@ export default function BuyButton({ itemId, price, title = 'Item', image = '', s
 
             // Redirect to Stripe Checkout URL
             if (data.url) {
+                sessionStorage.setItem(CHECKOUT_SESSION_KEY, data.sessionId);
                 window.location.href = data.url;
             } else {
                 throw new Error('No checkout URL returned');
@@ -1,7 +1,7 @@
 'use client';
 
 import { useState } from 'react';
-import { useCart } from '@/context/CartContext';
+import { CHECKOUT_SESSION_KEY, useCart } from '@/context/CartContext';
 import { motion, AnimatePresence } from 'framer-motion';
 import { X, ShoppingBag, Trash2, ArrowRight } from 'lucide-react';
 import { Button } from '@/components/ui/button';
@@ -25,6 +25,7 @@ export default function CartDrawer() {
                 item_ids: items.map((i) => i.id),
             });
             if (data.url) {
+                sessionStorage.setItem(CHECKOUT_SESSION_KEY, data.sessionId);
                 // Cart is cleared on the /orders success return, not here — a
                 // cancelled payment must leave the cart intact.
                 window.location.href = data.url;
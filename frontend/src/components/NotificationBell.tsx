@@ -22,26 +22,24 @@ export default function NotificationBell() {
     const [isOpen, setIsOpen] = useState(false);
     const dropdownRef = useRef<HTMLDivElement>(null);
 
-    // Poll every 30s (WebSockets aren't available on the WSGI backend). Pause
+    // Poll the badge count every 30s (WebSockets aren't available on the WSGI
+    // backend); the list itself is only fetched when the dropdown opens. Pause
     // while the tab is hidden so a backgrounded tab makes no requests.
     useEffect(() => {
         let cancelled = false;
 
-        const fetchNotifications = async () => {
+        const fetchUnreadCount = async () => {
             if (document.hidden) return;
             try {
-                const response = await api.get('/api/notifications/');
-                if (cancelled) return;
-                const data = unwrap<Notification>(response);
-                setNotifications(data);
-                setUnreadCount(data.filter((n) => !n.is_read).length);
+                const response = await api.get('/api/notifications/unread_count/');
+                if (!cancelled) setUnreadCount(response.data.unread_count);
             } catch {
                 // Not authenticated / offline — leave state as-is
             }
         };
 
-        fetchNotifications();
-        const interval = setInterval(fetchNotifications, POLL_MS);
+        fetchUnreadCount();
+        const interval = setInterval(fetchUnreadCount, POLL_MS);
         return () => {
             cancelled = true;
             clearInterval(interval);
@@ -60,10 +58,17 @@ export default function NotificationBell() {
 
     const handleBellClick = () => {
         setIsOpen(!isOpen);
-        if (!isOpen && unreadCount > 0) {
-            setUnreadCount(0);
-            api.post('/api/notifications/mark_all_read/').catch(() => {});
-        }
+        if (isOpen) return;
+        // Mark read only after the list loads, so unread rows still show as new
+        api.get('/api/notifications/')
+            .then((response) => {
+                setNotifications(unwrap<Notification>(response));
+                if (unreadCount > 0) {
+                    setUnreadCount(0);
+                    return api.post('/api/notifications/mark_all_read/');
+                }
+            })
+            .catch(() => {});
     };
 
     return (
@@ -4,7 +4,7 @@ import { useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import { User, MessageSquare } from 'lucide-react';
 import Image from 'next/image';
-import api from '@/lib/api';
+import api, { unwrap } from '@/lib/api';
 import StarRating from './StarRating';
 
 interface Review {
@@ -18,6 +18,12 @@ interface Review {
     created_at: string;
 }
 
+interface RatingSummary {
+    average: number | null;
+    count: number;
+    histogram: Record<string, number>;
+}
+
 interface ReviewListProps {
     itemId: number;
     refreshTrigger?: number;
@@ -26,7 +32,9 @@ interface ReviewListProps {
 export default function ReviewList({ itemId, refreshTrigger = 0 }: ReviewListProps) {
     const [reviews, setReviews] = useState<Review[]>([]);
     const [loading, setLoading] = useState(true);
-    const [averageRating, setAverageRating] = useState(0);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [nextUrl, setNextUrl] = useState<string | null>(null);
+    const [summary, setSummary] = useState<RatingSummary | null>(null);
 
     useEffect(() => {
         fetchReviews();
@@ -34,16 +42,11 @@ export default function ReviewList({ itemId, refreshTrigger = 0 }: ReviewListPro
 
     const fetchReviews = async () => {
         try {
+            // Cursor-paginated; the stored rating summary comes with every page
             const response = await api.get(`/api/reviews/?item=${itemId}`);
-            // Handle paginated response - extract results array
-            const reviewsData = response.data.results || response.data;
-            setReviews(Array.isArray(reviewsData) ? reviewsData : []);
-
-            // Calculate average rating
-            if (Array.isArray(reviewsData) && reviewsData.length > 0) {
-                const avg = reviewsData.reduce((sum: number, r: Review) => sum + r.rating, 0) / reviewsData.length;
-                setAverageRating(avg);
-            }
+            setReviews(unwrap<Review>(response));
+            setNextUrl(response.data.next ?? null);
+            setSummary(response.data.rating ?? null);
         } catch (err) {
             console.error('Failed to fetch reviews', err);
         } finally {
@@ -51,6 +54,23 @@ export default function ReviewList({ itemId, refreshTrigger = 0 }: ReviewListPro
         }
     };
 
+    const loadMore = async () => {
+        if (!nextUrl || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const response = await api.get(nextUrl);
+            setReviews(prev => [...prev, ...unwrap<Review>(response)]);
+            setNextUrl(response.data.next ?? null);
+        } catch (err) {
+            console.error('Failed to load more reviews', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    const averageRating = summary?.average ?? 0;
+    const reviewCount = summary?.count ?? reviews.length;
+
     if (loading) {
         return (
             <div className="text-center py-8">
@@ -62,18 +82,18 @@ export default function ReviewList({ itemId, refreshTrigger = 0 }: ReviewListPro
     return (
         <div>
             {/* Average Rating */}
-            {reviews.length > 0 && (
+            {reviewCount > 0 && (
                 <div className="mb-6 p-6 bg-card border border-border rounded-2xl">
                     <div className="flex items-center gap-4">
                         <div className="text-center">
                             <div className="text-4xl font-bold text-base-03">{averageRating.toFixed(1)}</div>
                             <StarRating rating={Math.round(averageRating)} readonly size="sm" />
-                            <div className="text-sm text-base-02 mt-1">{reviews.length} review{reviews.length !== 1 ? 's' : ''}</div>
+                            <div className="text-sm text-base-02 mt-1">{reviewCount} review{reviewCount !== 1 ? 's' : ''}</div>
                         </div>
                         <div className="flex-1">
                             {[5, 4, 3, 2, 1].map((star) => {
-                                const count = reviews.filter(r => r.rating === star).length;
-                                const percentage = (count / reviews.length) * 100;
+                                const count = summary?.histogram[star] ?? 0;
+                                const percentage = (count / reviewCount) * 100;
                                 return (
                                     <div key={star} className="flex items-center gap-2 mb-1">
                                         <span className="text-sm text-base-02 w-8">{star}★</span>
@@ -145,6 +165,15 @@ export default function ReviewList({ itemId, refreshTrigger = 0 }: ReviewListPro
                             </div>
                         </motion.div>
                     ))}
+                    {nextUrl && (
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="w-full py-3 text-sm font-medium text-base-02 bg-card border border-border rounded-2xl hover:bg-base-2 disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Loading...' : 'Show more reviews'}
+                        </button>
+                    )}
                 </div>
             )}
         </div>
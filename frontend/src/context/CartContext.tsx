@@ -1,6 +1,11 @@
 'use client';
 
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
+import api from '@/lib/api';
+
+// Stripe session id of the checkout in flight, so backing out of Stripe can
+// release the items held for it instead of leaving them locked until expiry.
+export const CHECKOUT_SESSION_KEY = 'checkout_session';
 
 export interface CartItem {
     id: number;
@@ -39,6 +44,13 @@ export function CartProvider({ children }: { children: ReactNode }) {
         }
     }, []);
 
+    useEffect(() => {
+        const sessionId = sessionStorage.getItem(CHECKOUT_SESSION_KEY);
+        if (!sessionId || new URLSearchParams(window.location.search).get('checkout') !== 'cancelled') return;
+        sessionStorage.removeItem(CHECKOUT_SESSION_KEY);
+        api.post('/api/cancel-checkout-session/', { session_id: sessionId }).catch(() => {});
+    }, []);
+
     // Save cart to local storage whenever it changes
     useEffect(() => {
         localStorage.setItem('cart', JSON.stringify(items));